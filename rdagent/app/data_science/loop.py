@@ -1,3 +1,4 @@
+import pickle
 from pathlib import Path
 from typing import Any
 
@@ -27,6 +28,40 @@ from rdagent.scenarios.data_science.experiment.experiment import DSExperiment
 from rdagent.scenarios.data_science.proposal.exp_gen import DSExpGen, DSTrace
 from rdagent.scenarios.kaggle.kaggle_crawler import download_data
 
+TRACE_HIST_TAG = "trace_hist"
+TRACE_RESTART_TAG = "trace_restart"
+SOTA_POINTER_TAG = "SOTA experiment index"
+
+
+def replay_trace_log(trace: DSTrace, tag: str, content: Any) -> None:
+    """
+    Apply one message logged by `DataScienceRDLoop.record` to `trace`.
+    `tag` is the tag of the message without the loop prefix (e.g. "trace_hist").
+    """
+    if tag == TRACE_HIST_TAG:
+        trace.hist.append(content)
+    elif tag == TRACE_RESTART_TAG:
+        trace.hist = []
+    elif tag == "trace" and isinstance(content, DSTrace):
+        trace.hist = list(content.hist)  # the full trace logged by former versions
+
+
+def load_trace_from_log(log_path: str | Path, scen: Scenario | None = None) -> DSTrace:
+    """
+    Rebuild the trace from the log folder of a `DataScienceRDLoop` run.
+    Only the messages of the trace are loaded, so it is much cheaper than iterating the whole log.
+    """
+    trace = DSTrace(scen=scen)
+    files = [
+        fp
+        for fp in Path(log_path).glob("Loop_*/record/*/*/*.pkl")
+        if fp.parent.parent.name in (TRACE_HIST_TAG, TRACE_RESTART_TAG, "trace")
+    ]
+    for fp in sorted(files, key=lambda fp: fp.stem):  # the file name is the timestamp
+        with fp.open("rb") as f:
+            replay_trace_log(trace, fp.parent.parent.name, pickle.load(f))
+    return trace
+
 
 class DataScienceRDLoop(RDLoop):
     skip_loop_error = (CoderError, RunnerError)
@@ -129,17 +164,26 @@ class DataScienceRDLoop(RDLoop):
                     ExperimentFeedback.from_exception(e),
                 )
             )
-            if self.trace.sota_experiment() is None and len(self.trace.hist) >= DS_RD_SETTING.consecutive_errors:
-                # if {in inital/drafting stage} and {tried enough times}
-                for _, fb in self.trace.hist[-DS_RD_SETTING.consecutive_errors :]:
-                    if fb:
-                        break  # any success will stop restarting.
-                else:  # otherwise restart it
-                    logger.error("Consecutive errors reached the limit. Dumping trace.")
-                    logger.log_object(self.trace, tag="trace before restart")
-                    self.trace = DSTrace(scen=self.trace.scen, knowledge_base=self.trace.knowledge_base)
-        logger.log_object(self.trace, tag="trace")
-        logger.log_object(self.trace.sota_experiment(), tag="SOTA experiment")
+        # Only the new record and the position of the SOTA experiment in the trace are logged.
+        # The full trace can be rebuilt by `load_trace_from_log`.
+        logger.log_object(self.trace.hist[-1], tag=TRACE_HIST_TAG)
+        if (
+            e is not None
+            and self.trace.sota_experiment() is None
+            and len(self.trace.hist) >= DS_RD_SETTING.consecutive_errors
+        ):
+            # if {in inital/drafting stage} and {tried enough times}
+            for _, fb in self.trace.hist[-DS_RD_SETTING.consecutive_errors :]:
+                if fb:
+                    break  # any success will stop restarting.
+            else:  # otherwise restart it
+                logger.error("Consecutive errors reached the limit. Restarting trace.")
+                logger.log_object(len(self.trace.hist), tag=TRACE_RESTART_TAG)
+                self.trace = DSTrace(scen=self.trace.scen, knowledge_base=self.trace.knowledge_base)
+        sota_exp = self.trace.sota_experiment()
+        logger.log_object(
+            next((i for i, (exp, _) in enumerate(self.trace.hist) if exp is sota_exp), None), tag=SOTA_POINTER_TAG
+        )
 
 
 def main(
@@ -46,6 +46,21 @@ class KaggleBasePropSetting(ExtendedBaseSettings):
     local_data_path: str = ""
     """Folder storing Kaggle competition data"""
 
+    feature_cache_path: str = "git_ignore_folder/kaggle_feature_cache"
+    """Folder caching the transformed outputs of the feature files across the runs of `train.py`"""
+
+    feature_cache_max_size: int = 20 * 2**30
+    """The max size (in bytes) of the feature cache of each competition. The least recently used outputs are evicted"""
+
+    preprocess_cache_path: str = "git_ignore_folder/kaggle_preprocess_cache"
+    """Folder caching the outputs of `preprocess_script`, kept apart from the read-only competition data"""
+
+    model_fit_n_jobs: int = 1
+    """Number of worker processes fitting the models of `train.py` in parallel; 1 fits them sequentially"""
+
+    model_fit_cores: int = 0
+    """Number of cores of each model fitting worker; 0 shares the cores of the container evenly among the workers"""
+
     if_using_mle_data: bool = False
     auto_submit: bool = False
     """Automatically upload and submit each experiment result to Kaggle platform"""
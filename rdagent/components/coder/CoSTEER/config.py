@@ -35,6 +35,10 @@ class CoSTEERSettings(ExtendedBaseSettings):
 
     select_threshold: int = 10
 
+    select_method: str = "random"
+    """Method to select the tasks of one evolving round when there are more than `select_threshold` tasks.
+    "random", "priority" or the import path of a function aligned with `scheduler.random_select`"""
+
     max_seconds: int = 10**6
 
 
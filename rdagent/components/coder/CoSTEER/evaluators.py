@@ -1,14 +1,17 @@
+import json
+import time
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Callable, List
 
 from rdagent.components.coder.CoSTEER.evolvable_subjects import EvolvingItem
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.evaluation import Evaluator, Feedback
 from rdagent.core.evolving_framework import QueriedKnowledge
-from rdagent.core.experiment import Task, Workspace
-from rdagent.core.utils import multiprocessing_wrapper
+from rdagent.core.experiment import FBWorkspace, Task, Workspace
+from rdagent.core.utils import multiprocessing_wrapper_iter
 from rdagent.log import rdagent_logger as logger
+from rdagent.utils import md5_hash
 
 if TYPE_CHECKING:
     from rdagent.core.scenario import Scenario
@@ -42,6 +45,7 @@ class CoSTEERSingleFeedback(Feedback):
     # value_feedback, shape_feedback, value_generated_flag
     code: str
     final_decision: bool
+    time_cost: float | None = None  # wall time (in seconds) of the evaluation, recorded by CoSTEERMultiEvaluator
 
     @staticmethod
     def val_and_update_init_dict(data: dict) -> dict:
@@ -187,40 +191,87 @@ class CoSTEEREvaluator(Evaluator):
         raise NotImplementedError("Please implement the `evaluator` method")
 
 
+def _evaluate_with_time_cost(evaluate: Callable, *args) -> CoSTEERSingleFeedback | None:
+    """Call `evaluate` and record its wall time into the feedback"""
+    start = time.time()
+    feedback = evaluate(*args)
+    if feedback is not None:
+        feedback.time_cost = time.time() - start
+    return feedback
+
+
 class CoSTEERMultiEvaluator(CoSTEEREvaluator):
-    """This is for evaluation of experiment. Due to we have multiple tasks, so we will return a list of evaluation feebacks"""
+    """This is for evaluation of experiment. Due to we have multiple tasks, so we will return a list of evaluation feebacks
+
+    The feedback of a task is reused if its workspace is not changed since the last evaluation in the same evolve
+    call (e.g. the task is skipped by the evolving strategy in this round). The feedbacks are kept on the evolving
+    item, so they are never reused by another experiment, whose environment or data may differ.
+    """
 
     def __init__(self, single_evaluator: CoSTEEREvaluator, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.single_evaluator = single_evaluator
 
+    @staticmethod
+    def _workspace_hash(workspace: Workspace | None) -> str | None:
+        if workspace is None or not hasattr(workspace, "file_dict"):
+            return None
+        if isinstance(workspace, FBWorkspace):
+            return workspace.fingerprint()
+        return md5_hash(json.dumps(sorted(workspace.file_dict.items())))
+
     def evaluate(
         self,
         evo: EvolvingItem,
         queried_knowledge: QueriedKnowledge = None,
         **kwargs,
     ) -> CoSTEERMultiFeedback:
-        multi_implementation_feedback = multiprocessing_wrapper(
+        feedback_cache = getattr(evo, "evaluated_feedback_cache", {})
+        multi_implementation_feedback = [None for _ in range(len(evo.sub_tasks))]
+        to_be_evaluated_index = []
+        for index, target_task in enumerate(evo.sub_tasks):
+            ws_hash = self._workspace_hash(evo.sub_workspace_list[index])
+            cached = feedback_cache.get(target_task.get_task_information())
+            if ws_hash is not None and cached is not None and cached[0] == ws_hash:
+                multi_implementation_feedback[index] = cached[1]
+            else:
+                to_be_evaluated_index.append(index)
+        if len(to_be_evaluated_index) < len(evo.sub_tasks):
+            logger.info(f"Reuse the feedback of unchanged tasks, evaluating tasks: {to_be_evaluated_index}")
+
+        for i, single_feedback in multiprocessing_wrapper_iter(
             [
                 (
-                    self.single_evaluator.evaluate,
+                    _evaluate_with_time_cost,
                     (
+                        self.single_evaluator.evaluate,
                         evo.sub_tasks[index],
                         evo.sub_workspace_list[index],
                         evo.sub_gt_implementations[index] if evo.sub_gt_implementations is not None else None,
                         queried_knowledge,
                     ),
                 )
-                for index in range(len(evo.sub_tasks))
+                for index in to_be_evaluated_index
             ],
             n=RD_AGENT_SETTINGS.multi_proc_n,
-        )
+        ):
+            index = to_be_evaluated_index[i]
+            # The evaluator may inject test files into the workspace, so the hash is calculated after evaluation.
+            ws_hash = self._workspace_hash(evo.sub_workspace_list[index])
+            if ws_hash is not None and single_feedback is not None:
+                feedback_cache[evo.sub_tasks[index].get_task_information()] = (ws_hash, single_feedback)
+            multi_implementation_feedback[index] = single_feedback
 
         final_decision = [
             None if single_feedback is None else single_feedback.final_decision
             for single_feedback in multi_implementation_feedback
         ]
         logger.info(f"Final decisions: {final_decision} True count: {final_decision.count(True)}")
+        time_cost = [
+            None if single_feedback is None else single_feedback.time_cost
+            for single_feedback in multi_implementation_feedback
+        ]
+        logger.info(f"Evaluation time costs: {time_cost}")
 
         for index in range(len(evo.sub_tasks)):
             if final_decision[index]:
@@ -15,6 +15,8 @@ class EvolvingItem(Experiment, EvolvableSubjects):
     ):
         Experiment.__init__(self, sub_tasks=sub_tasks)
         self.corresponding_selection: list = None
+        # task information -> (hash of the evaluated workspace, feedback), filled by `CoSTEERMultiEvaluator`
+        self.evaluated_feedback_cache: dict[str, tuple] = {}
         if sub_gt_implementations is not None and len(
             sub_gt_implementations,
         ) != len(self.sub_tasks):
@@ -12,7 +12,7 @@ from rdagent.components.coder.CoSTEER.evolvable_subjects import EvolvingItem
 from rdagent.components.coder.CoSTEER.knowledge_management import (
     CoSTEERQueriedKnowledge,
 )
-from rdagent.components.coder.CoSTEER.scheduler import random_select
+from rdagent.components.coder.CoSTEER.scheduler import get_select_method
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.evolving_framework import EvolvingStrategy, EvoStep, QueriedKnowledge
 from rdagent.core.experiment import FBWorkspace, Task
@@ -67,8 +67,10 @@ class MultiProcessEvolvingStrategy(EvolvingStrategy):
         queried_knowledge: CoSTEERQueriedKnowledge,
         scen: Scenario,
     ) -> list:
-        """Since scheduler is not essential, we implement a simple random selection here."""
-        return random_select(to_be_finished_task_index, evo, selected_num, queried_knowledge, scen)
+        """The scheduler is configured by `select_method` in the settings (random selection by default)."""
+        return get_select_method(self.settings.select_method)(
+            to_be_finished_task_index, evo, selected_num, queried_knowledge, scen
+        )
 
     @abstractmethod
     def assign_code_list_to_evo(self, code_list: list[dict], evo: EvolvingItem) -> None:
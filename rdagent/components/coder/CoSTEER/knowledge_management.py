@@ -4,10 +4,10 @@ import copy
 import json
 import random
 import re
-from itertools import combinations
 from pathlib import Path
 from typing import List, Union
 
+import numpy as np
 from jinja2 import Environment, StrictUndefined
 
 from rdagent.components.coder.CoSTEER.config import CoSTEERSettings
@@ -205,9 +205,12 @@ class CoSTEERQueriedKnowledgeV2(CoSTEERQueriedKnowledgeV1):
         task_to_former_failed_traces: dict = {},
         task_to_similar_task_successful_knowledge: dict = {},
         task_to_similar_error_successful_knowledge: dict = {},
+        working_trace_knowledge: dict | None = None,
         **kwargs,
     ) -> None:
         self.task_to_similar_error_successful_knowledge = task_to_similar_error_successful_knowledge
+        # the working trace of the knowledge base, it is shared (not copied) for the scheduler
+        self.working_trace_knowledge = working_trace_knowledge if working_trace_knowledge is not None else {}
         super().__init__(
             task_to_former_failed_traces=task_to_former_failed_traces,
             task_to_similar_task_successful_knowledge=task_to_similar_task_successful_knowledge,
@@ -292,6 +295,7 @@ class CoSTEERRAGStrategyV2(RAGStrategy):
         conf_knowledge_sampler = self.settings.v2_knowledge_sampler
         queried_knowledge_v2 = CoSTEERQueriedKnowledgeV2(
             success_task_to_knowledge_dict=self.knowledgebase.success_task_to_knowledge_dict,
+            working_trace_knowledge=self.knowledgebase.working_trace_knowledge,
         )
 
         queried_knowledge_v2 = self.former_trace_query(
@@ -527,10 +531,7 @@ class CoSTEERRAGStrategyV2(RAGStrategy):
                 # finally add embedding related knowledge
                 knowledge_base_success_task_list = list(self.knowledgebase.success_task_to_knowledge_dict)
 
-                similarity = calculate_embedding_distance_between_str_list(
-                    [target_task_information],
-                    knowledge_base_success_task_list,
-                )[0]
+                similarity = self.knowledgebase.calculate_success_task_similarity(target_task_information)
                 similar_indexes = sorted(
                     range(len(similarity)),
                     key=lambda i: similarity[i],
@@ -741,6 +742,40 @@ class CoSTEERKnowledgeBaseV2(EvolvingKnowledgeBase):
         # store the task description to component nodes
         self.task_to_component_nodes = {}
 
+        # normalized embeddings of the success tasks, aligned with the keys of success_task_to_knowledge_dict
+        self.success_task_embeddings: np.ndarray | None = None
+
+    def __setstate__(self, state: dict) -> None:
+        # the knowledge bases pickled before the embeddings were cached don't have them yet
+        state.setdefault("success_task_embeddings", None)
+        self.__dict__.update(state)
+
+    def calculate_success_task_similarity(self, task_information: str) -> list[float]:
+        """
+        Calculate the embedding similarity between the task and each success task (in the order of
+        `success_task_to_knowledge_dict`).
+
+        The success tasks are only added, so their embeddings are maintained incrementally and only the new
+        success tasks and the target task are embedded in each query.
+        """
+        success_task_info_list = list(self.success_task_to_knowledge_dict)
+        if not success_task_info_list:
+            return []
+
+        embedded_count = 0 if self.success_task_embeddings is None else self.success_task_embeddings.shape[0]
+        if embedded_count < len(success_task_info_list):
+            new_embeddings = np.array(APIBackend().create_embedding(success_task_info_list[embedded_count:]))
+            new_embeddings = new_embeddings / np.linalg.norm(new_embeddings, axis=1, keepdims=True)
+            self.success_task_embeddings = (
+                new_embeddings
+                if self.success_task_embeddings is None
+                else np.vstack([self.success_task_embeddings, new_embeddings])
+            )
+
+        target_embedding = np.array(APIBackend().create_embedding(task_information))
+        target_embedding = target_embedding / np.linalg.norm(target_embedding)
+        return (self.success_task_embeddings @ target_embedding).tolist()
+
     def get_all_nodes_by_label(self, label: str) -> list[UndirectedNode]:
         return self.graph.get_all_nodes_by_label(label)
 
@@ -892,25 +927,36 @@ class CoSTEERKnowledgeBaseV2(EvolvingKnowledgeBase):
         """
         node_count = len(nodes)
         assert node_count >= 2, "nodes length must >=2"
-        intersection_node_list = []
-        if output_intersection_origin:
-            origin_list = []
-        for k in range(node_count, 1, -1):
-            possible_combinations = combinations(nodes, k)
-            for possible_combination in possible_combinations:
-                node_list = list(possible_combination)
-                intersection_node_list.extend(
-                    self.graph.get_nodes_intersection(node_list, steps=steps, constraint_labels=constraint_labels),
-                )
-                if output_intersection_origin:
-                    for _ in range(len(intersection_node_list)):
-                        origin_list.append(node_list)
+
+        # It is equivalent to intersecting every combination of the nodes (from the largest one to the smallest one).
+        # A searched node first appears in the intersection of exactly the nodes which reach it, so we only need
+        # one search for each node and count the origins of each searched node.
+        searched_nodes_list = [
+            self.graph.get_nodes_within_steps(node, steps=steps, constraint_labels=constraint_labels) for node in nodes
+        ]
+        searched_node_to_origin_index: dict[UndirectedNode, list[int]] = {}
+        searched_node_to_order: dict[UndirectedNode, int] = {}
+        for origin_index, searched_nodes in enumerate(searched_nodes_list):
+            for order, searched_node in enumerate(searched_nodes):
+                if searched_node not in searched_node_to_origin_index:
+                    searched_node_to_origin_index[searched_node] = []
+                    searched_node_to_order[searched_node] = order
+                searched_node_to_origin_index[searched_node].append(origin_index)
+
         intersection_node_list_sort_by_freq = []
-        for index, node in enumerate(intersection_node_list):
-            if node not in intersection_node_list_sort_by_freq:
-                if output_intersection_origin:
-                    intersection_node_list_sort_by_freq.append([origin_list[index], node])
-                else:
-                    intersection_node_list_sort_by_freq.append(node)
+        for node in sorted(
+            (node for node, origin_index in searched_node_to_origin_index.items() if len(origin_index) >= 2),
+            key=lambda node: (
+                -len(searched_node_to_origin_index[node]),  # higher frequency first
+                searched_node_to_origin_index[node],  # same order as `itertools.combinations`
+                searched_node_to_order[node],  # same order as the search result of the first origin node
+            ),
+        ):
+            if output_intersection_origin:
+                intersection_node_list_sort_by_freq.append(
+                    [[nodes[index] for index in searched_node_to_origin_index[node]], node]
+                )
+            else:
+                intersection_node_list_sort_by_freq.append(node)
 
         return intersection_node_list_sort_by_freq
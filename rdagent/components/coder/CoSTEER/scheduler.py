@@ -1,10 +1,22 @@
+"""
+A scheduler selects `selected_num` tasks from `to_be_finished_task_index` for the current evolving round.
+All schedulers share the signature of `random_select`, so a customized scheduler can be plugged in by
+setting `select_method` in `CoSTEERSettings` to its import path.
+
+NOTE: schedulers should only use the global `random` state for randomness. It is seeded by
+`LLM_CACHE_SEED_GEN`, so the selection can be replayed together with the chat cache.
+"""
+
 import random
+from collections.abc import Callable
+from statistics import mean, median
 
 from rdagent.components.coder.CoSTEER.evolvable_subjects import EvolvingItem
 from rdagent.components.coder.CoSTEER.knowledge_management import (
     CoSTEERQueriedKnowledge,
 )
 from rdagent.core.scenario import Scenario
+from rdagent.core.utils import import_class, similarity
 from rdagent.log import rdagent_logger as logger
 
 
@@ -23,3 +35,67 @@ def random_select(
 
     logger.info(f"The random selection is: {to_be_finished_task_index}")
     return to_be_finished_task_index
+
+
+def priority_select(
+    to_be_finished_task_index: list,
+    evo: EvolvingItem,
+    selected_num: int,
+    queried_knowledge: CoSTEERQueriedKnowledge,
+    scen: Scenario,
+):
+    """
+    Select the tasks which are expected to complete the most tasks per unit of wall time.
+
+    score = estimated success probability / estimated time cost
+    - the success probability grows with the similarity to the successful tasks and decays with the
+      number of failed trials in the working trace.
+    - the time cost is the average evaluation time of the former trials of the task. Tasks without any
+      record use the median of all known records.
+
+    Ties are broken by a random order, so tasks without any history are still selected fairly.
+    """
+    working_trace_knowledge = getattr(queried_knowledge, "working_trace_knowledge", {})
+    success_task_info_list = list(queried_knowledge.success_task_to_knowledge_dict)
+
+    task_to_trial_count = {}
+    task_to_time_cost = {}
+    for index in to_be_finished_task_index:
+        task_info = evo.sub_tasks[index].get_task_information()
+        former_trace = working_trace_knowledge.get(task_info, [])
+        task_to_trial_count[index] = len(former_trace)
+        time_cost_list = [
+            k.feedback.time_cost for k in former_trace if getattr(k.feedback, "time_cost", None) is not None
+        ]
+        if len(time_cost_list) > 0:
+            task_to_time_cost[index] = mean(time_cost_list)
+    default_time_cost = median(task_to_time_cost.values()) if len(task_to_time_cost) > 0 else 1.0
+
+    def _score(index: int) -> float:
+        task_info = evo.sub_tasks[index].get_task_information()
+        max_similarity = max((similarity(task_info, s) for s in success_task_info_list), default=0) / 100
+        success_prob = (1 + max_similarity) / (2 * (1 + task_to_trial_count[index]))
+        return success_prob / max(task_to_time_cost.get(index, default_time_cost), 1e-6)
+
+    candidate_index = random.sample(to_be_finished_task_index, len(to_be_finished_task_index))
+    score = {index: _score(index) for index in candidate_index}
+    selected_index = sorted(candidate_index, key=lambda i: score[i], reverse=True)[:selected_num]
+
+    logger.info(f"The priority selection is: {selected_index}")
+    return selected_index
+
+
+SELECT_METHODS: dict[str, Callable] = {
+    "random": random_select,
+    "priority": priority_select,
+}
+
+
+def get_select_method(select_method: str) -> Callable:
+    """
+    Get the scheduler by its name in `SELECT_METHODS` or by its import path like
+    "rdagent.components.coder.CoSTEER.scheduler.random_select".
+    """
+    if select_method in SELECT_METHODS:
+        return SELECT_METHODS[select_method]
+    return import_class(select_method)
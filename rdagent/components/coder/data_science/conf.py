@@ -1,6 +1,9 @@
+import shutil
+from pathlib import Path
 from typing import Literal
 
 from rdagent.components.coder.CoSTEER.config import CoSTEERSettings
+from rdagent.core.experiment import FBWorkspace
 from rdagent.utils.env import (
     CondaConf,
     DockerEnv,
@@ -22,6 +25,13 @@ class DSCoderCoSTEERSettings(CoSTEERSettings):
     env_type: str = "docker"
     # TODO: extract a function for env and conf.
 
+    enable_stage_cache: bool = True
+    """Reuse the outputs of `load_data` and `feat_eng` across the evaluations of the downstream components"""
+    stage_cache_path: str = str(Path.cwd() / "git_ignore_folder" / "ds_stage_cache")
+    """The local folder to store the stage outputs. It is mounted into every evaluation env"""
+    stage_cache_max_size: int = 20 * 2**30
+    """The max size (in bytes) of the stage cache folder. The least recently used outputs are removed beyond it"""
+
 
 def get_ds_env(conf_type: Literal["kaggle", "mlebench"] = "kaggle") -> Env:
     """
@@ -48,3 +58,48 @@ def get_ds_env(conf_type: Literal["kaggle", "mlebench"] = "kaggle") -> Env:
     else:
         raise ValueError(f"Unknown env type: {conf.env_type}")
     return env
+
+
+STAGE_CACHE_MOUNT_PATH = "/kaggle/stage_cache"
+
+
+def prepare_stage_cache(env: Env, implementation: FBWorkspace) -> None:
+    """
+    Inject `test/stage_cache.py` into `implementation` and mount the stage cache folder into `env`.
+    The test scripts can then call `cached_load_data` and `cached_feat_eng` to reuse the stage outputs of
+    former evaluations, which are keyed by the stage code and the input data.
+    The folder is trimmed to `stage_cache_max_size` before it is mounted.
+    When the stage cache is disabled, the folder is not mounted and the stages are always executed.
+    """
+    implementation.inject_files(
+        **{"test/stage_cache.py": (Path(__file__).absolute().resolve().parent / "stage_cache.txt").read_text()}
+    )
+    conf = DSCoderCoSTEERSettings()
+    if conf.enable_stage_cache:
+        cache_path = Path(conf.stage_cache_path).absolute()
+        cache_path.mkdir(parents=True, exist_ok=True)
+        evict_stage_cache(cache_path, conf.stage_cache_max_size)
+        env.conf.extra_volumes = {
+            **env.conf.extra_volumes,
+            str(cache_path): {"bind": STAGE_CACHE_MOUNT_PATH, "mode": "rw"},
+        }
+
+
+def evict_stage_cache(cache_path: Path, max_size: int) -> None:
+    """
+    Remove the least recently used stage outputs until the folder is not larger than `max_size`.
+    The outputs are touched by `test/stage_cache.py` when they are reused.
+    """
+    entries = []
+    for entry in cache_path.iterdir():
+        try:
+            size = sum(fp.stat().st_size for fp in entry.rglob("*") if fp.is_file())
+            entries.append((entry.stat().st_mtime, size, entry))
+        except FileNotFoundError:  # removed by a concurrent evaluation
+            continue
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
@@ -7,7 +7,7 @@ from rdagent.components.coder.CoSTEER.evaluators import (
     CoSTEEREvaluator,
     CoSTEERSingleFeedback,
 )
-from rdagent.components.coder.data_science.conf import get_ds_env
+from rdagent.components.coder.data_science.conf import get_ds_env, prepare_stage_cache
 from rdagent.core.evolving_framework import QueriedKnowledge
 from rdagent.core.experiment import FBWorkspace, Task
 from rdagent.utils.agent.tpl import T
@@ -46,6 +46,7 @@ class FeatureCoSTEEREvaluator(CoSTEEREvaluator):
 
         env = get_ds_env()
         env.conf.extra_volumes = {f"{DS_RD_SETTING.local_data_path}/sample/{self.scen.competition}": "/kaggle/input"}
+        prepare_stage_cache(env, implementation)
 
         # TODO: do we need to clean the generated temporary content?
         fname = "test/feature_test.py"
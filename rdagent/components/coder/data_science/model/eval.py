@@ -12,7 +12,7 @@ from rdagent.components.coder.CoSTEER.evaluators import (
     CoSTEEREvaluator,
     CoSTEERSingleFeedback,
 )
-from rdagent.components.coder.data_science.conf import get_ds_env
+from rdagent.components.coder.data_science.conf import get_ds_env, prepare_stage_cache
 from rdagent.core.evolving_framework import QueriedKnowledge
 from rdagent.core.exception import CoderError
 from rdagent.core.experiment import FBWorkspace, Task
@@ -58,6 +58,7 @@ class ModelGeneralCaseSpecEvaluator(CoSTEEREvaluator):
 
         env = get_ds_env()
         env.conf.extra_volumes = {f"{DS_RD_SETTING.local_data_path}/sample/{self.scen.competition}": "/kaggle/input"}
+        prepare_stage_cache(env, implementation)
 
         fname = "test/model_test.py"
         test_code = (
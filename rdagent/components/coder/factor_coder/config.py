@@ -18,9 +18,6 @@ class FactorCoSTEERSettings(CoSTEERSettings):
     file_based_execution_timeout: int = 120
     """Timeout in seconds for each factor implementation execution"""
 
-    select_method: str = "random"
-    """Method for the selection of factors implementation"""
-
     python_bin: str = "python"
     """Path to the Python binary"""
 
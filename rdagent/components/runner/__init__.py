@@ -1,20 +1,44 @@
+from typing import Callable
+
 from rdagent.core.developer import Developer
 from rdagent.core.experiment import ASpecificExp, Experiment
-from rdagent.oai.llm_utils import md5_hash
 
 
 class CachedRunner(Developer[ASpecificExp]):
     def get_cache_key(self, exp: Experiment) -> str:
-        all_tasks = []
-        for based_exp in exp.based_experiments:
-            all_tasks.extend(based_exp.sub_tasks)
-        all_tasks.extend(exp.sub_tasks)
-        task_info_list = [task.get_task_information() for task in all_tasks]
-        task_info_str = "\n".join(task_info_list)
-        return md5_hash(task_info_str)
+        # the experiments developed in a batch are keyed as they were before their workspaces were prepared
+        batch_key = getattr(self, "_batch_keys", {}).get(id(exp))
+        # the fingerprints of the based experiments are memoised, so only the new tasks and files are hashed
+        key = exp.fingerprint() if batch_key is None else batch_key
+        # the files injected by `develop` don't change the fingerprint, so a replay from the cache keys the
+        # following experiments the same way
+        exp.pin_fingerprint(key)
+        return key
 
     def assign_cached_result(self, exp: Experiment, cached_res: Experiment) -> Experiment:
         if exp.based_experiments and exp.based_experiments[-1].result is None:
             exp.based_experiments[-1].result = cached_res.based_experiments[-1].result
         exp.result = cached_res.result
         return exp
+
+    def develop_batch_with_cache(
+        self, exps: list[ASpecificExp], develop_pending: Callable[[list[ASpecificExp]], None]
+    ) -> list[ASpecificExp]:
+        """
+        Develop the experiments which are not cached by `develop` in one batch by `develop_pending` (which sets
+        their results), then pass all the experiments through `develop`, so they are cached and loaded like the ones
+        developed one by one. The `develop` of the subclass returns the experiments of `is_batch_developed` directly.
+        """
+        is_cached = getattr(type(self).develop, "is_cached", None)
+        pending = [exp for exp in exps if is_cached is None or not is_cached(self, exp)]
+        batch_keys = {id(exp): self.get_cache_key(exp) for exp in pending}
+        if pending:
+            develop_pending(pending)
+        self._batch_keys = batch_keys
+        try:
+            return [self.develop(exp) for exp in exps]
+        finally:
+            self._batch_keys = {}
+
+    def is_batch_developed(self, exp: Experiment) -> bool:
+        return id(exp) in getattr(self, "_batch_keys", {})
@@ -0,0 +1,136 @@
+"""
+Content-addressed storage for the files of workspaces.
+
+Workspaces are copied, logged and dumped again and again during a long run while most of their files are
+unchanged. So the file contents are interned as immutable `Blob`s keyed by their hash: the same content
+is held only once in memory, and it is pickled only once in a pickle stream no matter how many workspaces
+refer to it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from typing import Any
+from weakref import WeakValueDictionary
+
+
+class Blob(str):
+    """
+    An interned immutable file content. It behaves exactly like `str`, and `key` is the hash of the content.
+    Please create it by `intern_blob` instead of the constructor.
+    """
+
+    key: str
+
+    def __reduce__(self) -> tuple:
+        # pickle memoizes the blob by id, so each blob is emitted once per pickle stream
+        return intern_blob, (str.__str__(self),)
+
+    def __copy__(self) -> Blob:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> Blob:
+        return self
+
+
+def content_key(content: str) -> str:
+    return hashlib.md5(content.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class BlobStore:
+    """
+    The blobs alive in current process. A blob is released once no file dict refers to it, so the memory
+    scales with the unique contents in use.
+    """
+
+    def __init__(self) -> None:
+        self._blobs: WeakValueDictionary[str, Blob] = WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def intern(self, content: str) -> Blob:
+        if isinstance(content, Blob):
+            return content
+        key = content_key(content)
+        with self._lock:
+            blob = self._blobs.get(key)
+            if blob is None:
+                blob = Blob(content)
+                blob.key = key
+                self._blobs[key] = blob
+            return blob
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+
+BLOB_STORE = BlobStore()
+
+
+def intern_blob(content: str) -> Blob:
+    return BLOB_STORE.intern(content)
+
+
+class FileDict(MutableMapping[str, str]):
+    """
+    A mapping from file names to file contents, where the contents are interned blobs.
+
+    Copies share the underlying table until one of them is modified (copy-on-write), so copying a
+    workspace costs nothing no matter how many files it has.
+    """
+
+    def __init__(self, data: Mapping[str, str] | Iterable[tuple[str, str]] = ()) -> None:
+        self._table: dict[str, Blob] = {}
+        self._shared = False
+        self.update(data)
+
+    def _own(self) -> None:
+        if self._shared:
+            self._table = dict(self._table)
+            self._shared = False
+
+    def __getitem__(self, name: str) -> Blob:
+        return self._table[name]
+
+    def __setitem__(self, name: str, content: str) -> None:
+        self._own()
+        self._table[name] = intern_blob(content)
+
+    def __delitem__(self, name: str) -> None:
+        self._own()
+        del self._table[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __repr__(self) -> str:
+        return repr(self._table)
+
+    def copy(self) -> FileDict:
+        new = FileDict.__new__(FileDict)
+        new._table = self._table
+        new._shared = self._shared = True
+        return new
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo: dict) -> FileDict:
+        return self.copy()
+
+    def __reduce__(self) -> tuple:
+        return FileDict, (self._table,)
+
+    def keys_and_hashes(self) -> list[tuple[str, str]]:
+        """The sorted (file name, content hash) pairs, which identify the contents without reading them."""
+        return sorted((name, blob.key) for name, blob in self._table.items())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, FileDict):
+            return self._table is other._table or self.keys_and_hashes() == other.keys_and_hashes()
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
@@ -61,15 +61,23 @@ class RDAgentSettings(ExtendedBaseSettings):
 
     # workspace conf
     workspace_path: Path = Path.cwd() / "git_ignore_folder" / "RD-Agent_workspace"
+    # hardlink the identical files of workspaces to one blob file under `workspace_path/.blobs`
+    workspace_link_blobs: bool = False
 
     # multi processing conf
     multi_proc_n: int = 1
+    multi_proc_persistent_pool: bool = False  # reuse a long-lived pool instead of creating one for every call
 
     # pickle cache conf
     cache_with_pickle: bool = True  # whether to use pickle cache
     pickle_cache_folder_path_str: str = str(
         Path.cwd() / "pickle_cache/",
     )  # the path of the folder to store the pickle cache
+    # derive the persisted scenario context (e.g. the leaderboard and the LLM analysis of the competition) again
+    # once in this run, e.g. when the leaderboard is updated
+    refresh_scenario_context: bool = False
+    # the regex patterns of progress bars learned from LLM, which are reused for the stdout of the same format
+    progress_bar_pattern_cache_path: str = str(Path.cwd() / "git_ignore_folder" / "progress_bar_patterns.json")
     use_file_lock: bool = (
         True  # when calling the function with same parameters, whether to use file lock to avoid
         # executing the function multiple times
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 import os
 import platform
 import re
@@ -12,9 +13,10 @@ from copy import deepcopy
 from pathlib import Path
 from typing import Any, Generic, TypeVar
 
+from rdagent.core.blob import Blob, FileDict
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.evaluation import Feedback
-from rdagent.utils import filter_progress_bar
+from rdagent.utils import blake2_hash, filter_progress_bar, md5_hash
 from rdagent.utils.fmt import shrink_text
 
 if typing.TYPE_CHECKING:
@@ -122,10 +124,13 @@ class FBWorkspace(Workspace):
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
-        self.file_dict: dict[str, Any] = (
-            {}
-        )  # The code injected into the folder, store them in the variable to reproduce the former result
+        # The code injected into the folder, store them in the variable to reproduce the former result.
+        # The contents are interned blobs, so copies and dumps of workspaces share the unchanged files.
+        self.file_dict: FileDict = FileDict()
         self.workspace_path: Path = RD_AGENT_SETTINGS.workspace_path / uuid.uuid4().hex
+        # file name -> (content hash, size, mtime) of the files written by this workspace.
+        # The files which are unchanged on disk are not written again.
+        self._disk_state: dict[str, tuple[str, int, int]] = {}
 
     @staticmethod
     def _format_code_dict(code_dict: dict[str, str]) -> str:
@@ -196,10 +201,65 @@ class FBWorkspace(Workspace):
                 if target_file_path.exists():
                     target_file_path.unlink()  # Unlink the file if it exists
                 self.file_dict.pop(k, None)  # Safely remove the key from file_dict
+                self._disk_state.pop(k, None)
             else:
                 self.file_dict[k] = v
-                target_file_path.parent.mkdir(parents=True, exist_ok=True)
-                target_file_path.write_text(v)
+                self._sync_file(k)
+
+    def _sync_file(self, name: str) -> None:
+        """
+        Write the file in file_dict to disk unless the file on disk is known to have the same content.
+        """
+        blob = self.file_dict[name]
+        target_file_path = self.workspace_path / name
+        state = self._disk_state.get(name)
+        if state is not None and state[0] == blob.key:
+            try:
+                st = target_file_path.stat()
+            except FileNotFoundError:
+                pass
+            else:
+                if (st.st_size, st.st_mtime_ns) == state[1:]:
+                    return
+        target_file_path.parent.mkdir(parents=True, exist_ok=True)
+        if RD_AGENT_SETTINGS.workspace_link_blobs:
+            self._link_blob(blob, target_file_path)
+        else:
+            target_file_path.write_text(blob)
+        st = target_file_path.stat()
+        self._disk_state[name] = (blob.key, st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def _link_blob(blob: Blob, target_file_path: Path) -> None:
+        """
+        Hardlink the file to the blob file in the shared blob folder, so the identical files of all the
+        workspaces share one copy on disk.
+        NOTE: modifying the linked file in place changes the file in all the workspaces.
+        """
+        blob_path = RD_AGENT_SETTINGS.workspace_path / ".blobs" / blob.key
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = blob_path.with_name(f"{blob.key}.{uuid.uuid4().hex}.tmp")
+            tmp_path.write_text(blob)
+            tmp_path.replace(blob_path)
+        tmp_path = target_file_path.with_name(f".{target_file_path.name}.{uuid.uuid4().hex}.tmp")
+        os.link(blob_path, tmp_path)
+        tmp_path.replace(target_file_path)
+
+    def sync_files(self) -> None:
+        """
+        Make sure the files on disk are the same as file_dict. Only the changed or missing files are written.
+        """
+        self.prepare()
+        for name in self.file_dict:
+            self._sync_file(name)
+
+    def fingerprint(self) -> str:
+        """
+        The hash of all the files in file_dict. It is computed from the hashes of the blobs without reading
+        the contents.
+        """
+        return md5_hash(json.dumps(self.file_dict.keys_and_hashes()))
 
     def get_files(self) -> list[Path]:
         """
@@ -229,22 +289,29 @@ class FBWorkspace(Workspace):
     def copy(self) -> FBWorkspace:
         """
         copy the workspace from the original one
+        The file_dict is copy-on-write, so the files are shared until either workspace changes them.
         """
         return deepcopy(self)
 
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if not isinstance(self.file_dict, FileDict):  # the workspaces pickled by former versions
+            self.file_dict = FileDict(self.file_dict)
+        self.__dict__.setdefault("_disk_state", {})
+
     def clear(self) -> None:
         """
         Clear the workspace
         """
         shutil.rmtree(self.workspace_path, ignore_errors=True)
-        self.file_dict = {}
+        self.file_dict = FileDict()
+        self._disk_state = {}
 
     def before_execute(self) -> None:
         """
         Before executing the code, we need to prepare the workspace and inject code into the workspace.
         """
-        self.prepare()
-        self.inject_files(**self.file_dict)
+        self.sync_files()
 
     def execute(self, env: Env, entry: str) -> str:
         """
@@ -259,9 +326,10 @@ class FBWorkspace(Workspace):
 
         Before each execution, make sure to prepare and inject code.
         """
-        self.prepare()
-        self.inject_files(**self.file_dict)
-        stdout, return_code = env.run_ret_code(entry, str(self.workspace_path))
+        self.sync_files()
+        stdout, return_code = env.run_ret_code(
+            entry, str(self.workspace_path), code_hashes=dict(self.file_dict.keys_and_hashes())
+        )
         return (
             shrink_text(
                 filter_progress_bar(stdout),
@@ -320,6 +388,43 @@ class Experiment(
             {}
         )  # TODO: in Kaggle, now sub results are all saved in self.result, remove this in the future.
 
+    def fingerprint(self) -> str:
+        """
+        The Merkle-style hash of the experiment: the fingerprints of the based experiments, the information of the
+        own tasks and the file hashes of the experiment workspace.
+
+        The fingerprint is memoised once the experiment has a result, because a finished experiment is not changed
+        any more. So a long chain of based experiments is hashed only once, and the fingerprint of a new experiment
+        only hashes its own tasks and files.
+        """
+        token = self._fingerprint_token()
+        memo = self.__dict__.get("_fingerprint_memo")
+        if memo is not None and memo[0] == token:
+            return memo[1]
+        pinned = self.__dict__.get("_pinned_fingerprint")
+        if self.result is not None and pinned is not None and pinned[0] == token:
+            self._fingerprint_memo = pinned
+            return pinned[1]
+        parts = [based_exp.fingerprint() for based_exp in self.based_experiments]
+        parts.extend(blake2_hash(task.get_task_information()) for task in self.sub_tasks)
+        if isinstance(self.experiment_workspace, FBWorkspace):
+            parts.append(self.experiment_workspace.fingerprint())
+        fingerprint = blake2_hash("\n".join(parts))
+        if self.result is not None:
+            self._fingerprint_memo = (token, fingerprint)
+        return fingerprint
+
+    def pin_fingerprint(self, fingerprint: str) -> None:
+        """
+        Use `fingerprint` as the fingerprint of the experiment once it is finished.
+        The runners pin the cache key taken before `develop` injects files into the workspace, so an experiment
+        loaded from the cache (whose workspace is not injected) has the same fingerprint as the developed one.
+        """
+        self._pinned_fingerprint = (self._fingerprint_token(), fingerprint)
+
+    def _fingerprint_token(self) -> tuple:
+        return tuple(map(id, self.based_experiments)), tuple(map(id, self.sub_tasks))
+
 
 ASpecificExp = TypeVar("ASpecificExp", bound=Experiment)
 
@@ -1,5 +1,13 @@
+from __future__ import annotations
+
+import pickle
+import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
 
+from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.experiment import Task
 
 
@@ -56,3 +64,49 @@ class Scenario(ABC):
     def experiment_setting(self) -> str | None:
         """Get experiment setting and return as rich text string"""
         return None
+
+
+class ScenarioContextCache:
+    """
+    The derived context of a scenario (e.g. the analysis of the competition description by the LLM) persisted in one
+    pickle file, so it is not derived again on every loop start and resume.
+
+    Each group of fields is stored with the key of its inputs (e.g. the rendered prompts or the data fingerprint),
+    so only the groups whose inputs changed are derived again. The groups whose inputs can't be keyed (e.g. the
+    leaderboard) are derived again by `RD_AGENT_SETTINGS.refresh_scenario_context`, and nothing is persisted when
+    `RD_AGENT_SETTINGS.cache_with_pickle` is off.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.path = Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / "scenario_context" / f"{name}.pkl"
+        self._groups: dict[str, tuple[str, Any]] = {}
+        self._refreshed: set[str] = set()  # the groups derived again in this run
+        if not RD_AGENT_SETTINGS.cache_with_pickle:
+            return
+        try:
+            with self.path.open("rb") as f:
+                self._groups = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):  # no cache yet, or a broken one which is rebuilt
+            pass
+
+    def get(self, group: str, key: str, compute: Callable[[], Any], refresh: bool = False) -> Any:
+        """
+        Return the cached value of the group if its key is unchanged, otherwise compute and persist it.
+        """
+        refresh = refresh or (RD_AGENT_SETTINGS.refresh_scenario_context and group not in self._refreshed)
+        cached = self._groups.get(group)
+        if cached is not None and cached[0] == key and not refresh:
+            return cached[1]
+        value = compute()
+        self._groups[group] = (key, value)
+        self._refreshed.add(group)
+        if RD_AGENT_SETTINGS.cache_with_pickle:
+            self._dump()
+        return value
+
+    def _dump(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+        with tmp_path.open("wb") as f:
+            pickle.dump(self._groups, f)
+        tmp_path.replace(self.path)
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import atexit
 import functools
 import importlib
 import json
 import multiprocessing as mp
+import os
 import pickle
 import random
-from collections.abc import Callable
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from multiprocessing.pool import Pool, ThreadPool
 from pathlib import Path
-from typing import Any, ClassVar, NoReturn, cast
+from typing import Any, ClassVar, Literal, NoReturn, cast
 
 from filelock import FileLock
 from fuzzywuzzy import fuzz  # type: ignore[import-untyped]
@@ -96,32 +101,117 @@ class CacheSeedGen:
     NOTE:
     - This seed is specifically for the cache and is different from a regular seed.
     - If the cache is removed, setting the same seed will not produce the same QA trace.
+    - The threads in a thread pool share the global random state, so a thread-local seed sequence is used
+      for the calls running in threads.
     """
 
     def __init__(self) -> None:
+        self._local = threading.local()
         self.set_seed(LLM_SETTINGS.init_chat_cache_seed)
 
-    def set_seed(self, seed: int) -> None:
-        random.seed(seed)
+    def set_seed(self, seed: int, thread_local: bool = False) -> None:
+        if thread_local:
+            self._local.random = random.Random(seed)  # noqa: S311
+        else:
+            random.seed(seed)
 
     def get_next_seed(self) -> int:
         """generate next random int"""
-        return random.randint(0, 10000)  # noqa: S311
+        return getattr(self._local, "random", random).randint(0, 10000)  # noqa: S311
 
 
 LLM_CACHE_SEED_GEN = CacheSeedGen()
 
+PoolKind = Literal["process", "thread"]
 
-def _subprocess_wrapper(f: Callable, seed: int, args: list) -> Any:
+# (kind, n) -> (pool, pid of the process which creates the pool)
+_POOLS: dict[tuple[str, int], tuple[Pool, int]] = {}
+
+
+def get_pool(n: int, kind: PoolKind = "process") -> Pool:
+    """
+    Get the long-lived pool with `n` workers. The pool is started lazily and shared by all the calls.
+    - "process": for CPU bound work (e.g. executing code); it avoids starting & re-importing for every call.
+    - "thread": for IO bound work (e.g. calling LLM APIs); the arguments are not pickled.
+
+    NOTE:
+    The workers of the process pool live long, so they are started by "forkserver" (or "spawn") instead of being
+    forked from current process: they don't inherit the locks held by other threads, and they don't keep a stale
+    copy of the settings, the LLM cache or the log states. They only see the settings from the environment, so
+    please pass the other states by arguments.
+    """
+    key = (kind, n)
+    if key in _POOLS and _POOLS[key][1] == os.getpid():
+        return _POOLS[key][0]
+    if kind == "thread":
+        pool = ThreadPool(processes=n)
+    else:
+        start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        pool = mp.get_context(start_method).Pool(processes=n)
+    _POOLS[key] = (pool, os.getpid())
+    return pool
+
+
+def shutdown_pools() -> None:
+    """Terminate all the long-lived pools created by current process"""
+    for pool, pid in _POOLS.values():
+        if pid == os.getpid():
+            pool.terminate()
+    _POOLS.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+@contextmanager
+def _pool_scope(n: int, kind: PoolKind, n_calls: int) -> Iterator[Pool]:
+    if RD_AGENT_SETTINGS.multi_proc_persistent_pool:
+        yield get_pool(n, kind)
+    else:
+        # the pool of a single call never needs more workers than the calls
+        processes = max(1, min(n, n_calls))
+        with ThreadPool(processes=processes) if kind == "thread" else mp.Pool(processes=processes) as pool:
+            yield pool
+
+
+def _get_log_context() -> tuple[str, Path]:
+    from rdagent.log import rdagent_logger as logger  # avoid circular import
+
+    return logger._tag, logger.log_trace_path
+
+
+def _subprocess_wrapper(
+    f: Callable, seed: int, args: list, log_context: tuple[str, Path] | None = None, thread_local: bool = False
+) -> Any:
     """
     It is a function wrapper. To ensure the subprocess has a fixed start seed.
+
+    The workers of a long-lived process pool are forked before the call, so the log context of the caller
+    is passed by `log_context`.
     """
 
-    LLM_CACHE_SEED_GEN.set_seed(seed)
+    LLM_CACHE_SEED_GEN.set_seed(seed, thread_local=thread_local)
+    if log_context is not None:
+        from rdagent.log import rdagent_logger as logger  # avoid circular import
+
+        tag, log_trace_path = log_context
+        if logger.log_trace_path != log_trace_path:
+            logger.set_trace_path(log_trace_path)
+        # the forked workers inherit the tag of the caller already
+        if tag and not logger._tag:
+            with logger.tag(tag):
+                return f(*args)
     return f(*args)
 
 
-def multiprocessing_wrapper(func_calls: list[tuple[Callable, tuple]], n: int) -> list:
+def _subprocess_wrapper_with_index(
+    call: tuple[int, Callable, int, tuple, tuple[str, Path] | None, bool]
+) -> tuple[int, Any]:
+    index, *wrapper_args = call
+    return index, _subprocess_wrapper(*wrapper_args)
+
+
+def multiprocessing_wrapper(func_calls: list[tuple[Callable, tuple]], n: int, kind: PoolKind = "process") -> list:
     """It will use multiprocessing to call the functions in func_calls with the given parameters.
     The results equals to `return  [f(*args) for f, args in func_calls]`
     It will not call multiprocessing if `n=1`
@@ -136,6 +226,8 @@ def multiprocessing_wrapper(func_calls: list[tuple[Callable, tuple]], n: int) ->
         the list of functions and their parameters
     n : int
         the number of subprocesses
+    kind : PoolKind
+        "process" for CPU bound work, "thread" for IO bound work (e.g. calling LLM APIs)
 
     Returns
     -------
@@ -145,14 +237,42 @@ def multiprocessing_wrapper(func_calls: list[tuple[Callable, tuple]], n: int) ->
     if n == 1 or max(1, min(n, len(func_calls))) == 1:
         return [f(*args) for f, args in func_calls]
 
-    with mp.Pool(processes=max(1, min(n, len(func_calls)))) as pool:
+    log_context = _get_log_context() if kind == "process" else None
+    with _pool_scope(n, kind, len(func_calls)) as pool:
         results = [
-            pool.apply_async(_subprocess_wrapper, args=(f, LLM_CACHE_SEED_GEN.get_next_seed(), args))
+            pool.apply_async(
+                _subprocess_wrapper,
+                args=(f, LLM_CACHE_SEED_GEN.get_next_seed(), args, log_context, kind == "thread"),
+            )
             for f, args in func_calls
         ]
         return [result.get() for result in results]
 
 
+def multiprocessing_wrapper_iter(
+    func_calls: list[tuple[Callable, tuple]], n: int, kind: PoolKind = "process"
+) -> Iterator[tuple[int, Any]]:
+    """The streaming version of `multiprocessing_wrapper`.
+    It yields `(index, result)` as soon as each call is finished, so the caller can process the results
+    before the slowest call is finished. The order of the results is not guaranteed.
+
+    The seeds are generated in the order of `func_calls` before dispatching, so the seed trace is the same
+    as `multiprocessing_wrapper`.
+    """
+    if n == 1 or max(1, min(n, len(func_calls))) == 1:
+        for index, (f, args) in enumerate(func_calls):
+            yield index, f(*args)
+        return
+
+    log_context = _get_log_context() if kind == "process" else None
+    calls = [
+        (index, f, LLM_CACHE_SEED_GEN.get_next_seed(), args, log_context, kind == "thread")
+        for index, (f, args) in enumerate(func_calls)
+    ]
+    with _pool_scope(n, kind, len(func_calls)) as pool:
+        yield from pool.imap_unordered(_subprocess_wrapper_with_index, calls)
+
+
 def cache_with_pickle(hash_func: Callable, post_process_func: Callable | None = None, force: bool = False) -> Callable:
     """
     This decorator will cache the return value of the function with pickle.
@@ -171,15 +291,27 @@ def cache_with_pickle(hash_func: Callable, post_process_func: Callable | None =
         The function to process the cached result, by default None.
     force : bool, optional
         If True, the cache will be used even if RD_AGENT_SETTINGS.cache_with_pickle is False, by default False.
+
+    The decorated function has an `is_cached(*args, **kwargs)` attribute telling whether the call would be served by
+    the cache, e.g. for the callers which run the missing calls in a batch.
     """
 
     def cache_decorator(func: Callable) -> Callable:
+        def get_target_folder() -> Path:
+            return Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / f"{func.__module__}.{func.__name__}"
+
+        def is_cached(*args: Any, **kwargs: Any) -> bool:
+            if not RD_AGENT_SETTINGS.cache_with_pickle and not force:
+                return False
+            hash_key = hash_func(*args, **kwargs)
+            return hash_key is not None and (get_target_folder() / f"{hash_key}.pkl").exists()
+
         @functools.wraps(func)
         def cache_wrapper(*args: Any, **kwargs: Any) -> Any:
             if not RD_AGENT_SETTINGS.cache_with_pickle and not force:
                 return func(*args, **kwargs)
 
-            target_folder = Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / f"{func.__module__}.{func.__name__}"
+            target_folder = get_target_folder()
             target_folder.mkdir(parents=True, exist_ok=True)
             hash_key = hash_func(*args, **kwargs)
 
@@ -205,6 +337,7 @@ def cache_with_pickle(hash_func: Callable, post_process_func: Callable | None =
 
             return result
 
+        cache_wrapper.is_cached = is_cached  # type: ignore[attr-defined]
         return cache_wrapper
 
     return cache_decorator
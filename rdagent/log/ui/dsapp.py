@@ -9,9 +9,14 @@ import plotly.graph_objects as go
 import streamlit as st
 from streamlit import session_state as state
 
-from rdagent.app.data_science.loop import DataScienceRDLoop
+from rdagent.app.data_science.loop import (
+    SOTA_POINTER_TAG,
+    DataScienceRDLoop,
+    replay_trace_log,
+)
 from rdagent.log.mle_summary import extract_mle_json, is_valid_session
 from rdagent.log.storage import FileStorage
+from rdagent.scenarios.data_science.proposal.exp_gen import DSTrace
 from rdagent.utils import remove_ansi_codes
 
 st.set_page_config(layout="wide", page_title="RD-Agent", page_icon="🎓", initial_sidebar_state="expanded")
@@ -55,6 +60,7 @@ def extract_evoid(tag):
 def load_data(log_path: Path):
     state.data = defaultdict(lambda: defaultdict(dict))
     state.times = defaultdict(lambda: defaultdict(dict))
+    trace = DSTrace(scen=None)  # rebuilt from the incremental trace logs
     for msg in FileStorage(log_path).iter_msg():
         if msg.tag and "llm" not in msg.tag and "session" not in msg.tag:
             if msg.tag == "competition":
@@ -74,6 +80,14 @@ def load_data(log_path: Path):
             msg.tag = re.sub(r"Loop_\d+\.[^.]+\.?", "", msg.tag)
             msg.tag = msg.tag.strip()
 
+            if fn == "record":
+                replay_trace_log(trace, msg.tag, msg.content)
+                if msg.tag == SOTA_POINTER_TAG:
+                    state.data[li]["SOTA experiment"] = trace.hist[msg.content][0] if msg.content is not None else None
+                elif msg.tag == "SOTA experiment":  # logged by former versions
+                    state.data[li]["SOTA experiment"] = msg.content
+                continue
+
             if ei:
                 state.data[li][int(ei)][msg.tag] = msg.content
             else:
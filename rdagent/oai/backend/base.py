@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import math
 import re
 import sqlite3
+import threading
 import time
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from copy import deepcopy
 from pathlib import Path
-from typing import Any, Optional, cast
+from typing import Any, Callable, Optional, cast
 
 from pydantic import TypeAdapter
 
@@ -19,13 +23,60 @@ from rdagent.oai.llm_conf import LLM_SETTINGS
 from rdagent.utils import md5_hash
 
 
+class TokenCountCache:
+    """
+    LRU cache of the token counts of strings keyed by the hash of the model and the string. So counting the
+    messages sharing the same contents (e.g. the system prompt, or the text shrunk step by step) only costs hashing
+    for the unchanged contents.
+
+    The exact counts also calibrate the characters per token for the fast estimation.
+    """
+
+    DEFAULT_CHARS_PER_TOKEN = 4.0
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._chars = 0
+        self._tokens = 0
+
+    def count(self, model: str, text: str, counter: Callable[[str], int]) -> int:
+        h = hashlib.md5(model.encode(), usedforsecurity=False)
+        h.update(text.encode("utf-8", errors="surrogatepass"))
+        key = h.digest()
+        with self._lock:
+            num_tokens = self._counts.get(key)
+            if num_tokens is not None:
+                self._counts.move_to_end(key)
+                return num_tokens
+        num_tokens = counter(text)
+        with self._lock:
+            self._counts[key] = num_tokens
+            if len(self._counts) > self.max_size:
+                self._counts.popitem(last=False)
+            self._chars += len(text)
+            self._tokens += num_tokens
+        return num_tokens
+
+    def estimate(self, text: str) -> int:
+        chars_per_token = self._chars / self._tokens if self._tokens > 0 else self.DEFAULT_CHARS_PER_TOKEN
+        return math.ceil(len(text) / chars_per_token)
+
+
+TOKEN_COUNT_CACHE = TokenCountCache(LLM_SETTINGS.token_count_cache_size)
+
+
 class SQliteLazyCache(SingletonBaseClass):
     def __init__(self, cache_location: str) -> None:
         super().__init__()
         self.cache_location = cache_location
         db_file_exist = Path(cache_location).exists()
         # TODO: sqlite3 does not support multiprocessing.
-        self.conn = sqlite3.connect(cache_location, timeout=20)
+        # The connection is shared by the threads (e.g. the thread pool in `multiprocessing_wrapper`), so the
+        # accesses are serialized by a lock.
+        self.conn = sqlite3.connect(cache_location, timeout=20, check_same_thread=False)
+        self.lock = threading.Lock()
         self.c = self.conn.cursor()
         if not db_file_exist:
             self.c.execute(
@@ -53,49 +104,90 @@ class SQliteLazyCache(SingletonBaseClass):
                 """,
             )
             self.conn.commit()
+        # The messages of sessions are stored turn by turn, so a new turn is appended instead of rewriting the whole
+        # conversation. The table is also created for the cache files created by former versions.
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS message_turn_cache (
+                conversation_id TEXT,
+                turn INTEGER,
+                message TEXT,
+                PRIMARY KEY (conversation_id, turn)
+            )
+            """,
+        )
+        self.conn.commit()
 
     def chat_get(self, key: str) -> str | None:
         md5_key = md5_hash(key)
-        self.c.execute("SELECT chat FROM chat_cache WHERE md5_key=?", (md5_key,))
-        result = self.c.fetchone()
+        with self.lock:
+            self.c.execute("SELECT chat FROM chat_cache WHERE md5_key=?", (md5_key,))
+            result = self.c.fetchone()
         return None if result is None else result[0]
 
     def embedding_get(self, key: str) -> list | dict | str | None:
         md5_key = md5_hash(key)
-        self.c.execute("SELECT embedding FROM embedding_cache WHERE md5_key=?", (md5_key,))
-        result = self.c.fetchone()
+        with self.lock:
+            self.c.execute("SELECT embedding FROM embedding_cache WHERE md5_key=?", (md5_key,))
+            result = self.c.fetchone()
         return None if result is None else json.loads(result[0])
 
     def chat_set(self, key: str, value: str) -> None:
         md5_key = md5_hash(key)
-        self.c.execute(
-            "INSERT OR REPLACE INTO chat_cache (md5_key, chat) VALUES (?, ?)",
-            (md5_key, value),
-        )
-        self.conn.commit()
+        with self.lock:
+            self.c.execute(
+                "INSERT OR REPLACE INTO chat_cache (md5_key, chat) VALUES (?, ?)",
+                (md5_key, value),
+            )
+            self.conn.commit()
         return None
 
     def embedding_set(self, content_to_embedding_dict: dict) -> None:
-        for key, value in content_to_embedding_dict.items():
-            md5_key = md5_hash(key)
-            self.c.execute(
-                "INSERT OR REPLACE INTO embedding_cache (md5_key, embedding) VALUES (?, ?)",
-                (md5_key, json.dumps(value)),
-            )
-        self.conn.commit()
+        with self.lock:
+            for key, value in content_to_embedding_dict.items():
+                md5_key = md5_hash(key)
+                self.c.execute(
+                    "INSERT OR REPLACE INTO embedding_cache (md5_key, embedding) VALUES (?, ?)",
+                    (md5_key, json.dumps(value)),
+                )
+            self.conn.commit()
 
     def message_get(self, conversation_id: str) -> list[dict[str, Any]]:
-        self.c.execute("SELECT message FROM message_cache WHERE conversation_id=?", (conversation_id,))
-        result = self.c.fetchone()
+        with self.lock:
+            self.c.execute(
+                "SELECT message FROM message_turn_cache WHERE conversation_id=? ORDER BY turn", (conversation_id,)
+            )
+            turns = self.c.fetchall()
+            if turns:
+                return [json.loads(turn[0]) for turn in turns]
+            # the conversations stored by former versions
+            self.c.execute("SELECT message FROM message_cache WHERE conversation_id=?", (conversation_id,))
+            result = self.c.fetchone()
         return [] if result is None else cast(list[dict[str, Any]], json.loads(result[0]))
 
+    def message_append(self, conversation_id: str, start_turn: int, message_value: list[dict[str, Any]]) -> None:
+        """Store the messages as the turns from `start_turn` of the conversation."""
+        with self.lock:
+            if start_turn > 0:
+                self.c.execute("SELECT COUNT(*) FROM message_turn_cache WHERE conversation_id=?", (conversation_id,))
+                if self.c.fetchone()[0] == 0:
+                    # move the conversation stored by former versions into the turn table first
+                    self.c.execute("SELECT message FROM message_cache WHERE conversation_id=?", (conversation_id,))
+                    result = self.c.fetchone()
+                    former = [] if result is None else json.loads(result[0])
+                    message_value = former[:start_turn] + message_value
+                    start_turn = 0
+            self.c.executemany(
+                "INSERT OR REPLACE INTO message_turn_cache (conversation_id, turn, message) VALUES (?, ?, ?)",
+                [(conversation_id, start_turn + i, json.dumps(m)) for i, m in enumerate(message_value)],
+            )
+            self.conn.commit()
+
     def message_set(self, conversation_id: str, message_value: list[dict[str, Any]]) -> None:
-        self.c.execute(
-            "INSERT OR REPLACE INTO message_cache (conversation_id, message) VALUES (?, ?)",
-            (conversation_id, json.dumps(message_value)),
-        )
-        self.conn.commit()
-        return None
+        with self.lock:
+            self.c.execute("DELETE FROM message_turn_cache WHERE conversation_id=?", (conversation_id,))
+            self.c.execute("DELETE FROM message_cache WHERE conversation_id=?", (conversation_id,))
+        self.message_append(conversation_id, 0, message_value)
 
 
 class SessionChatHistoryCache(SingletonBaseClass):
@@ -109,25 +201,80 @@ class SessionChatHistoryCache(SingletonBaseClass):
     def message_set(self, conversation_id: str, message_value: list[dict[str, Any]]) -> None:
         self.cache.message_set(conversation_id, message_value)
 
+    def message_append(self, conversation_id: str, start_turn: int, message_value: list[dict[str, Any]]) -> None:
+        self.cache.message_append(conversation_id, start_turn, message_value)
+
 
 class ChatSession:
+    """
+    The history of the session is loaded once when it is used first, and each turn only appends its new messages to
+    the storage.
+
+    The messages sent to the LLM keep a stable layout for the prompt caching of the providers: the system prompt
+    first and then the turns in order. When `LLM_SETTINGS.chat_session_token_budget` is exceeded, the oldest turns
+    are compacted (dropped or summarised) until half of the budget is used, so the compacted prefix keeps stable for
+    the following turns.
+    """
+
     def __init__(self, api_backend: Any, conversation_id: str | None = None, system_prompt: str | None = None) -> None:
         self.conversation_id = str(uuid.uuid4()) if conversation_id is None else conversation_id
         self.system_prompt = system_prompt if system_prompt is not None else LLM_SETTINGS.default_system_prompt
         self.api_backend = api_backend
+        self._history_cache: SessionChatHistoryCache | None = None
+        self._history: list[dict[str, Any]] | None = None
+        self._n_compacted = 0  # the number of the oldest history messages (except the system prompt) compacted
+        self._summary: str | None = None
+
+    @property
+    def history_cache(self) -> SessionChatHistoryCache:
+        if self._history_cache is None:
+            self._history_cache = SessionChatHistoryCache()
+        return self._history_cache
+
+    @property
+    def history(self) -> list[dict[str, Any]]:
+        if self._history is None:
+            self._history = self.history_cache.message_get(self.conversation_id)
+        return self._history
+
+    def _compose(self, turns: list[dict[str, Any]], user_prompt: str) -> list[dict[str, Any]]:
+        system_message = (
+            dict(self.history[0])
+            if self.history
+            else {"role": LLM_SETTINGS.system_prompt_role, "content": self.system_prompt}
+        )
+        if self._summary is not None:
+            system_message["content"] = (
+                f"{system_message['content']}\n\nSummary of the earlier conversation:\n{self._summary}"
+            )
+        return [system_message, *turns, {"role": "user", "content": user_prompt}]
 
-    def build_chat_completion_message(self, user_prompt: str) -> list[dict[str, Any]]:
-        history_message = SessionChatHistoryCache().message_get(self.conversation_id)
-        messages = history_message
-        if not messages:
-            messages.append({"role": LLM_SETTINGS.system_prompt_role, "content": self.system_prompt})
-        messages.append(
-            {
-                "role": "user",
-                "content": user_prompt,
-            },
+    def _summarize(self, turns: list[dict[str, Any]]) -> str:
+        from rdagent.utils.agent.tpl import T  # avoid circular import
+
+        return self.api_backend.build_messages_and_create_chat_completion(
+            system_prompt=T(".prompts:compact_chat_session.system").r(),
+            user_prompt=T(".prompts:compact_chat_session.user").r(summary=self._summary, turns=turns),
         )
-        return messages
+
+    def build_chat_completion_message(self, user_prompt: str) -> list[dict[str, Any]]:
+        turns = self.history[1 + self._n_compacted :]
+        messages = self._compose(turns, user_prompt)
+        budget = LLM_SETTINGS.chat_session_token_budget
+        if budget is None or self.api_backend._calculate_token_from_messages(messages) <= budget:
+            return messages
+
+        # drop the oldest (user, assistant) pairs
+        n_dropped = 0
+        while n_dropped + 2 <= len(turns) and (
+            self.api_backend._calculate_token_from_messages(self._compose(turns[n_dropped:], user_prompt)) > budget // 2
+        ):
+            n_dropped += 2
+        if n_dropped > 0:
+            if LLM_SETTINGS.chat_session_compaction == "summarize":
+                self._summary = self._summarize(turns[:n_dropped])
+            self._n_compacted += n_dropped
+        return self._compose(turns[n_dropped:], user_prompt)
 
     def build_chat_completion_message_and_calculate_token(self, user_prompt: str) -> Any:
         messages = self.build_chat_completion_message(user_prompt)
@@ -149,13 +296,18 @@ class ChatSession:
             )
             logger.log_object({"user": user_prompt, "resp": response}, tag="debug_llm")
 
-        messages.append(
+        new_messages = (
+            [] if self.history else [{"role": LLM_SETTINGS.system_prompt_role, "content": self.system_prompt}]
+        )
+        new_messages.append(messages[-1])
+        new_messages.append(
             {
                 "role": "assistant",
                 "content": response,
             },
         )
-        SessionChatHistoryCache().message_set(self.conversation_id, messages)
+        self.history_cache.message_append(self.conversation_id, len(self.history), new_messages)
+        self.history.extend(new_messages)
         return response
 
     def get_conversation_id(self) -> str:
@@ -311,6 +463,20 @@ class APIBackend(ABC):
         )
         return self._calculate_token_from_messages(messages)
 
+    def build_messages_and_estimate_token(
+        self,
+        user_prompt: str,
+        system_prompt: str | None,
+        former_messages: list[dict[str, Any]] | None = None,
+    ) -> int:
+        """
+        Estimate the token count by the characters per token calibrated from the exact counts.
+        It is for the rough checks (e.g. whether the prompt is far below some ratio of `chat_token_limit`) which
+        do not need the exact counts.
+        """
+        messages = self._build_messages(user_prompt, system_prompt, former_messages)
+        return sum(TOKEN_COUNT_CACHE.estimate(str(m["content"])) + 4 for m in messages) + 3
+
     def _try_create_chat_completion_or_embedding(  # type: ignore[no-untyped-def]
         self,
         max_retry: int = 10,
@@ -26,7 +26,7 @@ from rdagent.utils import md5_hash
 
 DEFAULT_QLIB_DOT_PATH = Path("./")
 
-from rdagent.oai.backend.base import APIBackend
+from rdagent.oai.backend.base import TOKEN_COUNT_CACHE, APIBackend
 
 try:
     from azure.identity import DefaultAzureCredential, get_bearer_token_provider
@@ -454,6 +454,10 @@ class DeprecBackend(APIBackend):
                     )
         return resp, finish_reason
 
+    def _encode_len(self, text: str) -> int:
+        assert self.encoder is not None
+        return len(self.encoder.encode(text))
+
     def _calculate_token_from_messages(self, messages: list[dict[str, Any]]) -> int:
         if self.chat_use_azure_deepseek:
             return 0
@@ -473,7 +477,7 @@ class DeprecBackend(APIBackend):
         for message in messages:
             num_tokens += tokens_per_message
             for key, value in message.items():
-                num_tokens += len(self.encoder.encode(value))
+                num_tokens += TOKEN_COUNT_CACHE.count(self.chat_model, value, self._encode_len)
                 if key == "name":
                     num_tokens += tokens_per_name
         num_tokens += 3  # every reply is primed with <start>assistant<message>
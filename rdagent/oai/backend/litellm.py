@@ -1,10 +1,11 @@
+from functools import lru_cache
 from typing import Any
 
 from litellm import completion, embedding, token_counter
 
 from rdagent.log import LogColors
 from rdagent.log import rdagent_logger as logger
-from rdagent.oai.backend.base import APIBackend
+from rdagent.oai.backend.base import TOKEN_COUNT_CACHE, APIBackend
 from rdagent.oai.llm_conf import LLMSettings
 
 
@@ -20,6 +21,12 @@ class LiteLLMSettings(LLMSettings):
 LITELLM_SETTINGS = LiteLLMSettings()
 
 
+@lru_cache(maxsize=256)
+def _message_overhead_tokens(model: str, roles: tuple[str, ...]) -> int:
+    """The tokens of the messages beyond their contents, e.g. the roles and the separators."""
+    return token_counter(model=model, messages=[{"role": role, "content": ""} for role in roles])
+
+
 class LiteLLMAPIBackend(APIBackend):
     """LiteLLM implementation of APIBackend interface"""
 
@@ -30,11 +37,24 @@ class LiteLLMAPIBackend(APIBackend):
         """
         Calculate the token count from messages
         """
-        num_tokens = token_counter(
-            model=LITELLM_SETTINGS.chat_model,
-            messages=messages,
-        )
-        logger.info(f"{LogColors.CYAN}Token count: {LogColors.END} {num_tokens}", tag="debug_litellm_token")
+        model = LITELLM_SETTINGS.chat_model
+        n_counted = 0
+
+        def _count_text(text: str) -> int:
+            nonlocal n_counted
+            n_counted += 1
+            return token_counter(model=model, text=text)
+
+        if all(isinstance(m.get("content"), str) and m.keys() == {"role", "content"} for m in messages):
+            # count the contents one by one, so the unchanged contents are served by the cache
+            num_tokens = _message_overhead_tokens(model, tuple(m["role"] for m in messages)) + sum(
+                TOKEN_COUNT_CACHE.count(model, m["content"], _count_text) for m in messages
+            )
+        else:
+            n_counted += 1
+            num_tokens = token_counter(model=model, messages=messages)
+        if n_counted > 0:  # logging is much slower than the cached counting
+            logger.info(f"{LogColors.CYAN}Token count: {LogColors.END} {num_tokens}", tag="debug_litellm_token")
         return num_tokens
 
     def _create_embedding_inner_function(
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 
@@ -31,6 +32,10 @@ class LLMSettings(ExtendedBaseSettings):
     use_embedding_cache: bool = False
     prompt_cache_path: str = str(Path.cwd() / "prompt_cache.db")
     max_past_message_include: int = 10
+    token_count_cache_size: int = 10000  # the number of the token counts of strings kept in memory
+    chat_session_token_budget: int | None = None
+    """When the messages of a chat session exceed the budget, the oldest turns are compacted. None means no limit."""
+    chat_session_compaction: Literal["drop", "summarize"] = "drop"
 
     # Behavior of returning answers to the same question when caching is enabled
     use_auto_chat_cache_seed_gen: bool = False
@@ -2,6 +2,8 @@ import os
 import platform
 import shutil
 from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from itertools import chain, islice
 from pathlib import Path
 
 import numpy as np
@@ -14,6 +16,7 @@ except:
     pass
 
 from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
+from rdagent.core.utils import multiprocessing_wrapper_iter
 
 
 class DataHandler:
@@ -25,6 +28,10 @@ class DataHandler:
     def dump(self, df: pd.DataFrame, path):
         raise NotImplementedError
 
+    def iter_chunks(self, path, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Load the data chunk by chunk. By default, the whole data is loaded as one chunk."""
+        yield self.load(path)
+
 
 class GenericDataHandler(DataHandler):
     """
@@ -57,6 +64,44 @@ class GenericDataHandler(DataHandler):
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
 
+    def iter_chunks(self, path, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Load the data in chunks of about `chunk_size` rows, so large files are never fully loaded into memory.
+        Pickle and HDF files can't be read partially and are loaded as one chunk.
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+
+        if suffix == ".csv":
+            with pd.read_csv(path, encoding="utf-8", chunksize=chunk_size) as reader:
+                yield from reader
+        elif suffix == ".parquet":
+            import pyarrow.parquet as pq
+
+            parquet_file = pq.ParquetFile(path)
+            if parquet_file.metadata.num_rows == 0:
+                yield pd.read_parquet(path)
+                return
+            offset = 0
+            for batch in parquet_file.iter_batches(batch_size=chunk_size):
+                df = batch.to_pandas()
+                if isinstance(df.index, pd.RangeIndex):
+                    df.index += offset  # keep the same index as loading the whole file
+                offset += len(df)
+                yield df
+        elif suffix == ".jsonl":
+            with pd.read_json(path, lines=True, chunksize=chunk_size) as reader:
+                yield from reader
+        elif suffix == ".bson":
+            with open(path, "rb") as f:
+                records = bson.decode_file_iter(f)
+                offset = 0
+                while chunk := list(islice(records, chunk_size)):
+                    yield pd.DataFrame(chunk, index=pd.RangeIndex(offset, offset + len(chunk)))
+                    offset += len(chunk)
+        else:
+            yield self.load(path)
+
     def dump(self, df: pd.DataFrame, path):
         path = Path(path)
         suffix = path.suffix.lower()
@@ -89,6 +134,13 @@ class DataReducer:
     def reduce(self, df: pd.DataFrame) -> pd.DataFrame:
         raise NotImplementedError
 
+    def reduce_stream(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """Reduce the data given chunk by chunk. By default, the chunks are concatenated before reducing."""
+        chunks = list(chunks)
+        if len(chunks) == 1:
+            return self.reduce(chunks[0])
+        return self.reduce(pd.concat(chunks))
+
 
 class RandDataReducer(DataReducer):
     """
@@ -114,12 +166,12 @@ class UniqueIDDataReducer(DataReducer):
         self.min_num = min_num
         self.random_reducer = RandDataReducer(min_frac, min_num)
 
-    def reduce(self, df: pd.DataFrame) -> pd.DataFrame:
-        if not len(df):
-            return df
-
-        if not isinstance(df, pd.DataFrame):
-            return self.random_reducer.reduce(df)
+    @staticmethod
+    def find_label_position(df: pd.DataFrame) -> int | None:
+        """
+        Return the position of the label column (the last column, or the second one when the last one is not a
+        valid label). Return None if no valid label column is found.
+        """
 
         def is_valid_label(column):
             if not isinstance(column.iloc[0], (int, float, str, tuple, frozenset, bytes, complex, type(None))):
@@ -133,13 +185,24 @@ class UniqueIDDataReducer(DataReducer):
 
             return True
 
-        label_col = df.iloc[:, -1]
-        if not is_valid_label(label_col) and df.shape[1] > 2:
-            label_col = df.iloc[:, 1]
+        if is_valid_label(df.iloc[:, -1]):
+            return df.shape[1] - 1
+        if df.shape[1] > 2 and is_valid_label(df.iloc[:, 1]):
+            return 1
+        return None
 
-        if not is_valid_label(label_col):
+    def reduce(self, df: pd.DataFrame) -> pd.DataFrame:
+        if not len(df):
+            return df
+
+        if not isinstance(df, pd.DataFrame):
             return self.random_reducer.reduce(df)
 
+        label_pos = self.find_label_position(df)
+        if label_pos is None:
+            return self.random_reducer.reduce(df)
+        label_col = df.iloc[:, label_pos]
+
         unique_labels = label_col.unique()
         unique_count = len(unique_labels)
         print(f"Unique labels: {unique_count} / {df.shape[0]}")
@@ -158,6 +221,121 @@ class UniqueIDDataReducer(DataReducer):
         return result_df
 
 
+class StreamingUniqueIDDataReducer(UniqueIDDataReducer):
+    """
+    The streaming version of `UniqueIDDataReducer`. It samples the same way in bounded memory, so large data
+    files never have to be fully loaded.
+
+    Every row gets a random key, and the rows with the smallest keys are kept:
+    - per label, the row with the smallest key is kept (a reservoir of size 1), so every label is covered.
+      Each chunk only updates the reservoirs of its own labels.
+    - globally, the rows whose keys are small enough to be selected in the end are kept. Only about
+      `min_frac` of the rows (and at least `min_num` rows) are kept at any time.
+    The label column is detected on the first chunk. Once it has more labels than both the sample size of the
+    rows read and `MAX_LABEL_REPS`, the reservoirs are dropped and the data is sampled randomly, so the memory is
+    bounded by the sample size (or `MAX_LABEL_REPS` rows) as well. Unlike `UniqueIDDataReducer`, such data is not
+    reduced to one row per label.
+    """
+
+    # keep a margin over `min_frac` so the final sample is rarely short of rows because of the randomness
+    POOL_FRAC_MARGIN = 1.2
+    # the reservoirs of the labels beyond the sample size are kept up to this number, since the early chunks have
+    # a small sample size but may still cover all the labels in the end
+    MAX_LABEL_REPS = 10_000
+
+    def __init__(self, min_frac=0.02, min_num=5, seed=1):
+        super().__init__(min_frac, min_num)
+        self.seed = seed
+
+    def reduce(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.reduce_stream([df])
+
+    def _prune_pool(self, df: pd.DataFrame, key: np.ndarray, row: np.ndarray) -> tuple:
+        keep = key < self.min_frac * self.POOL_FRAC_MARGIN
+        if len(key) > self.min_num:
+            keep[np.argpartition(key, self.min_num - 1)[: self.min_num]] = True
+        else:
+            keep[:] = True
+        return df.iloc[keep], key[keep], row[keep]
+
+    def reduce_stream(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        chunks = iter(chunks)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return pd.DataFrame()
+        if not isinstance(first_chunk, pd.DataFrame):
+            return self.random_reducer.reduce(first_chunk)
+        if not len(first_chunk):
+            return first_chunk
+
+        label_pos = self.find_label_position(first_chunk)
+        rng = np.random.default_rng(self.seed)
+        n_rows = 0
+        # (data, random key, row number) of the candidates
+        pool = (first_chunk.iloc[:0], np.empty(0), np.empty(0, dtype=int))
+        label_reps = pool
+
+        for chunk in chain([first_chunk], chunks):
+            if not len(chunk):
+                continue
+            key = rng.random(len(chunk))
+            row = np.arange(n_rows, n_rows + len(chunk))
+            n_rows += len(chunk)
+            pool = self._prune_pool(
+                self._concat(pool[0], chunk), np.concatenate([pool[1], key]), np.concatenate([pool[2], row])
+            )
+            if label_pos is not None:
+                # merge the reservoirs with the smallest keys of the chunk instead of with the whole chunk
+                chunk_reps = self._label_reps(chunk, label_pos, key, row)
+                label_reps = self._label_reps(
+                    self._concat(label_reps[0], chunk_reps[0]),
+                    label_pos,
+                    np.concatenate([label_reps[1], chunk_reps[1]]),
+                    np.concatenate([label_reps[2], chunk_reps[2]]),
+                )
+                if len(label_reps[0]) > max(n_rows * self.min_frac, self.min_num, self.MAX_LABEL_REPS):
+                    label_pos, label_reps = None, None
+
+        frac = max(self.min_frac, self.min_num / n_rows)
+        if label_pos is None:
+            if frac >= 1:
+                return self._sort_by_row(pool[0], pool[2])
+            selected = np.argsort(pool[1])[: round(n_rows * frac)]
+            return self._sort_by_row(pool[0].iloc[selected], pool[2][selected])
+
+        unique_count = len(label_reps[0])
+        print(f"Unique labels: {unique_count} / {n_rows}")
+        if int(n_rows * frac) < unique_count:
+            return self._sort_by_row(label_reps[0], label_reps[2]).reset_index(drop=True)
+
+        remaining_frac = frac - unique_count / n_rows
+        remaining = ~np.isin(pool[2], label_reps[2])
+        remaining_df, remaining_key, remaining_row = pool[0].iloc[remaining], pool[1][remaining], pool[2][remaining]
+        if remaining_frac < 1:
+            selected = np.argsort(remaining_key)[: round((n_rows - unique_count) * remaining_frac)]
+            remaining_df, remaining_row = remaining_df.iloc[selected], remaining_row[selected]
+        return self._sort_by_row(
+            self._concat(label_reps[0], remaining_df), np.concatenate([label_reps[2], remaining_row])
+        )
+
+    @staticmethod
+    def _label_reps(df: pd.DataFrame, label_pos: int, key: np.ndarray, row: np.ndarray) -> tuple:
+        """Return the row with the smallest key of each label"""
+        order = np.argsort(key, kind="stable")
+        rep_pos = order[~pd.Series(df.iloc[order, label_pos].to_numpy()).duplicated().to_numpy()]
+        return df.iloc[rep_pos], key[rep_pos], row[rep_pos]
+
+    @staticmethod
+    def _concat(df: pd.DataFrame, chunk: pd.DataFrame) -> pd.DataFrame:
+        if len(df) == 0 or len(chunk) == 0:
+            return chunk if len(df) == 0 else df
+        return pd.concat([df, chunk])
+
+    @staticmethod
+    def _sort_by_row(df: pd.DataFrame, row: np.ndarray) -> pd.DataFrame:
+        return df.iloc[np.argsort(row, kind="stable")]
+
+
 def count_files_in_folder(folder: Path) -> int:
     """
     Count the total number of files in a folder, including files in subfolders.
@@ -176,18 +354,66 @@ def copy_file(src_fp, target_folder, data_folder):
         shutil.copy(src_fp, target_fp)
 
 
+def extract_file_references(df: pd.DataFrame) -> set[str]:
+    """
+    Extract the values which may refer to other files (e.g. image names or ids) from the sampled data.
+    Only string columns are scanned; the files are named by string ids (e.g. `img_1.jpg`), while the integer
+    columns are mostly counts and numeric features whose values would match unrelated files.
+    """
+    if not isinstance(df, pd.DataFrame):
+        return set()
+    references = set()
+    for col in range(df.shape[1]):
+        column = df.iloc[:, col]
+        if pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            # Add the entire string to the set;
+            # in real usage, might want to parse or extract basename, etc.
+            references.update(val for val in column.unique() if isinstance(val, str))
+    return references
+
+
+def sample_data_file(
+    file_path: Path,
+    sampled_file_path: Path,
+    data_handler: DataHandler,
+    data_reducer: DataReducer,
+    chunk_size: int,
+) -> set[str]:
+    """
+    Create the reduced sample of one data file and return the file references found in the sample.
+    """
+    sampled_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Create a sampled subset while loading the original data
+    df_sampled = data_reducer.reduce_stream(data_handler.iter_chunks(file_path, chunk_size))
+    # Dump the sampled data
+    try:
+        data_handler.dump(df_sampled, sampled_file_path)
+    except Exception as e:
+        print(f"Error processing {file_path}: {e}")
+        return set()
+    if "submission" in file_path.stem:
+        return set()  # Skip submission files
+    # Extract possible file references from the sampled data
+    return extract_file_references(df_sampled)
+
+
 def create_debug_data(
     competition: str,
-    dr_cls: type[DataReducer] = UniqueIDDataReducer,
+    dr_cls: type[DataReducer] = StreamingUniqueIDDataReducer,
     min_frac=0.01,
     min_num=5,
     dataset_path=None,
     sample_path=None,
+    chunk_size: int = 100_000,
+    n_jobs: int = 4,
 ):
     """
     Reads the original data file, creates a reduced sample,
     and renames/moves files for easier debugging.
     Automatically detects file type (csv, pkl, parquet, hdf, etc.).
+
+    The data files are read in chunks of `chunk_size` rows and sampled in parallel by `n_jobs` processes.
     """
     if dataset_path is None:
         dataset_path = KAGGLE_IMPLEMENT_SETTING.local_data_path  # FIXME: don't hardcode this KAGGLE_IMPLEMENT_SETTING
@@ -223,8 +449,9 @@ def create_debug_data(
         if f.name.startswith(("train", "test"))
     )
     processed_files = []
+    func_calls = []
 
-    for file_path in tqdm(files_to_process, desc="Processing data", unit="file"):
+    for file_path in files_to_process:
         sampled_file_path = sample_folder / file_path.relative_to(data_folder)
         if sampled_file_path.exists():
             continue
@@ -235,29 +462,16 @@ def create_debug_data(
         if skip_subfolder_data and file_path.parent != data_folder:
             continue  # bypass files in subfolders
 
-        sampled_file_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Load the original data
-        df = data_handler.load(file_path)
-
-        # Create a sampled subset
-        df_sampled = data_reducer.reduce(df)
         processed_files.append(file_path)
-        # Dump the sampled data
-        try:
-            data_handler.dump(df_sampled, sampled_file_path)
-            # Extract possible file references from the sampled data
-            if "submission" in file_path.stem:
-                continue  # Skip submission files
-            for col in df_sampled.columns:
-                unique_vals = df_sampled[col].astype(str).unique()
-                for val in unique_vals:
-                    # Add the entire string to the set;
-                    # in real usage, might want to parse or extract basename, etc.
-                    sample_used_file_names.add(val)
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
-            continue
+        func_calls.append((sample_data_file, (file_path, sampled_file_path, data_handler, data_reducer, chunk_size)))
+
+    for _, used_file_names in tqdm(
+        multiprocessing_wrapper_iter(func_calls, n=n_jobs),
+        total=len(func_calls),
+        desc="Processing data",
+        unit="file",
+    ):
+        sample_used_file_names.update(used_file_names)
 
     # Process non-data files
     subfolder_dict = {}
@@ -9,13 +9,15 @@ from PIL import Image, TiffTags
 from rdagent.app.data_science.conf import DS_RD_SETTING
 from rdagent.components.coder.data_science.conf import get_ds_env
 from rdagent.core.experiment import FBWorkspace
-from rdagent.core.scenario import Scenario
+from rdagent.core.scenario import Scenario, ScenarioContextCache
+from rdagent.core.utils import cache_with_pickle
 from rdagent.log import rdagent_logger as logger
 from rdagent.oai.llm_utils import APIBackend
 from rdagent.scenarios.kaggle.kaggle_crawler import (
     crawl_descriptions,
     leaderboard_scores,
 )
+from rdagent.utils import data_folder_fingerprint, md5_hash
 from rdagent.utils.agent.tpl import T
 
 
@@ -63,6 +65,23 @@ def read_csv_head(file_path, indent=0, lines=5, max_col_width=100):
         return f"Error reading CSV: {e}"
 
 
+def count_csv_rows(file_path, chunk_size=1 << 24):
+    """
+    Count the data rows of a CSV file by scanning the newlines in binary chunks, so the file is never parsed.
+    The header line is excluded. Newlines inside quoted fields are counted as rows too, so the count may be
+    slightly larger than the number of records parsed by pandas.
+    """
+    n_lines = 0
+    last_byte = b"\n"
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            n_lines += chunk.count(b"\n")
+            last_byte = chunk[-1:]
+    if last_byte != b"\n":
+        n_lines += 1  # the last line without a trailing newline
+    return max(n_lines - 1, 0)
+
+
 def get_dir_snapshot(folder_path):
     """
     [note]
@@ -188,14 +207,21 @@ def describe_data_folder(folder_path, indent=0, max_files=2, partial_expand_subf
         else:
             for file, size, path in files_details[file_type]:
                 if file_type == "csv":
-                    df = pd.read_csv(path)
-                    result.append(
-                        " " * indent + f"- {file} ({size} bytes, with {df.shape[0]} rows and {df.shape[1]} columns)"
-                    )
+                    n_rows, n_cols = count_csv_rows(path), len(pd.read_csv(path, nrows=0).columns)
+                    result.append(" " * indent + f"- {file} ({size} bytes, with {n_rows} rows and {n_cols} columns)")
                     result.append(" " * (indent + 2) + f"- Head of {file}:")
                     csv_head = read_csv_head(path, indent + 4)
                     result.append(csv_head)
                     continue
+                if file_type == "parquet":
+                    import pyarrow.parquet as pq  # only required when there are parquet files
+
+                    metadata = pq.ParquetFile(path).metadata
+                    result.append(
+                        " " * indent
+                        + f"- {file} ({size} bytes, with {metadata.num_rows} rows and {metadata.num_columns} columns)"
+                    )
+                    continue
                 result.append(" " * indent + f"- {file} ({size} bytes)")
                 if file_type == "md":
                     result.append(" " * (indent + 2) + f"- Content of {file}:")
@@ -224,17 +250,41 @@ def describe_data_folder(folder_path, indent=0, max_files=2, partial_expand_subf
     return "\n".join(result) + "\n"
 
 
+# bump it when the output of `describe_data_folder` changes, so the cached descriptions are not reused
+DATA_FOLDER_DESCRIPTION_VERSION = 1
+
+
+@cache_with_pickle(
+    hash_func=lambda folder_path, **kwargs: md5_hash(
+        f"{DATA_FOLDER_DESCRIPTION_VERSION}{data_folder_fingerprint(folder_path)}{sorted(kwargs.items())}"
+    ),
+)
+def describe_data_folder_with_cache(folder_path, **kwargs) -> str:
+    """
+    `describe_data_folder` cached on disk when `RD_AGENT_SETTINGS.cache_with_pickle` is on.
+    The cache is invalidated once any file in the folder is changed.
+    """
+    return describe_data_folder(folder_path, **kwargs)
+
+
 class DataScienceScen(Scenario):
     """Data Science Scenario"""
 
     def __init__(self, competition: str) -> None:
         self.competition = competition
+        # the LLM analysis and the leaderboard are loaded from here unless their inputs change
+        self.context_cache = ScenarioContextCache(f"{type(self).__name__}_{competition}")
         self.raw_description = self._get_description()
         self.processed_data_folder_description = self._get_data_folder_description()
         self._analysis_competition_description()
         self.metric_direction = self._get_direction()
         self.eda_output = None
 
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if "context_cache" not in state:  # the scenarios pickled by former versions
+            self.context_cache = ScenarioContextCache(f"{type(self).__name__}_{self.competition}")
+
     def _get_description(self):
         if (fp := Path(f"{DS_RD_SETTING.local_data_path}/{self.competition}.json")).exists():
             logger.info(f"Found {self.competition}.json, loading from local file.")
@@ -255,11 +305,16 @@ class DataScienceScen(Scenario):
             competition_processed_data_folder_description=self.processed_data_folder_description,
         )
 
-        response_analysis = APIBackend().build_messages_and_create_chat_completion(
-            user_prompt=user_prompt,
-            system_prompt=sys_prompt,
-            json_mode=True,
-            json_target_type=Dict[str, str | int | bool],
+        # the prompts cover the description, the data and the prompt version, so they key the analysis
+        response_analysis = self.context_cache.get(
+            "competition_analysis",
+            md5_hash(sys_prompt + user_prompt),
+            lambda: APIBackend().build_messages_and_create_chat_completion(
+                user_prompt=user_prompt,
+                system_prompt=sys_prompt,
+                json_mode=True,
+                json_target_type=Dict[str, str | int | bool],
+            ),
         )
 
         response_json_analysis = json.loads(response_analysis)
@@ -324,7 +379,8 @@ class DataScienceScen(Scenario):
         return stdout
 
     def _get_data_folder_description(self) -> str:
-        return describe_data_folder(Path(DS_RD_SETTING.local_data_path) / self.competition)
+        data_folder = Path(DS_RD_SETTING.local_data_path) / self.competition
+        return describe_data_folder_with_cache(data_folder)
 
 
 class KaggleScen(DataScienceScen):
@@ -342,7 +398,9 @@ class KaggleScen(DataScienceScen):
     def _get_direction(self):
         if DS_RD_SETTING.if_using_mle_data:
             return super()._get_direction()
-        leaderboard = leaderboard_scores(self.competition)
+        leaderboard = self.context_cache.get(
+            "leaderboard", self.competition, lambda: leaderboard_scores(self.competition)
+        )
         return "maximize" if float(leaderboard[0]) > float(leaderboard[-1]) else "minimize"
 
     @property
@@ -10,7 +10,6 @@ from rdagent.core.exception import CoderError, FactorEmptyError, ModelEmptyError
 from rdagent.core.experiment import ASpecificExp, Experiment
 from rdagent.core.prompts import Prompts
 from rdagent.core.utils import cache_with_pickle
-from rdagent.oai.llm_utils import md5_hash
 from rdagent.scenarios.kaggle.experiment.kaggle_experiment import (
     KGFactorExperiment,
     KGModelExperiment,
@@ -20,16 +19,6 @@ prompt_dict = Prompts(file_path=Path(__file__).parent.parent / "prompts.yaml")
 
 
 class KGCachedRunner(CachedRunner[ASpecificExp]):
-    def get_cache_key(self, exp: ASpecificExp) -> str:
-        codes = []
-        for f in sorted((exp.experiment_workspace.workspace_path / "feature").glob("*.py"), key=lambda x: x.name):
-            codes.append(f.read_text())
-        for f in sorted((exp.experiment_workspace.workspace_path / "model").glob("*.py"), key=lambda x: x.name):
-            codes.append(f.read_text())
-        codes = "\n".join(codes)
-        cached_key_from_exp = CachedRunner.get_cache_key(self, exp)
-        return md5_hash(codes + cached_key_from_exp)
-
     def assign_cached_result(self, exp: Experiment, cached_res: Experiment) -> Experiment:
         exp = CachedRunner.assign_cached_result(self, exp, cached_res)
         if cached_res.experiment_workspace.workspace_path.exists():
@@ -42,7 +31,7 @@ class KGCachedRunner(CachedRunner[ASpecificExp]):
         exp.experiment_workspace.data_description = cached_res.experiment_workspace.data_description
         return exp
 
-    @cache_with_pickle(get_cache_key, CachedRunner.assign_cached_result)
+    @cache_with_pickle(CachedRunner.get_cache_key, CachedRunner.assign_cached_result)
     def init_develop(self, exp: KGFactorExperiment | KGModelExperiment) -> KGFactorExperiment | KGModelExperiment:
         """
         For the initial development, the experiment serves as a benchmark for feature engineering.
@@ -11,8 +11,8 @@ from jinja2 import Environment, StrictUndefined
 from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
 from rdagent.core.experiment import Task
 from rdagent.core.prompts import Prompts
-from rdagent.core.scenario import Scenario
-from rdagent.oai.llm_utils import APIBackend
+from rdagent.core.scenario import Scenario, ScenarioContextCache
+from rdagent.oai.llm_utils import APIBackend, md5_hash
 from rdagent.scenarios.kaggle.experiment.kaggle_experiment import KGFactorExperiment
 from rdagent.scenarios.kaggle.kaggle_crawler import (
     crawl_descriptions,
@@ -40,6 +40,8 @@ class KGScenario(Scenario):
     def __init__(self, competition: str) -> None:
         super().__init__()
         self.competition = competition
+        # the crawled leaderboard, the preprocessed data and the LLM analysis are loaded from here unless changed
+        self.context_cache = ScenarioContextCache(f"kaggle_{competition}")
         self.competition_descriptions = crawl_descriptions(competition, KAGGLE_IMPLEMENT_SETTING.local_data_path)
         self.input_shape = None
 
@@ -50,7 +52,7 @@ class KGScenario(Scenario):
         self.submission_specifications = None
         self.model_output_channel = None
         self.evaluation_desc = None
-        self.leaderboard = leaderboard_scores(competition)
+        self.leaderboard = self.context_cache.get("leaderboard", competition, lambda: leaderboard_scores(competition))
         self.evaluation_metric_direction = float(self.leaderboard[0]) > float(self.leaderboard[-1])
         self.vector_base = None
         self.mini_case = KAGGLE_IMPLEMENT_SETTING.mini_case
@@ -73,6 +75,11 @@ class KGScenario(Scenario):
         self.confidence_parameter = 1.0
         self.initial_performance = 0.0
 
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        if "context_cache" not in state:  # the scenarios pickled by former versions
+            self.context_cache = ScenarioContextCache(f"kaggle_{self.competition}")
+
     def _analysis_competition_description(self):
         sys_prompt = (
             Environment(undefined=StrictUndefined)
@@ -90,11 +97,16 @@ class KGScenario(Scenario):
             )
         )
 
-        response_analysis = APIBackend().build_messages_and_create_chat_completion(
-            user_prompt=user_prompt,
-            system_prompt=sys_prompt,
-            json_mode=True,
-            json_target_type=Dict[str, str | bool | int],
+        # the prompts cover the description, the data and the prompt version, so they key the analysis
+        response_analysis = self.context_cache.get(
+            "competition_analysis",
+            md5_hash(sys_prompt + user_prompt),
+            lambda: APIBackend().build_messages_and_create_chat_completion(
+                user_prompt=user_prompt,
+                system_prompt=sys_prompt,
+                json_mode=True,
+                json_target_type=Dict[str, str | bool | int],
+            ),
         )
 
         response_json_analysis = json.loads(response_analysis)
@@ -149,18 +161,37 @@ class KGScenario(Scenario):
     @property
     def source_data(self) -> str:
         data_folder = Path(KAGGLE_IMPLEMENT_SETTING.local_data_path) / self.competition
+        preprocess_script = (
+            Path(KAGGLE_IMPLEMENT_SETTING.template_path).resolve() / self.competition / "fea_share_preprocess.py"
+        )
+        data_info, self.input_shape = self.context_cache.get(
+            "source_data",
+            md5_hash(self.competition + preprocess_script.read_text()),
+            self._describe_source_data,
+            # the preprocessed data are dumped again if they are removed
+            refresh=not (data_folder / "X_valid.pkl").exists(),
+        )
+        return data_info
 
-        if not (data_folder / "X_valid.pkl").exists():
-            preprocess_experiment = KGFactorExperiment([])
-            (
-                X_train,
-                X_valid,
-                y_train,
-                y_valid,
-                X_test,
-                *others,
-            ) = preprocess_experiment.experiment_workspace.generate_preprocess_data()
+    def _describe_source_data(self) -> tuple[str, tuple | None]:
+        """
+        Preprocess the data, dump them for the feature coder and describe them.
+        """
+        data_folder = Path(KAGGLE_IMPLEMENT_SETTING.local_data_path) / self.competition
+
+        # the outputs are loaded from the preprocess cache (memory mapped) unless `fea_share_preprocess.py` changes
+        preprocess_experiment = KGFactorExperiment([])
+        (
+            X_train,
+            X_valid,
+            y_train,
+            y_valid,
+            X_test,
+            *others,
+        ) = preprocess_experiment.experiment_workspace.generate_preprocess_data()
 
+        if not (data_folder / "X_valid.pkl").exists():
+            # the pickles are still linked into the workspaces of the feature coder
             data_folder.mkdir(exist_ok=True, parents=True)
             pickle.dump(X_train, open(data_folder / "X_train.pkl", "wb"))
             pickle.dump(X_valid, open(data_folder / "X_valid.pkl", "wb"))
@@ -169,16 +200,14 @@ class KGScenario(Scenario):
             pickle.dump(X_test, open(data_folder / "X_test.pkl", "wb"))
             pickle.dump(others, open(data_folder / "others.pkl", "wb"))
 
-        X_valid = pd.read_pickle(data_folder / "X_valid.pkl")
         # TODO: Hardcoded for now, need to be fixed
         if self.competition == "feedback-prize-english-language-learning":
-            return "This is a sparse matrix of descriptive text."
+            return "This is a sparse matrix of descriptive text.", self.input_shape
 
         buffer = io.StringIO()
         X_valid.info(verbose=True, buf=buffer, show_counts=False)
         data_info = buffer.getvalue()
-        self.input_shape = X_valid.shape
-        return data_info
+        return data_info, X_valid.shape
 
     def output_format(self, tag=None) -> str:
         assert tag in [None, "feature", "model"]
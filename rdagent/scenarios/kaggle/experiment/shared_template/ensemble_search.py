@@ -0,0 +1,140 @@
+"""
+Search the weights to ensemble the predictions of the models on the validation set.
+
+The predictions are stacked into a (models, samples, ...) array and the candidate weights into a (candidates, models)
+matrix, so all the candidates are blended by one product and scored by a vectorised metric instead of one Python
+iteration per candidate. The random search can be refined by hill climbing, which moves one weight at a time and
+evaluates all the moves of a round at once.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np
+
+# The number of the blended values evaluated at once, which bounds the memory of a batch of candidates.
+MAX_BATCH_ELEMENTS = 2**24
+
+
+def stack_predictions(pred_list: list) -> np.ndarray:
+    """Stack the predictions of the models into a (models, samples, outputs) array."""
+    preds = np.stack([np.asarray(pred, dtype=float) for pred in pred_list])
+    return preds.reshape(preds.shape[0], preds.shape[1], -1)
+
+
+def accuracy(y_true: np.ndarray, blended: np.ndarray, threshold: float = 0.5) -> np.ndarray:
+    """The accuracy of each candidate. The binary predictions are thresholded, the multi-class ones are argmaxed."""
+    y_true = np.asarray(y_true).reshape(-1)
+    if blended.shape[-1] == 1:
+        labels = (blended[..., 0] > threshold).astype(int)
+    else:
+        labels = blended.argmax(axis=-1)
+    return (labels == y_true).mean(axis=1)
+
+
+def log_loss(y_true: np.ndarray, blended: np.ndarray, eps: float = 1e-15) -> np.ndarray:
+    """The multi-class log loss of each candidate. The label encoded `y_true` indexes the classes."""
+    y_true = np.asarray(y_true).reshape(-1).astype(int)
+    proba = blended / blended.sum(axis=-1, keepdims=True)
+    proba = np.clip(proba[:, np.arange(len(y_true)), y_true], eps, 1 - eps)
+    return -np.log(proba).mean(axis=1)
+
+
+METRICS: dict[str, tuple[Callable, bool]] = {
+    # name: (vectorised metric, greater is better)
+    "accuracy": (accuracy, True),
+    "log_loss": (log_loss, False),
+}
+
+
+def score_weights(preds: np.ndarray, y_true, weights: np.ndarray, metric: str | Callable) -> np.ndarray:
+    """
+    Score each row of `weights` (candidates, models). `metric` is the name of a vectorised metric, or a function
+    scoring a single blended prediction, e.g. one from sklearn.
+    """
+    n_samples = preds.shape[1] * preds.shape[2]
+    batch_size = max(1, MAX_BATCH_ELEMENTS // n_samples)
+    scores = []
+    for start in range(0, len(weights), batch_size):
+        # (candidates, models) x (models, samples, outputs) -> (candidates, samples, outputs)
+        blended = np.tensordot(weights[start : start + batch_size], preds, axes=(1, 0))
+        if isinstance(metric, str):
+            scores.append(METRICS[metric][0](y_true, blended))
+        else:
+            scores.append(np.array([metric(y_true, b.squeeze(-1) if b.shape[-1] == 1 else b) for b in blended]))
+    return np.concatenate(scores)
+
+
+def random_weights(n_models: int, n_candidates: int, high: int = 10, seed: int | None = None) -> np.ndarray:
+    """The distinct normalised weights drawn from the integers in [0, high)."""
+    rng = np.random.default_rng(seed)
+    weights = rng.integers(0, high, size=(n_candidates, n_models))
+    weights = weights[weights.sum(axis=1) > 0]
+    weights = weights / weights.sum(axis=1, keepdims=True)
+    # the duplicates are dropped while keeping the order of the draws
+    _, index = np.unique(weights.round(12), axis=0, return_index=True)
+    return weights[np.sort(index)]
+
+
+def hill_climb(
+    preds: np.ndarray,
+    y_true,
+    metric: str | Callable,
+    greater_is_better: bool,
+    init_weight: np.ndarray,
+    step: float = 0.1,
+    min_step: float = 0.01,
+    max_rounds: int = 100,
+) -> tuple[np.ndarray, float]:
+    """
+    Coordinate-wise hill climbing: in each round, every weight is raised and lowered by `step` and the best improving
+    move is taken. The step is halved when no move improves.
+    """
+    sign = 1 if greater_is_better else -1
+    weight = init_weight / init_weight.sum()
+    best = score_weights(preds, y_true, weight[None], metric)[0]
+    n_models = len(weight)
+    for _ in range(max_rounds):
+        moves = np.concatenate([np.eye(n_models), -np.eye(n_models)]) * step
+        candidates = np.clip(weight[None] + moves, 0, None)
+        candidates = candidates[candidates.sum(axis=1) > 0]
+        candidates = candidates / candidates.sum(axis=1, keepdims=True)
+        scores = score_weights(preds, y_true, candidates, metric)
+        i = np.argmax(sign * scores)
+        if sign * scores[i] > sign * best:
+            weight, best = candidates[i], scores[i]
+        elif step / 2 >= min_step:
+            step /= 2
+        else:
+            break
+    return weight, float(best)
+
+
+def search_weights(
+    pred_list: list,
+    y_true,
+    metric: str | Callable = "accuracy",
+    greater_is_better: bool | None = None,
+    n_candidates: int = 1000,
+    high: int = 10,
+    hill_climbing: bool = False,
+    seed: int | None = None,
+) -> tuple[np.ndarray, float]:
+    """
+    Return the best weights of the models and their validation score. The random candidates are scored at once,
+    and the best one is refined by hill climbing if `hill_climbing` is set. The climbing fits the weights to the
+    validation data, so the returned score is optimistic with it.
+    """
+    if greater_is_better is None:
+        greater_is_better = METRICS[metric][1] if isinstance(metric, str) else True
+    preds = stack_predictions(pred_list)
+    weights = random_weights(len(pred_list), n_candidates, high=high, seed=seed)
+    if len(weights) == 0:  # e.g. only a few draws and all of them are zeros
+        weights = np.full((1, len(pred_list)), 1 / len(pred_list))
+    scores = score_weights(preds, y_true, weights, metric)
+    best_index = np.argmax(scores) if greater_is_better else np.argmin(scores)
+    weight, best = weights[best_index], float(scores[best_index])
+    if hill_climbing:
+        weight, best = hill_climb(preds, y_true, metric, greater_is_better, weight)
+    return weight, best
@@ -0,0 +1,193 @@
+"""
+Cache the transformed outputs of each feature file across the runs of `train.py`.
+
+The outputs of a feature file are keyed by the hash of its source and the hash of the preprocessed data, so only the
+new or changed feature files are fitted and transformed, and the others are loaded from the cache folder
+(`FEATURE_CACHE_DIR`, or `feature_cache` next to `train.py` if it is not set). The outputs are touched when they are
+reused, so `evict_cache` removes the least recently used ones first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import inspect
+import os
+import pickle
+import uuid
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+SPLITS = ("train", "valid", "test")
+
+
+def import_module_from_path(module_name, module_path):
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def data_hash(*data) -> str:
+    """The hash of the preprocessed data, which is much cheaper than transforming them."""
+    h = hashlib.md5()
+    for d in data:
+        if isinstance(d, (pd.DataFrame, pd.Series)):
+            try:
+                h.update(pd.util.hash_pandas_object(d, index=True).values.tobytes())
+                h.update(pickle.dumps((list(d.columns) if isinstance(d, pd.DataFrame) else d.name, list(d.dtypes))))
+                continue
+            except TypeError:  # the unhashable cells, e.g. lists
+                pass
+        if isinstance(d, np.ndarray) and d.dtype != object:
+            h.update(pickle.dumps((d.shape, d.dtype)))
+            h.update(np.ascontiguousarray(d).tobytes())
+        else:
+            h.update(pickle.dumps(d, protocol=pickle.HIGHEST_PROTOCOL))
+    return h.hexdigest()
+
+
+def _atomic_write(path: Path, write) -> None:
+    tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+    write(tmp_path)
+    tmp_path.replace(path)
+
+
+def _dump(df: pd.DataFrame, path: Path) -> None:
+    try:
+        # the parquet files are compact and fast to load, but not all frames can be stored exactly
+        _atomic_write(path.with_suffix(".parquet"), lambda p: df.to_parquet(p, engine="pyarrow"))
+    except Exception:
+        path.with_suffix(".parquet").unlink(missing_ok=True)
+        _atomic_write(path.with_suffix(".pkl"), lambda p: df.to_pickle(p))
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)  # the least recently used outputs are evicted first
+    except OSError:
+        pass
+
+
+def _load(path: Path) -> pd.DataFrame | None:
+    for suffix, read in ((".parquet", pd.read_parquet), (".pkl", pd.read_pickle)):
+        if path.with_suffix(suffix).exists():
+            _touch(path.with_suffix(suffix))
+            return read(path.with_suffix(suffix))
+    return None
+
+
+def evict_cache(cache_dir: Path, max_size: int) -> None:
+    """
+    Remove the outputs of the least recently used feature files until the folder is not larger than `max_size`.
+    """
+    entries: dict[str, list] = {}
+    for fp in cache_dir.iterdir():
+        try:
+            stat = fp.stat()
+        except FileNotFoundError:  # removed by a concurrent run
+            continue
+        # the files of a feature file are named by its key, i.e. `<key>_<split>.<suffix>` and `<key>.skip`
+        entry = entries.setdefault(fp.name.split("_")[0].split(".")[0], [0.0, 0, []])
+        entry[0] = max(entry[0], stat.st_mtime)
+        entry[1] += stat.st_size
+        entry[2].append(fp)
+    total_size = sum(size for _, size, _ in entries.values())
+    for _, size, paths in sorted(entries.values(), key=lambda e: e[0]):
+        if total_size <= max_size:
+            break
+        for fp in paths:
+            fp.unlink(missing_ok=True)
+        total_size -= size
+
+
+def _feature_source(feature) -> str | None:
+    if isinstance(feature, Path):
+        return feature.read_text()
+    # the feature class or instance itself, e.g. in the notebook merged from the files
+    try:
+        return inspect.getsource(feature if isinstance(feature, type) else type(feature))
+    except (OSError, TypeError):  # the source is unavailable, so the outputs are not cached
+        return None
+
+
+def load_or_transform(
+    feature: Path | type | object,
+    X_train: pd.DataFrame,
+    X_valid: pd.DataFrame,
+    X_test: pd.DataFrame,
+    preprocess_hash: str,
+    cache_dir: Path,
+    copy: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
+    """
+    Return the transformed train, valid and test data of the feature file (or the feature class), or None if the
+    outputs are inconsistent.
+    """
+    source = _feature_source(feature)
+    key = None if source is None else hashlib.md5((source + preprocess_hash).encode()).hexdigest()
+    if key is not None:
+        if (cache_dir / f"{key}.skip").exists():
+            _touch(cache_dir / f"{key}.skip")
+            return None
+        cached = [_load(cache_dir / f"{key}_{split}") for split in SPLITS]
+        if all(df is not None for df in cached):
+            return tuple(cached)
+
+    if isinstance(feature, Path):
+        cls = import_module_from_path(feature.stem, feature).feature_engineering_cls()
+    else:
+        cls = feature() if isinstance(feature, type) else feature
+    cls.fit(X_train)
+    # the copies protect the preprocessed data from the transforms modifying their inputs
+    outputs = tuple(cls.transform(X.copy() if copy else X) for X in (X_train, X_valid, X_test))
+    if key is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    if not (outputs[0].shape[-1] == outputs[1].shape[-1] and outputs[0].shape[-1] == outputs[2].shape[-1]):
+        if key is not None:
+            (cache_dir / f"{key}.skip").touch()
+        return None
+    if key is not None and all(isinstance(df, pd.DataFrame) for df in outputs):
+        for split, df in zip(SPLITS, outputs):
+            _dump(df, cache_dir / f"{key}_{split}")
+    return outputs
+
+
+def transform_features(
+    features: Iterable[Path | type | object],
+    X_train: pd.DataFrame,
+    X_valid: pd.DataFrame,
+    X_test: pd.DataFrame,
+    cache_dir: Path | None = None,
+    copy: bool = True,
+    keys: bool = True,
+    concat: bool = True,
+) -> tuple:
+    """
+    Fit and transform the data by each feature file (or feature class/instance) with the cache, and concatenate the outputs (under the keys
+    `feature_{i}` if `keys` is set). The lists of the outputs are returned instead if `concat` is not set.
+    """
+    if cache_dir is None:
+        cache_dir = Path(os.environ.get("FEATURE_CACHE_DIR", Path.cwd() / "feature_cache"))
+    preprocess_hash = data_hash(X_train, X_valid, X_test)
+
+    X_train_l, X_valid_l, X_test_l = [], [], []
+    for f in features:
+        outputs = load_or_transform(f, X_train, X_valid, X_test, preprocess_hash, cache_dir, copy=copy)
+        if outputs is not None:
+            X_train_l.append(outputs[0])
+            X_valid_l.append(outputs[1])
+            X_test_l.append(outputs[2])
+    if not concat:
+        return X_train_l, X_valid_l, X_test_l
+
+    # the outputs are not modified afterwards, so they are not copied again. Since pandas 3.0, copy-on-write
+    # defers the copies by itself.
+    concat_kwargs = {"copy": False} if int(pd.__version__.split(".")[0]) < 3 else {}
+    return tuple(
+        pd.concat(X_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_l))] if keys else None, **concat_kwargs)
+        for X_l in (X_train_l, X_valid_l, X_test_l)
+    )
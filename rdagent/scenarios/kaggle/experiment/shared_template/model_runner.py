@@ -0,0 +1,162 @@
+"""
+Fit the independent models of `model/model*.py`, one by one or in parallel worker processes.
+
+The models are fitted one by one in the main process by default. `MODEL_FIT_N_JOBS` (or `n_jobs`) sets the number of
+the parallel workers, and `MODEL_FIT_CORES` sets the cores of each model (by default, the cores are split evenly among
+the workers).
+
+The workers are forked before the model modules are imported, so the libraries of the models (e.g. torch, xgboost or
+lightgbm, whose OpenMP and CUDA runtimes are not fork-safe) are only loaded inside the workers, after the thread
+limits and the CPU affinity of the core budget are set. The workers share the train and valid data with the main
+process (copy-on-write) instead of receiving pickled copies, and only the fitted models are sent back.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import multiprocessing
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple
+
+
+class FittedModel(NamedTuple):
+    model: Any
+    predict: Callable
+    select_m: Any  # the selector module (or the select function given with the model)
+    name: str
+    fit_seconds: float
+
+
+class _ModelSpec(NamedTuple):
+    fit: Callable
+    predict: Callable
+    select: Callable
+    select_m: Any
+    name: str
+
+
+# The state inherited by the forked workers.
+_ITEMS: list = []
+_DATA: tuple = ()
+# The specs loaded in current worker.
+_WORKER_SPECS: dict[int, _ModelSpec] = {}
+
+
+def _import_module(module_name: str, module_path: Path):
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    # registered, so the fitted models of the classes defined in the module can be pickled back from the workers
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_spec(item) -> _ModelSpec:
+    if isinstance(item, Path):
+        select_path = item.with_name(item.stem.replace("model", "select") + item.suffix)
+        select_m = _import_module(select_path.stem, select_path)
+        m = _import_module(item.stem, item)
+        return _ModelSpec(m.fit, m.predict, select_m.select, select_m, item.stem)
+    # (model object, select function), e.g. in the notebook merged from the files
+    model_obj, select = item
+    return _ModelSpec(model_obj.fit, model_obj.predict, select, select, type(model_obj).__name__)
+
+
+def _limit_threads(cores: int) -> None:
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(cores)
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(limits=cores)
+    except ImportError:
+        pass
+
+
+def _init_worker(slot_counter, cores: int) -> None:
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        # the models which use all the cores they see (e.g. `n_jobs=-1`) only see the cores of their budget
+        available = sorted(os.sched_getaffinity(0))
+        if len(available) >= cores * (slot + 1):
+            os.sched_setaffinity(0, available[cores * slot : cores * (slot + 1)])
+    _limit_threads(cores)
+
+
+def _fit(spec: _ModelSpec, X_train, y_train, X_valid, y_valid, copy: bool) -> tuple[Any, float]:
+    start = time.time()
+    X_train_selected = spec.select(X_train.copy() if copy else X_train)
+    X_valid_selected = spec.select(X_valid.copy() if copy else X_valid)
+    model = spec.fit(X_train_selected, y_train, X_valid_selected, y_valid)
+    return model, time.time() - start
+
+
+def _fit_in_worker(index: int) -> tuple[bytes | None, float]:
+    if index not in _WORKER_SPECS:
+        _WORKER_SPECS[index] = _load_spec(_ITEMS[index])
+    # the data in the worker are private copy-on-write pages, so the selectors can't change the main process
+    model, fit_seconds = _fit(_WORKER_SPECS[index], *_DATA, copy=False)
+    try:
+        return pickle.dumps(model), fit_seconds
+    except Exception:  # the model can't be sent back, it is fitted in the main process instead
+        return None, fit_seconds
+
+
+def fit_models(
+    models: Iterable,
+    X_train,
+    y_train,
+    X_valid,
+    y_valid,
+    n_jobs: int | None = None,
+    cores_per_model: int | None = None,
+) -> list[FittedModel]:
+    """
+    Fit the models (the paths of `model/model*.py` with their `select*.py`) and return them in the given order.
+    """
+    global _ITEMS, _DATA
+
+    items = list(models)
+    n_jobs = min(n_jobs or int(os.environ.get("MODEL_FIT_N_JOBS", 0)) or 1, len(items))
+    if (
+        n_jobs <= 1
+        or "fork" not in multiprocessing.get_all_start_methods()
+        or not all(isinstance(item, Path) for item in items)  # the models are loaded already, e.g. in the notebook
+    ):
+        fitted = []
+        for spec in map(_load_spec, items):
+            model, fit_seconds = _fit(spec, X_train, y_train, X_valid, y_valid, copy=True)
+            print(f"Model [{spec.name}] has been trained in {fit_seconds:.1f}s")
+            fitted.append(FittedModel(model, spec.predict, spec.select_m, spec.name, fit_seconds))
+        return fitted
+
+    cpu_count = os.cpu_count() or 1
+    cores_per_model = cores_per_model or int(os.environ.get("MODEL_FIT_CORES", 0)) or max(1, cpu_count // n_jobs)
+    context = multiprocessing.get_context("fork")
+    _ITEMS, _DATA = items, (X_train, y_train, X_valid, y_valid)
+    try:
+        with ProcessPoolExecutor(
+            n_jobs, mp_context=context, initializer=_init_worker, initargs=(context.Value("i", 0), cores_per_model)
+        ) as executor:
+            futures = [executor.submit(_fit_in_worker, i) for i in range(len(items))]
+            results = [future.result() for future in futures]
+    finally:
+        _ITEMS, _DATA = [], ()
+
+    # the modules are imported in the main process after the workers are done, and the models are unpickled by them
+    fitted = []
+    for spec, (dumped_model, fit_seconds) in zip(map(_load_spec, items), results):
+        if dumped_model is None:
+            model, fit_seconds = _fit(spec, X_train, y_train, X_valid, y_valid, copy=True)
+        else:
+            model = pickle.loads(dumped_model)
+        print(f"Model [{spec.name}] has been trained in {fit_seconds:.1f}s")
+        fitted.append(FittedModel(model, spec.predict, spec.select_m, spec.name, fit_seconds))
+    return fitted
@@ -0,0 +1,129 @@
+"""
+Persist the outputs of `preprocess_script` once per competition and per version of `fea_share_preprocess.py`.
+
+The outputs are stored under `<cache dir>/<md5 of fea_share_preprocess.py>/` in columnar formats which are loaded by
+memory mapping: the frames and the series as uncompressed Arrow (Feather) files and the numeric arrays as `.npy`
+files. The other outputs (e.g. the sparse matrices and the encoders) are pickled.
+
+The cache dir is `PREPROCESS_CACHE_DIR`, or `preprocess_cache` next to `train.py` if it is not set. It is never placed
+on the data volume, which may be read-only and is described to the LLM.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import uuid
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+MANIFEST_NAME = "manifest.json"
+
+
+def preprocess_hash(source: str) -> str:
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def _dump_frame(df: pd.DataFrame, path: Path) -> None:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=True), path, compression="uncompressed")
+
+
+def _load_frame(path: Path) -> pd.DataFrame:
+    import pyarrow.feather as feather
+
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def _dump_item(item, folder: Path, i: int) -> dict:
+    try:
+        if isinstance(item, pd.DataFrame) and not item.columns.duplicated().any():
+            _dump_frame(item, folder / f"{i}.feather")
+            return {"kind": "frame", "file": f"{i}.feather"}
+        if isinstance(item, pd.Series) and (item.name is None or isinstance(item.name, (str, int))):
+            _dump_frame(item.to_frame(name="value"), folder / f"{i}.feather")
+            return {"kind": "series", "file": f"{i}.feather", "name": item.name}
+        if isinstance(item, np.ndarray) and item.dtype != object:
+            np.save(folder / f"{i}.npy", item, allow_pickle=False)
+            return {"kind": "ndarray", "file": f"{i}.npy"}
+    except Exception:  # e.g. the mixed types in an object column, which arrow can't store
+        pass
+    with open(folder / f"{i}.pkl", "wb") as f:
+        pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return {"kind": "pickle", "file": f"{i}.pkl"}
+
+
+def _load_item(entry: dict, folder: Path):
+    path = folder / entry["file"]
+    if entry["kind"] == "frame":
+        return _load_frame(path)
+    if entry["kind"] == "series":
+        return _load_frame(path)["value"].rename(entry["name"])
+    if entry["kind"] == "ndarray":
+        # copy-on-write mapping: the pages are only read when they are used, and the changes stay private
+        return np.load(path, mmap_mode="c")
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def dump_outputs(outputs: tuple, folder: Path) -> None:
+    """
+    Dump the outputs into the folder atomically, so the concurrent readers never see a partial cache.
+    """
+    tmp_folder = folder.with_name(f".{folder.name}.{uuid.uuid4().hex}.tmp")
+    tmp_folder.mkdir(parents=True)
+    try:
+        manifest = [_dump_item(item, tmp_folder, i) for i, item in enumerate(outputs)]
+        (tmp_folder / MANIFEST_NAME).write_text(json.dumps(manifest))
+        tmp_folder.rename(folder)
+    except OSError:
+        if not (folder / MANIFEST_NAME).exists():
+            raise
+    finally:
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+
+def try_dump_outputs(outputs: tuple, folder: Path) -> bool:
+    """
+    Dump the outputs like `dump_outputs`, but return False instead of raising if the cache dir is not writable.
+    """
+    try:
+        dump_outputs(outputs, folder)
+    except OSError:  # e.g. the read-only cache dir
+        return False
+    return True
+
+
+def load_outputs(folder: Path) -> tuple | None:
+    try:
+        manifest = json.loads((folder / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+    return tuple(_load_item(entry, folder) for entry in manifest)
+
+
+def cached_preprocess(preprocess_script: Callable, cache_dir: str | Path | None = None) -> tuple:
+    """
+    Return the outputs of `preprocess_script` from the cache, or run it and cache the outputs if the cache dir is
+    writable.
+    """
+    if cache_dir is None:
+        cache_dir = os.environ.get("PREPROCESS_CACHE_DIR", Path.cwd() / "preprocess_cache")
+    cache_dir = Path(cache_dir)
+    source_path = Path(preprocess_script.__code__.co_filename)
+    folder = cache_dir / preprocess_hash(source_path.read_text()) if source_path.exists() else None
+
+    if folder is not None and (outputs := load_outputs(folder)) is not None:
+        return outputs
+    outputs = tuple(preprocess_script())
+    if folder is not None:
+        try_dump_outputs(outputs, folder)
+    return outputs
@@ -1,10 +1,12 @@
-import importlib.util
 import random
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from fea_share_preprocess import clean_and_impute_data, preprocess_script
+from feature_cache import transform_features
+from model_runner import fit_models
+from preprocess_cache import cached_preprocess
 from sklearn.metrics import accuracy_score
 
 # Set random seed for reproducibility
@@ -19,35 +21,11 @@ def compute_metrics_for_classification(y_true, y_pred):
     return accuracy_score(y_true, y_pred)
 
 
-def import_module_from_path(module_name, module_path):
-    spec = importlib.util.spec_from_file_location(module_name, module_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
 # 1) Preprocess the data
-X_train, X_valid, y_train, y_valid, X_test = preprocess_script()
+X_train, X_valid, y_train, y_valid, X_test = cached_preprocess(preprocess_script)
 
 # 2) Auto feature engineering
-X_train_l, X_valid_l = [], []
-X_test_l = []
-
-for f in DIRNAME.glob("feature/feat*.py"):
-    cls = import_module_from_path(f.stem, f).feature_engineering_cls()
-    cls.fit(X_train)
-    X_train_f = cls.transform(X_train.copy())
-    X_valid_f = cls.transform(X_valid.copy())
-    X_test_f = cls.transform(X_test.copy())
-
-    if X_train_f.shape[-1] == X_valid_f.shape[-1] and X_train_f.shape[-1] == X_test_f.shape[-1]:
-        X_train_l.append(X_train_f)
-        X_valid_l.append(X_valid_f)
-        X_test_l.append(X_test_f)
-
-X_train = pd.concat(X_train_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_train_l))])
-X_valid = pd.concat(X_valid_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_valid_l))])
-X_test = pd.concat(X_test_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_test_l))])
+X_train, X_valid, X_test = transform_features(DIRNAME.glob("feature/feat*.py"), X_train, X_valid, X_test)
 
 print(X_train.shape, X_valid.shape, X_test.shape)
 
@@ -55,15 +33,9 @@ print(X_train.shape, X_valid.shape, X_test.shape)
 X_train, X_valid, X_test = clean_and_impute_data(X_train, X_valid, X_test)
 
 
-model_l = []  # list[tuple[model, predict_func]]
-for f in DIRNAME.glob("model/model*.py"):
-    select_python_path = f.with_name(f.stem.replace("model", "select") + f.suffix)
-    select_m = import_module_from_path(select_python_path.stem, select_python_path)
-    X_train_selected = select_m.select(X_train.copy())
-    X_valid_selected = select_m.select(X_valid.copy())
-
-    m = import_module_from_path(f.stem, f)
-    model_l.append((m.fit(X_train_selected, y_train, X_valid_selected, y_valid), m.predict, select_m))
+model_l = [  # list[tuple[model, predict_func, select_m]]
+    fitted[:3] for fitted in fit_models(DIRNAME.glob("model/model*.py"), X_train, y_train, X_valid, y_valid)
+]
 
 # 4) Evaluate the model on the validation set
 metrics_all = []
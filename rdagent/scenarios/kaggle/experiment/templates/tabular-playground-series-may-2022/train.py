@@ -1,10 +1,12 @@
-import importlib.util
 import random
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 from fea_share_preprocess import preprocess_script
+from feature_cache import transform_features
+from model_runner import fit_models
+from preprocess_cache import cached_preprocess
 from sklearn.metrics import roc_auc_score
 
 # Set random seed for reproducibility
@@ -14,59 +16,28 @@ np.random.seed(SEED)
 DIRNAME = Path(__file__).absolute().resolve().parent
 
 
-def import_module_from_path(module_name, module_path):
-    spec = importlib.util.spec_from_file_location(module_name, module_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-
 # 1) Preprocess the data
-X_train, X_valid, y_train, y_valid, X_test, ids = preprocess_script()
+X_train, X_valid, y_train, y_valid, X_test, ids = cached_preprocess(preprocess_script)
 
 # 2) Auto feature engineering
-X_train_l, X_valid_l = [], []
-X_test_l = []
-
-for f in DIRNAME.glob("feature/feat*.py"):
-    cls = import_module_from_path(f.stem, f).feature_engineering_cls()
-    cls.fit(X_train)
-    X_train_f = cls.transform(X_train)
-    X_valid_f = cls.transform(X_valid)
-    X_test_f = cls.transform(X_test)
-
-    if X_train_f.shape[-1] == X_valid_f.shape[-1] and X_train_f.shape[-1] == X_test_f.shape[-1]:
-        X_train_l.append(X_train_f)
-        X_valid_l.append(X_valid_f)
-        X_test_l.append(X_test_f)
-        print(f"Feature [{f.stem}] has been added to the feature list")
+X_train, X_valid, X_test = transform_features(DIRNAME.glob("feature/feat*.py"), X_train, X_valid, X_test, copy=False)
 
-X_train = pd.concat(X_train_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_train_l))])
-X_valid = pd.concat(X_valid_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_valid_l))])
-X_test = pd.concat(X_test_l, axis=1, keys=[f"feature_{i}" for i in range(len(X_test_l))])
-
-
-model_l = []  # list[tuple[model, predict_func]]
-for f in DIRNAME.glob("model/model*.py"):
-    select_python_path = f.with_name(f.stem.replace("model", "select") + f.suffix)
-    select_m = import_module_from_path(select_python_path.stem, select_python_path)
-    X_train_selected = select_m.select(X_train.copy())
-    X_valid_selected = select_m.select(X_valid.copy())
 
-    m = import_module_from_path(f.stem, f)
-    model_l.append((m.fit(X_train_selected, y_train, X_valid_selected, y_valid), m.predict, select_m, f.stem))
-    print(f"Model [{f.stem}] has been trained")
+# list[FittedModel(model, predict_func, select_m, name, fit_seconds)]
+model_l = fit_models(DIRNAME.glob("model/model*.py"), X_train, y_train, X_valid, y_valid)
 
 # 4) Evaluate the model on the validation set
-sub_submission = pd.DataFrame(columns=["Model", "score"])
+sub_submission = pd.DataFrame(columns=["Model", "score", "fit_seconds"])
 metrics_all = []
-for model, predict_func, select_m, model_name in model_l:
+for model, predict_func, select_m, model_name, fit_seconds in model_l:
     X_valid_selected = select_m.select(X_valid.copy())
     y_valid_pred = predict_func(model, X_valid_selected)
     auroc = roc_auc_score(y_valid, y_valid_pred)
     print(f"[{type(model).__name__}] AUROC on valid set: {auroc}")
     metrics_all.append(auroc)
-    sub_submission = sub_submission._append({"Model": model_name, "score": auroc}, ignore_index=True)
+    sub_submission = sub_submission._append(
+        {"Model": model_name, "score": auroc, "fit_seconds": fit_seconds}, ignore_index=True
+    )
 sub_submission.to_csv("sub_submission_score.csv")
 
 # 5) Save the validation accuracy
@@ -1,7 +1,10 @@
+import re
 from pathlib import Path
 
 import nbformat as nbf
 
+from rdagent.scenarios.kaggle.experiment.workspace import KG_SHARED_TEMPLATE_FOLDER
+
 
 def python_files_to_notebook(competition: str, py_dir: str):
     py_dir: Path = Path(py_dir)
@@ -49,14 +52,24 @@ def python_files_to_notebook(competition: str, py_dir: str):
     train_py = train_py.replace("from fea_share_preprocess import preprocess_script", "")
     train_py = train_py.replace("DIRNAME = Path(__file__).absolute().resolve().parent", "")
 
+    # the shared runtime modules are merged into the notebook instead of being imported
+    shared_pys = {}
+    for shared_file in sorted(KG_SHARED_TEMPLATE_FOLDER.glob("*.py")):
+        shared_pys[shared_file.stem] = shared_file.read_text().replace("from __future__ import annotations\n", "")
+        train_py = re.sub(rf"^from {shared_file.stem} import .*$", "", train_py, flags=re.M)
+
     fea_cls_list_str = "[" + ", ".join(list(fea_pys.keys())) + "]"
-    train_py = train_py.replace(
-        'for f in DIRNAME.glob("feature/feat*.py"):', f"for cls in {fea_cls_list_str}:"
-    ).replace("cls = import_module_from_path(f.stem, f).feature_engineering_cls()", "")
+    train_py = (
+        train_py.replace('for f in DIRNAME.glob("feature/feat*.py"):', f"for cls in {fea_cls_list_str}:")
+        .replace("cls = import_module_from_path(f.stem, f).feature_engineering_cls()", "")
+        .replace('DIRNAME.glob("feature/feat*.py")', fea_cls_list_str)
+    )
 
     model_cls_list_str = "[" + ", ".join(list(model_pys.keys())) + "]"
+    model_select_list_str = "[" + ", ".join(f"({k}(), {k.replace('model', 'select')})" for k in model_pys.keys()) + "]"
     train_py = (
         train_py.replace('for f in DIRNAME.glob("model/model*.py"):', f"for mc in {model_cls_list_str}:")
+        .replace('DIRNAME.glob("model/model*.py")', model_select_list_str)
         .replace("m = import_module_from_path(f.stem, f)", "m = mc()")
         .replace('select_python_path = f.with_name(f.stem.replace("model", "select") + f.suffix)', "")
         .replace(
@@ -73,6 +86,10 @@ def python_files_to_notebook(competition: str, py_dir: str):
     nb.cells.append(nbf.v4.new_code_cell(pre_py))
     all_py += pre_py + "\n\n"
 
+    for v in shared_pys.values():
+        nb.cells.append(nbf.v4.new_code_cell(v))
+        all_py += v + "\n\n"
+
     for v in fea_pys.values():
         nb.cells.append(nbf.v4.new_code_cell(v))
         all_py += v + "\n\n"
@@ -8,6 +8,12 @@ import pandas as pd
 from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
 from rdagent.core.experiment import FBWorkspace
 from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.kaggle.experiment.shared_template.feature_cache import evict_cache
+from rdagent.scenarios.kaggle.experiment.shared_template.preprocess_cache import (
+    load_outputs,
+    preprocess_hash,
+    try_dump_outputs,
+)
 from rdagent.utils.env import KGDockerEnv
 
 KG_FEATURE_PREPROCESS_SCRIPT = """import pickle
@@ -25,9 +31,14 @@ pickle.dump(others, open("others.pkl", "wb"))
 """
 
 
+# The runtime utilities shared by all the competition templates, e.g. `feature_cache.py`.
+KG_SHARED_TEMPLATE_FOLDER = Path(__file__).parent / "shared_template"
+
+
 class KGFBWorkspace(FBWorkspace):
     def __init__(self, template_folder_path: Path, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
+        self.inject_code_from_folder(KG_SHARED_TEMPLATE_FOLDER)
         self.inject_code_from_folder(template_folder_path)
         self.data_description: List[Tuple[str, int]] = []
 
@@ -39,9 +50,27 @@ class KGFBWorkspace(FBWorkspace):
                 model_description[k] = v
         return model_description
 
+    @property
+    def preprocess_cache_folder(self) -> Path | None:
+        """
+        The folder of the cached outputs of `preprocess_script`, which is shared by the workspaces with the same
+        `fea_share_preprocess.py`. It is kept out of the competition data, so the data stay untouched.
+        """
+        if not KAGGLE_IMPLEMENT_SETTING.competition or "fea_share_preprocess.py" not in self.file_dict:
+            return None
+        return (
+            Path(KAGGLE_IMPLEMENT_SETTING.preprocess_cache_path)
+            / KAGGLE_IMPLEMENT_SETTING.competition
+            / preprocess_hash(self.file_dict["fea_share_preprocess.py"])
+        )
+
     def generate_preprocess_data(
         self,
     ) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series, pd.DataFrame, Any]:
+        cache_folder = self.preprocess_cache_folder
+        if cache_folder is not None and (outputs := load_outputs(cache_folder)) is not None:
+            return outputs
+
         kgde = KGDockerEnv(KAGGLE_IMPLEMENT_SETTING.competition)
         kgde.prepare()
 
@@ -67,7 +96,10 @@ class KGFBWorkspace(FBWorkspace):
             raise Exception("Feature preprocess failed.")
         else:
             X_train, X_valid, y_train, y_valid, X_test, others = results
-            return X_train, X_valid, y_train, y_valid, X_test, *others
+            outputs = (X_train, X_valid, y_train, y_valid, X_test, *others)
+            if cache_folder is not None:
+                try_dump_outputs(outputs, cache_folder)
+            return outputs
 
     def execute(self, run_env: dict = {}, *args, **kwargs) -> str:
         logger.info(f"Running the experiment in {self.workspace_path}")
@@ -75,11 +107,37 @@ class KGFBWorkspace(FBWorkspace):
         kgde = KGDockerEnv(KAGGLE_IMPLEMENT_SETTING.competition)
         kgde.prepare()
 
+        run_env = {
+            **run_env,
+            "MODEL_FIT_N_JOBS": str(KAGGLE_IMPLEMENT_SETTING.model_fit_n_jobs),
+            "MODEL_FIT_CORES": str(KAGGLE_IMPLEMENT_SETTING.model_fit_cores),
+        }
         running_extra_volume = {}
         if KAGGLE_IMPLEMENT_SETTING.competition:
             running_extra_volume = {
                 KAGGLE_IMPLEMENT_SETTING.local_data_path + "/" + KAGGLE_IMPLEMENT_SETTING.competition: "/kaggle/input"
             }
+            # the transformed features are cached across the workspaces of the competition
+            feature_cache_path = (
+                Path(KAGGLE_IMPLEMENT_SETTING.feature_cache_path) / KAGGLE_IMPLEMENT_SETTING.competition
+            )
+            feature_cache_path.mkdir(parents=True, exist_ok=True)
+            evict_cache(feature_cache_path, KAGGLE_IMPLEMENT_SETTING.feature_cache_max_size)
+            running_extra_volume[str(feature_cache_path.resolve())] = {"bind": "/kaggle/feature_cache", "mode": "rw"}
+            # so are the outputs of `preprocess_script`, next to the data instead of inside them
+            preprocess_cache_path = (
+                Path(KAGGLE_IMPLEMENT_SETTING.preprocess_cache_path) / KAGGLE_IMPLEMENT_SETTING.competition
+            )
+            preprocess_cache_path.mkdir(parents=True, exist_ok=True)
+            running_extra_volume[str(preprocess_cache_path.resolve())] = {
+                "bind": "/kaggle/preprocess_cache",
+                "mode": "rw",
+            }
+            run_env = {
+                **run_env,
+                "FEATURE_CACHE_DIR": "/kaggle/feature_cache",
+                "PREPROCESS_CACHE_DIR": "/kaggle/preprocess_cache",
+            }
         else:
             running_extra_volume = {}
 
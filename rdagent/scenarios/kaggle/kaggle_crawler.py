@@ -1,10 +1,14 @@
 # %%
 import bisect
+import fnmatch
 import json
+import os
 import shutil
 import subprocess
 import time
+import uuid
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import chain
 from pathlib import Path
 
@@ -108,7 +112,13 @@ def crawl_descriptions(
     return descriptions
 
 
-def download_data(competition: str, settings: ExtendedBaseSettings = KAGGLE_IMPLEMENT_SETTING) -> None:
+def download_data(
+    competition: str, settings: ExtendedBaseSettings = KAGGLE_IMPLEMENT_SETTING, members: list[str] | None = None
+) -> None:
+    """
+    Download and extract the data of the competition.
+    `members` are the glob patterns of the files to extract (e.g. `["train.csv", "train/*"]`), all by default.
+    """
     local_path = settings.local_data_path
     if settings.if_using_mle_data:
         zipfile_path = f"{local_path}/zip_files"
@@ -169,12 +179,20 @@ def download_data(competition: str, settings: ExtendedBaseSettings = KAGGLE_IMPL
                 logger.error(f"Download failed: {e}, stderr: {e.stderr}, stdout: {e.stdout}")
                 raise KaggleError(f"Download failed: {e}, stderr: {e.stderr}, stdout: {e.stdout}")
 
-            # unzip data
-            unzip_path = f"{local_path}/{competition}"
-            if not Path(unzip_path).exists():
-                unzip_data(unzip_file_path=f"{zipfile_path}/{competition}.zip", unzip_target_path=unzip_path)
-                for sub_zip_file in Path(unzip_path).rglob("*.zip"):
-                    unzip_data(sub_zip_file, unzip_target_path=unzip_path)
+        # unzip data, the files recorded in the manifest are skipped, so an interrupted extraction is resumed
+        unzip_path = Path(local_path) / competition
+        manifest_path = Path(zipfile_path) / f"{competition}.manifest.json"
+        if not unzip_path.exists() or manifest_path.exists():  # the folders extracted without manifest are kept
+            extract_archives(
+                [Path(f"{zipfile_path}/{competition}.zip")],
+                unzip_path,
+                # the nested archives are always extracted to filter their members
+                members=None if members is None else [*members, "*.zip"],
+                manifest_path=manifest_path,
+            )
+            extract_archives(
+                sorted(unzip_path.rglob("*.zip")), unzip_path, members=members, manifest_path=manifest_path
+            )
 
     # sample data
     if not Path(f"{local_path}/sample/{competition}").exists():
@@ -182,8 +200,105 @@ def download_data(competition: str, settings: ExtendedBaseSettings = KAGGLE_IMPL
 
 
 def unzip_data(unzip_file_path: str, unzip_target_path: str) -> None:
-    with zipfile.ZipFile(unzip_file_path, "r") as zip_ref:
-        zip_ref.extractall(unzip_target_path)
+    extract_archives([Path(unzip_file_path)], Path(unzip_target_path))
+
+
+def _member_path(target_path: Path, member_name: str) -> Path:
+    # the same path as `ZipFile.extract` for the regular member names
+    return target_path.joinpath(*[part for part in member_name.split("/") if part not in ("", ".", "..")])
+
+
+def extract_archives(
+    zip_paths: list[Path],
+    target_path: Path,
+    members: list[str] | None = None,
+    manifest_path: Path | None = None,
+    n_workers: int | None = None,
+) -> list[Path]:
+    """
+    Extract the archives into the target folder with a thread pool over the members of all the archives.
+
+    Parameters
+    ----------
+    members :
+        The glob patterns of the members to extract. All the members are extracted if it is None.
+    manifest_path :
+        The json manifest of the extracted files (the archive, size and CRC of each member). The files which are
+        already extracted from the same members are skipped.
+    n_workers :
+        The number of the extracting threads, `os.cpu_count() + 4` (at most 32) by default.
+
+    Returns
+    -------
+    The extracted files, including the skipped ones.
+    """
+    manifest: dict[str, dict] = {}
+    if manifest_path is not None and manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+
+    jobs = []
+    extracted = []
+    for zip_path in zip_paths:
+        with zipfile.ZipFile(zip_path, "r") as archive:
+            infos = archive.infolist()
+        for info in infos:
+            if members is not None and not any(fnmatch.fnmatch(info.filename, p) for p in members):
+                continue
+            path = _member_path(target_path, info.filename)
+            if info.is_dir():
+                path.mkdir(parents=True, exist_ok=True)
+                continue
+            key = str(path.relative_to(target_path))
+            record = {"archive": zip_path.name, "size": info.file_size, "crc": info.CRC}
+            if manifest.get(key) == record and path.exists() and path.stat().st_size == info.file_size:
+                extracted.append(path)
+                continue
+            # the folders are created before extracting in parallel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            jobs.append((zip_path, info, path, key, record))
+    if not jobs:
+        return sorted(extracted)
+
+    # the decompression and the writing release the GIL. The members are dealt to the threads by size, and each
+    # thread reads them by its own handles of the archives, since a `ZipFile` is not safe to share between threads.
+    n_workers = min(n_workers or min(32, (os.cpu_count() or 1) + 4), len(jobs))
+    jobs.sort(key=lambda job: job[1].file_size, reverse=True)
+    done: list[tuple[Path, str, dict]] = []
+    try:
+        with ThreadPoolExecutor(n_workers) as executor:
+            futures = [
+                executor.submit(_extract_members, jobs[i::n_workers], target_path, done) for i in range(n_workers)
+            ]
+            for future in as_completed(futures):
+                future.result()
+    finally:
+        # the finished members are recorded even if the extraction is interrupted
+        for path, key, record in done:
+            extracted.append(path)
+            manifest[key] = record
+        if manifest_path is not None:
+            _dump_manifest(manifest, manifest_path)
+    return sorted(extracted)
+
+
+def _extract_members(jobs: list[tuple], target_path: Path, done: list[tuple[Path, str, dict]]) -> None:
+    archives: dict[Path, zipfile.ZipFile] = {}
+    try:
+        for zip_path, info, path, key, record in jobs:
+            if zip_path not in archives:
+                archives[zip_path] = zipfile.ZipFile(zip_path, "r")
+            archives[zip_path].extract(info, target_path)
+            done.append((path, key, record))
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+
+def _dump_manifest(manifest: dict[str, dict], manifest_path: Path) -> None:
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(manifest))
+    tmp_path.replace(manifest_path)
 
 
 @cache_with_pickle(hash_func=lambda x: x, force=True)
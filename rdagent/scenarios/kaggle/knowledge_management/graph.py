@@ -77,6 +77,7 @@ class KGKnowledgeGraph(UndirectedGraph):
                 for document_content in documents
             ],
             n=RD_AGENT_SETTINGS.multi_proc_n,
+            kind="thread",
         )
         node_pairs = []
         node_list = []
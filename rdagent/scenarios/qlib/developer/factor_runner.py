@@ -1,11 +1,14 @@
+import json
 import pickle
+import uuid
 from pathlib import Path
-from typing import List
+from typing import Callable, List
 
 import pandas as pd
 from pandarallel import pandarallel
 
 from rdagent.components.coder.CoSTEER.evaluators import CoSTEERMultiFeedback
+from rdagent.components.coder.factor_coder.config import FACTOR_COSTEER_SETTINGS
 from rdagent.core.conf import RD_AGENT_SETTINGS
 from rdagent.core.utils import cache_with_pickle, multiprocessing_wrapper
 
@@ -13,8 +16,11 @@ pandarallel.initialize(verbose=1)
 
 from rdagent.components.runner import CachedRunner
 from rdagent.core.exception import FactorEmptyError
+from rdagent.core.scenario import Scenario
 from rdagent.log import rdagent_logger as logger
 from rdagent.scenarios.qlib.experiment.factor_experiment import QlibFactorExperiment
+from rdagent.scenarios.qlib.experiment.workspace import execute_batch
+from rdagent.utils import data_folder_fingerprint, md5_hash
 
 DIRNAME = Path(__file__).absolute().resolve().parent
 DIRNAME_local = Path.cwd()
@@ -33,6 +39,88 @@ DIRNAME_local = Path.cwd()
 # TODO: supporting multiprocessing and keep previous results
 
 
+class SOTAFactorStore:
+    """
+    The factor matrix of the SOTA experiments, maintained incrementally along the loop.
+
+    The matrix of a list of experiments is persisted by the keys of the experiments and the fingerprint of the
+    source data the factors are computed on. For a longer list, the matrix of its longest stored prefix is loaded and
+    only the factors of the rest experiments are processed and appended as columns, so each loop only pays for the
+    newly accepted experiment instead of all the former ones.
+    """
+
+    def __init__(self, folder: Path, data_folder: Path | None = None, max_kept: int = 3) -> None:
+        self.folder = folder
+        self.data_folder = data_folder
+        self.max_kept = max_kept  # only the latest matrices are kept on disk
+
+    @staticmethod
+    def exp_key(exp: QlibFactorExperiment) -> str | None:
+        """
+        The key of the factors of the experiment, which is determined by the code of the successfully implemented
+        factors. The experiments from the template project have no factor to process and no key.
+        """
+        if len(exp.sub_tasks) == 0:
+            return None
+        return md5_hash(
+            json.dumps(
+                [
+                    ws.fingerprint() if ws and fb else None
+                    for ws, fb in zip(exp.sub_workspace_list, exp.prop_dev_feedback or [])
+                ]
+            )
+        )
+
+    def _path(self, data_key: str, keys: list[str]) -> Path:
+        return self.folder / f"{md5_hash(json.dumps([data_key, keys]))}.pkl"
+
+    def _dump(self, data_key: str, keys: list[str], matrix: pd.DataFrame) -> None:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.folder / f".{uuid.uuid4().hex}.tmp"
+        with tmp_path.open("wb") as f:
+            pickle.dump(matrix, f)
+        tmp_path.replace(self._path(data_key, keys))
+        for stale in sorted(self.folder.glob("*.pkl"), key=lambda p: p.stat().st_mtime)[: -self.max_kept]:
+            stale.unlink(missing_ok=True)
+
+    def get(
+        self,
+        exps: List[QlibFactorExperiment],
+        process: Callable[[QlibFactorExperiment], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """
+        Get the factor matrix of the experiments. `process` returns the factors of a single experiment.
+        """
+        keyed_exps = [(key, exp) for exp in exps if (key := self.exp_key(exp)) is not None]
+        keys = [key for key, _ in keyed_exps]
+        # the same factors compute different values on updated source data
+        data_key = data_folder_fingerprint(self.data_folder) if self.data_folder is not None else ""
+
+        n_stored = len(keyed_exps)
+        while n_stored > 0 and not self._path(data_key, keys[:n_stored]).exists():
+            n_stored -= 1
+        matrix = None
+        if n_stored > 0:
+            try:
+                with self._path(data_key, keys[:n_stored]).open("rb") as f:
+                    matrix = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):  # removed or broken by other processes
+                n_stored = 0
+
+        for _, exp in keyed_exps[n_stored:]:
+            try:
+                new_factors = process(exp)
+            except FactorEmptyError:
+                continue
+            matrix = new_factors if matrix is None else pd.concat([matrix, new_factors], axis=1)
+
+        if matrix is None:
+            raise FactorEmptyError("No valid factor data found to merge.")
+        if n_stored < len(keyed_exps):
+            self._dump(data_key, keys, matrix)
+        return matrix
+
+
 class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
     """
     Docker run
@@ -43,6 +131,13 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
     - results in `mlflow`
     """
 
+    def __init__(self, scen: Scenario) -> None:
+        super().__init__(scen)
+        self.SOTA_factor_store = SOTAFactorStore(
+            Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / "qlib_sota_factor_store",
+            data_folder=Path(FACTOR_COSTEER_SETTINGS.data_folder),
+        )
+
     def calculate_information_coefficient(
         self, concat_feature: pd.DataFrame, SOTA_feature_column_size: int, new_feature_columns_size: int
     ) -> pd.DataFrame:
@@ -77,13 +172,56 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
         Generate the experiment by processing and combining factor data,
         then passing the combined data to Docker for backtest results.
         """
-        if exp.based_experiments and exp.based_experiments[-1].result is None:
+        if self.is_batch_developed(exp):
+            return exp
+        baseline = exp.based_experiments[-1] if exp.based_experiments else None
+        if baseline is not None and baseline.result is None and not type(self).develop.is_cached(self, baseline):
+            # Before the first accepted experiment, the template project is backtested as the baseline as well.
+            # Both are backtested in one batch, so qlib and the dataset are loaded only once.
+            self.develop_batch_with_cache([baseline], lambda pending: self._backtest_batch([*pending, exp]))
+            return exp
+        qlib_config_name = self._prepare_backtest(exp)
+        result = exp.experiment_workspace.execute(qlib_config_name=qlib_config_name)
+
+        exp.result = result
+
+        return exp
+
+    def develop_batch(self, exps: List[QlibFactorExperiment], n_jobs: int = 1) -> List[QlibFactorExperiment]:
+        """
+        Backtest the candidate experiments in one qlib process instead of one Docker run per experiment.
+        The experiments share the cache of `develop`, so only the uncached ones are backtested.
+        """
+        return self.develop_batch_with_cache(exps, lambda pending: self._backtest_batch(pending, n_jobs=n_jobs))
+
+    def _backtest_batch(self, exps: List[QlibFactorExperiment], n_jobs: int = 1) -> None:
+        """Backtest the experiments in one batch and set their results"""
+        # the based experiments in the batch get their results from the batch
+        in_batch = {id(exp) for exp in exps}
+        qlib_config_names = [
+            self._prepare_backtest(
+                exp, develop_based=not (exp.based_experiments and id(exp.based_experiments[-1]) in in_batch)
+            )
+            for exp in exps
+        ]
+        results = execute_batch(
+            [exp.experiment_workspace for exp in exps], qlib_config_names, [{} for _ in exps], n_jobs=n_jobs
+        )
+        for exp, result in zip(exps, results):
+            exp.result = result
+
+    def _prepare_backtest(self, exp: QlibFactorExperiment, develop_based: bool = True) -> str:
+        """
+        Prepare the factors of the experiment in its workspace and return the name of the qlib config to run.
+        The last based experiment is developed first if it has no result, unless `develop_based` is False.
+        """
+        if develop_based and exp.based_experiments and exp.based_experiments[-1].result is None:
             exp.based_experiments[-1] = self.develop(exp.based_experiments[-1])
 
         if exp.based_experiments:
             SOTA_factor = None
             if len(exp.based_experiments) > 1:
-                SOTA_factor = self.process_factor_data(exp.based_experiments)
+                SOTA_factor = self.SOTA_factor_store.get(exp.based_experiments, self.process_factor_data)
 
             # Process the new factors data
             new_factors = self.process_factor_data(exp)
@@ -110,13 +248,9 @@ class QlibFactorRunner(CachedRunner[QlibFactorExperiment]):
             with open(exp.experiment_workspace.workspace_path / "combined_factors_df.pkl", "wb") as f:
                 pickle.dump(combined_factors, f)
 
-        result = exp.experiment_workspace.execute(
-            qlib_config_name=f"conf.yaml" if len(exp.based_experiments) == 0 else "conf_combined.yaml"
-        )
-
-        exp.result = result
-
-        return exp
+            exp.experiment_workspace.prepare_alpha158_cache()
+            return "conf_combined.yaml"
+        return "conf.yaml"
 
     def process_factor_data(self, exp_or_list: List[QlibFactorExperiment] | QlibFactorExperiment) -> pd.DataFrame:
         """
@@ -2,6 +2,7 @@ from rdagent.components.runner import CachedRunner
 from rdagent.core.exception import ModelEmptyError
 from rdagent.core.utils import cache_with_pickle
 from rdagent.scenarios.qlib.experiment.model_experiment import QlibModelExperiment
+from rdagent.scenarios.qlib.experiment.workspace import execute_batch
 
 
 class QlibModelRunner(CachedRunner[QlibModelExperiment]):
@@ -19,6 +20,37 @@ class QlibModelRunner(CachedRunner[QlibModelExperiment]):
 
     @cache_with_pickle(CachedRunner.get_cache_key, CachedRunner.assign_cached_result)
     def develop(self, exp: QlibModelExperiment) -> QlibModelExperiment:
+        if self.is_batch_developed(exp):
+            return exp
+        env_to_use = self._prepare_backtest(exp)
+        result = exp.experiment_workspace.execute(qlib_config_name="conf.yaml", run_env=env_to_use)
+
+        exp.result = result
+
+        return exp
+
+    def develop_batch(self, exps: list[QlibModelExperiment], n_jobs: int = 1) -> list[QlibModelExperiment]:
+        """
+        Backtest the candidate models in one qlib process, so the shared Alpha158 dataset is loaded only once.
+        The experiments share the cache of `develop`, so only the uncached ones are backtested.
+        The model loop proposes one model per loop, so it is for the callers evaluating several models (e.g. a
+        benchmark); unlike the factor runner, `develop` has no baseline to backtest along.
+        """
+
+        def backtest(pending: list[QlibModelExperiment]) -> None:
+            run_envs = [self._prepare_backtest(exp) for exp in pending]
+            results = execute_batch(
+                [exp.experiment_workspace for exp in pending], ["conf.yaml"] * len(pending), run_envs, n_jobs=n_jobs
+            )
+            for exp, result in zip(pending, results):
+                exp.result = result
+
+        return self.develop_batch_with_cache(exps, backtest)
+
+    def _prepare_backtest(self, exp: QlibModelExperiment) -> dict:
+        """
+        Inject the model into the workspace of the experiment and return the env to render the qlib config.
+        """
         if exp.sub_workspace_list[0].file_dict.get("model.py") is None:
             raise ModelEmptyError("model.py is empty")
         # to replace & inject code
@@ -30,9 +62,4 @@ class QlibModelRunner(CachedRunner[QlibModelExperiment]):
             env_to_use.update({"dataset_cls": "TSDatasetH", "step_len": 20, "num_timesteps": 20})
         elif exp.sub_tasks[0].model_type == "Tabular":
             env_to_use.update({"dataset_cls": "DatasetH"})
-
-        result = exp.experiment_workspace.execute(qlib_config_name="conf.yaml", run_env=env_to_use)
-
-        exp.result = result
-
-        return exp
+        return env_to_use
@@ -0,0 +1,149 @@
+"""
+Train and backtest a batch of candidate experiments in one qlib process.
+
+`candidates.json` lists the candidates as `{"id": ..., "config": ..., "env": {...}}`. Each candidate's files are
+under `candidates/<id>/`, and its config is rendered with its env the same way as `qrun` renders it with the
+environment variables. `qlib.init` and the mlflow setup are paid only once, and the candidates sharing the same
+dataset config share the loaded dataset.
+
+The metrics and the portfolio report of each candidate are written straight to `results/<id>/qlib_res.csv` and
+`results/<id>/ret.pkl`, so no scan of the recorders is needed. The failed candidates get `results/<id>/error.txt`.
+
+Usage: python batch_backtest.py [n_jobs]
+
+qlib is imported where it is used, so the helpers reading the candidates don't need it.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from jinja2 import Environment, meta
+
+ROOT = Path(__file__).resolve().parent
+CANDIDATES_PATH = ROOT / "candidates.json"
+RESULTS_PATH = ROOT / "results"
+
+# The datasets loaded in this process, keyed by the dump of their configs.
+DATASETS = {}
+
+
+def render_config(config_path: Path, env: dict) -> dict:
+    content = config_path.read_text()
+    variables = meta.find_undeclared_variables(Environment().parse(content))
+    context = {var: str(env[var]) for var in variables if var in env}
+    return yaml.safe_load(Environment().from_string(content).render(context))
+
+
+def _local_files(obj, candidate_path: Path) -> list[Path]:
+    if isinstance(obj, dict):
+        return [fp for value in obj.values() for fp in _local_files(value, candidate_path)]
+    if isinstance(obj, list):
+        return [fp for value in obj for fp in _local_files(value, candidate_path)]
+    if isinstance(obj, str) and (candidate_path / obj).is_file():
+        return [candidate_path / obj]
+    return []
+
+
+def dataset_key(candidate_id: str, config: dict) -> str:
+    """
+    The datasets are shared by their configs. The files of the candidates referred by the configs (e.g. the
+    `combined_factors_df.pkl` of the factor candidates) differ even if the configs are the same, so their
+    contents are part of the key.
+    """
+    dataset_config = config["task"]["dataset"]
+    file_hashes = [
+        hashlib.md5(fp.read_bytes()).hexdigest()
+        for fp in _local_files(dataset_config, ROOT / "candidates" / candidate_id)
+    ]
+    return json.dumps([dataset_config, file_hashes], sort_keys=True, default=str)
+
+
+def load_candidates() -> list[tuple[dict, dict]]:
+    candidates = []
+    for candidate in json.loads(CANDIDATES_PATH.read_text()):
+        config_path = ROOT / "candidates" / candidate["id"] / candidate["config"]
+        candidates.append((candidate, render_config(config_path, candidate.get("env", {}))))
+    return candidates
+
+
+def get_dataset(candidate_id: str, config: dict):
+    from qlib.utils import init_instance_by_config
+
+    key = dataset_key(candidate_id, config)
+    if key not in DATASETS:
+        # the relative paths in the dataset config (e.g. `combined_factors_df.pkl`) are relative to the candidate
+        os.chdir(ROOT / "candidates" / candidate_id)
+        DATASETS[key] = init_instance_by_config(config["task"]["dataset"])
+    return DATASETS[key]
+
+
+def run_candidate(candidate: dict, config: dict) -> None:
+    from qlib.utils import fill_placeholder, init_instance_by_config
+    from qlib.workflow import R
+
+    candidate_id = candidate["id"]
+    candidate_path = ROOT / "candidates" / candidate_id
+    result_path = RESULTS_PATH / candidate_id
+    result_path.mkdir(parents=True, exist_ok=True)
+    # the candidates have their own `model.py`, so the module imported by the former candidate is dropped
+    sys.path.insert(0, str(candidate_path))
+    sys.modules.pop("model", None)
+    try:
+        dataset = get_dataset(candidate_id, config)
+        os.chdir(candidate_path)
+
+        model = init_instance_by_config(config["task"]["model"])
+        with R.start(experiment_name="batch_backtest", recorder_name=candidate_id):
+            model.fit(dataset)
+            R.save_objects(trained_model=model)
+            recorder = R.get_recorder()
+            placeholder_value = {"<MODEL>": model, "<DATASET>": dataset}
+            for record_config in config["task"].get("record", []):
+                record_config = fill_placeholder(record_config, placeholder_value)
+                record = init_instance_by_config(record_config, recorder=recorder, try_kwargs=placeholder_value)
+                record.generate()
+
+        pd.Series(recorder.list_metrics()).to_csv(result_path / "qlib_res.csv")
+        recorder.load_object("portfolio_analysis/report_normal_1day.pkl").to_pickle(result_path / "ret.pkl")
+        print(f"Candidate {candidate_id} is done.")
+    except Exception:
+        (result_path / "error.txt").write_text(traceback.format_exc())
+        print(f"Candidate {candidate_id} failed:\n{traceback.format_exc()}")
+    finally:
+        sys.path.remove(str(candidate_path))
+
+
+def _run_candidate_star(args: tuple[dict, dict]) -> None:
+    run_candidate(*args)
+
+
+if __name__ == "__main__":
+    import qlib
+
+    n_jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    candidates = load_candidates()
+    if not candidates:
+        print("No candidate to backtest.")
+        sys.exit(0)
+    # all the candidates share the same qlib_init
+    qlib.init(**candidates[0][1].get("qlib_init", {}))
+
+    if n_jobs <= 1:
+        for candidate, config in candidates:
+            run_candidate(candidate, config)
+    else:
+        # the datasets are loaded before forking, so the workers share them instead of loading them again
+        for candidate, config in candidates:
+            try:
+                get_dataset(candidate["id"], config)
+            except Exception:
+                pass  # the failure is reported by the candidate itself
+        with multiprocessing.get_context("fork").Pool(n_jobs) as pool:
+            pool.map(_run_candidate_star, candidates, chunksize=1)
@@ -0,0 +1,32 @@
+"""
+Build the Alpha158 features and the label once for each version of the qlib data.
+
+`conf_combined.yaml` loads the cached frame statically, so the backtests of the factors don't compute the baseline
+features again. The cache is rebuilt when `ALPHA158_CACHE_KEY` (the version of the data and this script) changes.
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+import qlib
+from qlib.contrib.data.loader import Alpha158DL
+
+CACHE_PATH = Path("~/.qlib/rdagent_cache/alpha158_label_df.pkl").expanduser()
+KEY_PATH = CACHE_PATH.with_suffix(".key")
+
+if __name__ == "__main__":
+    key = os.environ.get("ALPHA158_CACHE_KEY", "")
+    if CACHE_PATH.exists() and KEY_PATH.exists() and KEY_PATH.read_text() == key:
+        print(f"Alpha158 cache {CACHE_PATH} is up to date.")
+    else:
+        qlib.init(provider_uri="~/.qlib/qlib_data/cn_data", region="cn")
+        # the same features and label as the `Alpha158DL` in `conf.yaml`
+        data_loader = Alpha158DL(config={"label": (["Ref($close, -2)/Ref($close, -1) - 1"], ["LABEL0"])})
+        df = data_loader.load(instruments="csi300", start_time="2008-01-01", end_time="2022-08-01")
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = CACHE_PATH.with_name(f".{uuid.uuid4().hex}.tmp")
+        df.to_pickle(tmp_path)
+        tmp_path.replace(CACHE_PATH)
+        KEY_PATH.write_text(key)
+        print(f"Alpha158 cache {CACHE_PATH} is built with shape {df.shape}.")
@@ -1,11 +1,21 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 
+from rdagent.core.exception import RunnerError
 from rdagent.core.experiment import FBWorkspace
 from rdagent.log import rdagent_logger as logger
-from rdagent.utils.env import QTDockerEnv
+from rdagent.utils import md5_hash
+from rdagent.utils.env import QlibDockerConf, QTDockerEnv
+from rdagent.utils.fmt import shrink_text
+
+ALPHA158_CACHE_SCRIPT = "prepare_alpha158.py"
 
 
 class QlibFBWorkspace(FBWorkspace):
@@ -13,6 +23,41 @@ class QlibFBWorkspace(FBWorkspace):
         super().__init__(*args, **kwargs)
         self.inject_code_from_folder(template_folder_path)
 
+    def prepare_alpha158_cache(self) -> None:
+        """
+        Build the Alpha158 features and the label loaded by `conf_combined.yaml` unless they are cached for the
+        current qlib data. The cache is under the qlib data folder, so it is shared by all the workspaces and runs.
+        """
+        # the cache is checked by ourselves, so the env cache must not replay a former run
+        qtde = QTDockerEnv(conf=QlibDockerConf(enable_cache=False))
+        qlib_path = Path(next(iter(qtde.conf.extra_volumes.keys())))
+        cache_folder = qlib_path / "rdagent_cache"
+        data_stats = []
+        for fp in ["qlib_data/cn_data/calendars/day.txt", "qlib_data/cn_data/instruments/csi300.txt"]:
+            st = (qlib_path / fp).stat() if (qlib_path / fp).exists() else None
+            data_stats.append([fp, st.st_size, st.st_mtime_ns] if st else None)
+        key = md5_hash(json.dumps([data_stats, self.file_dict[ALPHA158_CACHE_SCRIPT]]))
+        cache_path, key_path = cache_folder / "alpha158_label_df.pkl", cache_folder / "alpha158_label_df.key"
+
+        def is_cached() -> bool:
+            return cache_path.exists() and key_path.exists() and key_path.read_text() == key
+
+        if is_cached():
+            return
+
+        qtde.prepare()
+        cache_folder.mkdir(parents=True, exist_ok=True)
+        stdout = qtde.run(
+            local_path=str(self.workspace_path),
+            entry=f"python {ALPHA158_CACHE_SCRIPT}",
+            env={"ALPHA158_CACHE_KEY": key},
+            # the qlib data folder is read-only in the container except the cache folder
+            running_extra_volume={str(cache_folder): {"bind": "/root/.qlib/rdagent_cache/", "mode": "rw"}},
+        )
+        if not is_cached():
+            # `conf_combined.yaml` can't be backtested without the cache
+            raise RunnerError(f"Failed to build the Alpha158 cache {cache_path}:\n{shrink_text(stdout)}")
+
     def execute(self, qlib_config_name: str = "conf.yaml", run_env: dict = {}, *args, **kwargs) -> str:
         qtde = QTDockerEnv()
         qtde.prepare()
@@ -40,3 +85,54 @@ class QlibFBWorkspace(FBWorkspace):
             return None
 
         return pd.read_csv(csv_path, index_col=0).iloc[:, 0]
+
+
+BATCH_TEMPLATE_FOLDER = Path(__file__).parent / "batch_template"
+
+
+def execute_batch(
+    workspaces: list[QlibFBWorkspace],
+    qlib_config_names: list[str],
+    run_envs: list[dict],
+    n_jobs: int = 1,
+) -> list[pd.Series | None]:
+    """
+    Backtest the candidate workspaces in one qlib process by `batch_backtest.py` instead of one `qrun` and one
+    `read_exp_res.py` per workspace. The candidates are keyed by the names of their workspaces. The results are
+    copied back to each workspace (`qlib_res.csv` and `ret.pkl`) like `QlibFBWorkspace.execute` does.
+    """
+    if not workspaces:
+        return []
+    batch_ws = QlibFBWorkspace(template_folder_path=BATCH_TEMPLATE_FOLDER)
+    candidates = []
+    for ws, config_name, env in zip(workspaces, qlib_config_names, run_envs):
+        candidate_id = ws.workspace_path.name
+        ws.sync_files()
+        # the files not tracked by `file_dict` (e.g. `combined_factors_df.pkl`) are needed too
+        for fp in ws.workspace_path.rglob("*"):
+            if fp.is_file() and "mlruns" not in fp.relative_to(ws.workspace_path).parts:
+                target = batch_ws.workspace_path / "candidates" / candidate_id / fp.relative_to(ws.workspace_path)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(fp, target)
+                except OSError:
+                    shutil.copy2(fp, target)
+        candidates.append({"id": candidate_id, "config": config_name, "env": env})
+    (batch_ws.workspace_path / "candidates.json").write_text(json.dumps(candidates, indent=2))
+
+    qtde = QTDockerEnv()
+    qtde.prepare()
+    qtde.run(local_path=str(batch_ws.workspace_path), entry=f"python batch_backtest.py {n_jobs}")
+
+    results = []
+    for ws in workspaces:
+        result_path = batch_ws.workspace_path / "results" / ws.workspace_path.name
+        if not (result_path / "qlib_res.csv").exists():
+            logger.error(f"Batch backtest of {ws.workspace_path} failed.")
+            results.append(None)
+            continue
+        shutil.copy2(result_path / "qlib_res.csv", ws.workspace_path / "qlib_res.csv")
+        shutil.copy2(result_path / "ret.pkl", ws.workspace_path / "ret.pkl")
+        logger.log_object(pd.read_pickle(ws.workspace_path / "ret.pkl"), tag="Quantitative Backtesting Chart")
+        results.append(pd.read_csv(ws.workspace_path / "qlib_res.csv", index_col=0).iloc[:, 0])
+    return results
@@ -246,6 +246,7 @@ def extract_factors_from_report_dict(
             for file_name in file_name_list
         ],
         n=RD_AGENT_SETTINGS.multi_proc_n,
+        kind="thread",
     )
     for index, file_name in enumerate(file_name_list):
         final_report_factor_dict[file_name] = factor_dict_list[index]
@@ -301,6 +302,7 @@ def check_factor_relevance(
                 for i in range(0, factor_df.shape[0], 50)
             ],
             n=RD_AGENT_SETTINGS.multi_proc_n,
+            kind="thread",
         )
 
         for result in result_list:
@@ -344,6 +346,7 @@ def check_factor_viability(
                 for i in range(0, factor_df.shape[0], 50)
             ],
             n=RD_AGENT_SETTINGS.multi_proc_n,
+            kind="thread",
         )
 
         for result in result_list:
@@ -506,6 +509,7 @@ Factor variables: {variables}
             for factor_name_group in factor_name_groups
         ],
         n=RD_AGENT_SETTINGS.multi_proc_n,
+        kind="thread",
     )
 
     duplication_names_list = []
@@ -8,16 +8,13 @@ it is not binding to the scenarios or framework (So it is not placed in rdagent.
 
 import hashlib
 import importlib
-import json
+import os
 import re
 import sys
 from pathlib import Path
 from types import ModuleType
 from typing import Union
 
-from rdagent.oai.llm_conf import LLM_SETTINGS
-from rdagent.utils.agent.tpl import T
-
 
 def get_module_by_module_path(module_path: Union[str, ModuleType]) -> ModuleType:
     """Load module from path like a/b/c/d.py or a.b.c.d
@@ -76,72 +73,37 @@ def remove_ansi_codes(s: str) -> str:
 
 def filter_progress_bar(stdout: str) -> str:
     """
-    Filter out progress bars from stdout using regex.
-    """
-    from rdagent.oai.llm_utils import APIBackend  # avoid circular import
-
-    # Initial progress bar regex pattern
-    progress_bar_re = (
-        r"(\d+/\d+\s+[━]+\s+\d+s?\s+\d+ms/step.*?\u0008+|"
-        r"\d+/\d+\s+[━]+\s+\d+s?\s+\d+ms/step|"
-        r"\d+/\d+\s+[━]+\s+\d+s?\s+\d+ms/step.*|"
-        r"\d+/\d+\s+[━]+.*?\u0008+|"
-        r"\d+/\d+\s+[━]+.*|[ ]*\u0008+|"
-        r"\d+%\|[█▏▎▍▌▋▊▉]+\s+\|\s+\d+/\d+\s+\[\d{2}:\d{2}<\d{2}:\d{2},\s+\d+\.\d+it/s\]|"
-        r"\d+%\|[█]+\|\s+\d+/\d+\s+\[\d{2}:\d{2}<\d{2}:\d{2},\s*\d+\.\d+it/s\])"
-    )
-
-    filtered_stdout = remove_ansi_codes(stdout)
-    filtered_stdout = re.sub(progress_bar_re, "", filtered_stdout)
-    filtered_stdout = re.sub(r"\s*\n\s*", "\n", filtered_stdout)
-
-    needs_sub = True
-    # Attempt further filtering up to 5 times
-    for _ in range(5):
-        filtered_stdout_shortened = filtered_stdout
-        system_prompt = T(".prompts:filter_progress_bar.system").r()
-
-        for __ in range(10):
-            user_prompt = T(".prompts:filter_progress_bar.user").r(
-                stdout=filtered_stdout_shortened,
-            )
-            stdout_token_size = APIBackend().build_messages_and_calculate_token(
-                user_prompt=user_prompt,
-                system_prompt=system_prompt,
-            )
-            if stdout_token_size < LLM_SETTINGS.chat_token_limit * 0.1:
-                return filtered_stdout_shortened
-            elif stdout_token_size > LLM_SETTINGS.chat_token_limit * 0.6:
-                filtered_stdout_shortened = filtered_stdout_shortened[
-                    len(filtered_stdout_shortened) // 4 : len(filtered_stdout_shortened) * 3 // 4
-                ]
-            else:
-                break
-
-        response = json.loads(
-            APIBackend().build_messages_and_create_chat_completion(
-                user_prompt=user_prompt,
-                system_prompt=system_prompt,
-                json_mode=True,
-                json_target_type=dict,
-            )
-        )
-        needs_sub = response.get("needs_sub", True)
-        regex_patterns = response.get("regex_patterns", [])
-        try:
-            if isinstance(regex_patterns, list):
-                for pattern in regex_patterns:
-                    filtered_stdout = re.sub(pattern, "", filtered_stdout)
-            else:
-                filtered_stdout = re.sub(regex_patterns, "", filtered_stdout)
+    Filter out progress bars from stdout.
 
-            if not needs_sub:
-                break
-            filtered_stdout = re.sub(r"\s*\n\s*", "\n", filtered_stdout)
-        except re.error as e:  # sometime the generated regex pattern is invalid  and yield exception.
-            from rdagent.log import rdagent_logger as logger
-
-            logger.error(f"Error in filtering progress bar: due to {e}")
+    The known progress bars are filtered by rules. The LLM is only asked for the regex patterns when the stdout is
+    still too long and its format is unseen; the learned patterns are cached and reused for the same format.
+    """
+    from rdagent.utils import progress_bar as pb  # avoid circular import
+
+    pb.FILTER_STATS["executions"] += 1
+    filtered_stdout = pb.filter_known_progress_bars(stdout)
+    if pb.within_limit(filtered_stdout):
+        pb.FILTER_STATS["rule_only"] += 1
+        return filtered_stdout
+
+    # the stdout without repeated lines has no recognizable format, so its patterns are not cached
+    signature = pb.stdout_signature(filtered_stdout)
+    cache = pb.get_learned_pattern_cache()
+    patterns = None if signature is None else cache.get(signature)
+    if patterns is None:
+        patterns = pb.learn_patterns(filtered_stdout)
+        if signature is not None:
+            cache.set(signature, patterns)
+    else:
+        pb.FILTER_STATS["learned_hits"] += 1
+    try:
+        filtered_stdout = pb.apply_patterns(filtered_stdout, patterns)
+    except re.error as e:  # the cache file may be edited by hand
+        from rdagent.log import rdagent_logger as logger
+
+        logger.error(f"Error in filtering progress bar: due to {e}")
+    if not pb.within_limit(filtered_stdout):
+        filtered_stdout = pb.collapse_repeated_lines(filtered_stdout)
     return filtered_stdout
 
 
@@ -159,3 +121,23 @@ def md5_hash(input_string: str) -> str:
     input_bytes = input_string.encode("utf-8")
     hash_md5.update(input_bytes)
     return hash_md5.hexdigest()
+
+
+def blake2_hash(input_string: str) -> str:
+    """
+    A faster hash than md5 for the cache keys which are computed frequently.
+    """
+    return hashlib.blake2b(input_string.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def data_folder_fingerprint(folder_path) -> str:
+    """
+    The fingerprint of a folder built from the path, size and modification time of all the files in it.
+    """
+    items = [str(Path(folder_path).absolute())]
+    for root, dirs, files in os.walk(folder_path):
+        dirs.sort()
+        for file in sorted(files):
+            st = os.stat(os.path.join(root, file))
+            items.append(f"{os.path.relpath(os.path.join(root, file), folder_path)}:{st.st_size}:{st.st_mtime_ns}")
+    return md5_hash("\n".join(items))
@@ -7,6 +7,7 @@ Tries to create uniform environment for the agent to run;
 
 # TODO: move the scenario specific docker env into other folders.
 
+import codecs
 import json
 import os
 import pickle
@@ -17,9 +18,10 @@ import time
 import uuid
 import zipfile
 from abc import abstractmethod
+from collections import deque
 from pathlib import Path
 from types import MappingProxyType
-from typing import Any, Generic, Mapping, Optional, TypeVar
+from typing import IO, Any, Generic, Mapping, Optional, TypeVar
 
 import docker  # type: ignore[import-untyped]
 import docker.models  # type: ignore[import-untyped]
@@ -43,15 +45,150 @@ from rdagent.utils.workflow import wait_retry
 class EnvConf(ExtendedBaseSettings):
     default_entry: str
     extra_volumes: dict = {}
+    """
+    {<local path>: <path in the env>}. The value can also be {"bind": <path in the env>, "mode": "rw"} to
+    override the default mode of the volume.
+    """
     running_timeout_period: int = 600  # 10 minutes
     # helper settings to support transparent;
     enable_cache: bool = True
     retry_count: int = 5  # retry count for the docker run
     retry_wait_seconds: int = 10  # retry wait seconds for the docker run
+    # the head and the tail of the logs kept in memory; the full logs are spilled into `run_log_path(local_path)`
+    # when they are longer.
+    log_head_chars: int = 1_000_000
+    log_tail_chars: int = 1_000_000
+    log_echo_interval: float = 1.0  # seconds between two echos of the logs to the console
+    log_echo_max_lines: int = 200  # the max lines of each echo, the earlier lines are skipped
 
 
 ASpecificEnvConf = TypeVar("ASpecificEnvConf", bound=EnvConf)
 
+DATETIME_RE = re.compile(r"\b\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?\b")
+
+
+def run_log_path(local_path: str | Path) -> Path:
+    """
+    The file of the full logs of the runs in `local_path`.
+    It is kept out of the folder, so it is neither mounted into the env nor zipped into the cache of the runs.
+    """
+    folder_hash = md5_hash(str(Path(local_path).resolve()))
+    return Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / "utils.env.run_logs" / f"{folder_hash}.log"
+
+
+class LogCapture:
+    """
+    Capture the logs of a running process in bounded memory and linear time.
+
+    - Only the head and the tail of the logs are kept in memory. Once the logs overflow, the full logs are
+      spilled into `spill_path` and the middle is omitted from the captured output.
+    - The logs are processed in batches of complete lines, e.g. the timestamps are replaced by one compiled regex
+      for each batch.
+    - The echo to the console is rate limited.
+    """
+
+    # a line without line break (e.g. a progress bar redrawn by `\r`) is processed once it is too long
+    max_pending_chars = 1 << 16
+
+    def __init__(
+        self,
+        conf: EnvConf,
+        spill_path: Path | None = None,
+        remove_timestamp: bool = False,
+        strip_lines: bool = False,
+    ) -> None:
+        self.conf = conf
+        self.spill_path = spill_path
+        self.remove_timestamp = remove_timestamp
+        self.strip_lines = strip_lines
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+        self._head: list[str] = []
+        self._head_size = 0
+        self._tail: deque[str] = deque()
+        self._tail_size = 0
+        self._omitted_chars = 0
+        self._spill: IO[str] | None = None
+        self._console = Console()
+        self._echo_lines: deque[str] = deque(maxlen=conf.log_echo_max_lines)
+        self._echo_skipped = 0
+        self._last_echo = time.monotonic()
+
+    def feed(self, data: bytes | str) -> None:
+        text = self._pending + (self._decoder.decode(data) if isinstance(data, bytes) else data)
+        end = text.rfind("\n") + 1
+        if end == 0 and len(text) > self.max_pending_chars:
+            end = len(text)
+        self._pending = text[end:]
+        if end > 0:
+            self._add(text[:end])
+        if time.monotonic() - self._last_echo >= self.conf.log_echo_interval:
+            self._flush_echo()
+
+    def _add(self, text: str) -> None:
+        if self.strip_lines:
+            text = "\n".join(line.strip() for line in text.split("\n"))
+        if self.remove_timestamp:
+            text = DATETIME_RE.sub("[DATETIME]", text)
+
+        lines = text.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        self._echo_skipped += max(0, len(self._echo_lines) + len(lines) - self.conf.log_echo_max_lines)
+        self._echo_lines.extend(lines)
+
+        if self._spill is not None:
+            self._spill.write(text)
+        room = self.conf.log_head_chars - self._head_size
+        if room > 0:
+            self._head.append(text[:room])
+            self._head_size += len(self._head[-1])
+            text = text[room:]
+        if text:
+            self._tail.append(text)
+            self._tail_size += len(text)
+        if self._tail_size > self.conf.log_tail_chars:
+            if self.spill_path is not None and self._spill is None:
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                self._spill = self.spill_path.open("w")
+                self._spill.write("".join(self._head))
+                self._spill.write("".join(self._tail))
+            while self._tail_size > self.conf.log_tail_chars:
+                excess = self._tail_size - self.conf.log_tail_chars
+                if len(self._tail[0]) <= excess:
+                    dropped = len(self._tail.popleft())
+                else:
+                    self._tail[0] = self._tail[0][excess:]
+                    dropped = excess
+                self._tail_size -= dropped
+                self._omitted_chars += dropped
+
+    def _flush_echo(self) -> None:
+        if self._echo_skipped > 0:
+            self._console.print(f"... ({self._echo_skipped} lines are not echoed) ...", markup=False)
+        if self._echo_lines:
+            self._console.print("\n".join(self._echo_lines), markup=False)
+        self._echo_lines.clear()
+        self._echo_skipped = 0
+        self._last_echo = time.monotonic()
+
+    def close(self) -> None:
+        text = self._pending + self._decoder.decode(b"", final=True)
+        self._pending = ""
+        if text:
+            self._add(text + "\n")
+        self._flush_echo()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    def getvalue(self) -> str:
+        head, tail = "".join(self._head), "".join(self._tail)
+        if self._omitted_chars == 0:
+            return head + tail
+        saved = f", the full logs are saved in {self.spill_path}" if self.spill_path is not None else ""
+        return f"{head}\n... ({self._omitted_chars} characters are omitted{saved}) ...\n{tail}"
+
 
 class Env(Generic[ASpecificEnvConf]):
     """
@@ -175,6 +312,7 @@ class Env(Generic[ASpecificEnvConf]):
             A tuple containing the stdout and the exit code
         """
         running_extra_volume = kwargs.get("running_extra_volume", {})
+        code_hashes = kwargs.get("code_hashes", None)
         if entry is None:
             entry = self.conf.default_entry
 
@@ -186,7 +324,9 @@ class Env(Generic[ASpecificEnvConf]):
         )
 
         if self.conf.enable_cache:
-            stdout, return_code = self.cached_run(entry_add_timeout, local_path, env, running_extra_volume)
+            stdout, return_code = self.cached_run(
+                entry_add_timeout, local_path, env, running_extra_volume, code_hashes=code_hashes
+            )
         else:
             stdout, return_code = self.__run_ret_code_with_retry(
                 entry_add_timeout, local_path, env, running_extra_volume, remove_timestamp=False
@@ -201,33 +341,36 @@ class Env(Generic[ASpecificEnvConf]):
         env: dict | None = None,
         running_extra_volume: Mapping = MappingProxyType({}),
         remove_timestamp: bool = True,
+        code_hashes: Mapping[str, str] | None = None,
     ) -> tuple[str, int]:
         """
         Run the folder under the environment.
         Will cache the output and the folder diff for next round of running.
         Use the python codes and the parameters(entry, running_extra_volume) as key to hash the input.
+
+        `code_hashes` maps the relative paths of the files to the md5 of their contents when they are known
+        (e.g. the files of a workspace just synced to disk), so these files are not read again.
         """
         target_folder = Path(RD_AGENT_SETTINGS.pickle_cache_folder_path_str) / f"utils.env.run"
         target_folder.mkdir(parents=True, exist_ok=True)
+        code_hashes = {} if code_hashes is None else code_hashes
 
         # we must add the information of data (beyound code) into the key.
         # Otherwise, all commands operating on data will become invalue (e.g. rm -r submission.csv)
         # So we recursively walk in the folder and add the sorted relative filename list as part of the key.
         data_key = []
-        for path in Path(local_path).rglob("*"):
+        code_key = []
+        for path in sorted(Path(local_path).rglob("*")):
             p = str(path.relative_to(Path(local_path)))
+            if path.suffix == ".py":
+                code_key.append([p, code_hashes.get(p) or md5_hash(path.read_text())])
             if p.startswith("__pycache__"):
                 continue
             data_key.append(p)
         data_key = sorted(data_key)
 
         key = md5_hash(
-            json.dumps(
-                [
-                    [str(path.relative_to(Path(local_path))), path.read_text()]
-                    for path in sorted(Path(local_path).rglob("*.py"))
-                ]
-            )
+            json.dumps(code_key)
             + json.dumps({"entry": entry, "running_extra_volume": dict(running_extra_volume)})
             + json.dumps({"extra_volumes": self.conf.extra_volumes})
             + json.dumps(data_key)
@@ -310,9 +453,9 @@ class LocalEnv(Env[ASpecificLocalConf]):
         volumes = {}
         if self.conf.extra_volumes is not None:
             for lp, rp in self.conf.extra_volumes.items():
-                volumes[lp] = rp
+                volumes[lp] = rp["bind"] if isinstance(rp, dict) else rp
         for lp, rp in running_extra_volume.items():
-            volumes[lp] = rp
+            volumes[lp] = rp["bind"] if isinstance(rp, dict) else rp
 
         for rp, lp in volumes.items():
             link_path = Path(lp)
@@ -346,12 +489,19 @@ class LocalEnv(Env[ASpecificLocalConf]):
         if local_path:
             cwd = Path(local_path).resolve()
 
-        result = subprocess.run(entry, cwd=cwd, env={**os.environ, **env}, capture_output=True, text=True, shell=True)
-        combined_output = result.stderr + result.stdout  # Combine stdout and stderr
-        Console().print(combined_output, markup=False)
+        log_capture = LogCapture(self.conf, spill_path=run_log_path(cwd) if cwd is not None else None)
+        # stderr is merged into stdout, so the logs are captured in the order they are produced
+        with subprocess.Popen(
+            entry, cwd=cwd, env={**os.environ, **env}, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, shell=True
+        ) as process:
+            assert process.stdout is not None
+            while chunk := process.stdout.read1(1 << 16):
+                log_capture.feed(chunk)
+            return_code = process.wait()
+        log_capture.close()
         print(Rule("[bold green]LocalEnv Logs End[/bold green]", style="dark_orange"))
 
-        return combined_output, result.returncode
+        return log_capture.getvalue(), return_code
 
 
 class CondaConf(LocalConf):
@@ -581,9 +731,7 @@ class DockerEnv(Env[DockerConf]):
     def replace_time_info(self, input_string: str) -> str:
         """To remove any time related information from the logs since it will destroy the cache mechanism"""
         """We currently set this function as default, but it can be changed in the future"""
-        datetime_pattern = r"\b\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?\b"
-        output_string = re.sub(datetime_pattern, "[DATETIME]", input_string)
-        return output_string
+        return DATETIME_RE.sub("[DATETIME]", input_string)
 
     def _run_ret_code(
         self,
@@ -607,11 +755,16 @@ class DockerEnv(Env[DockerConf]):
             volumes[local_path] = {"bind": self.conf.mount_path, "mode": "rw"}
         if self.conf.extra_volumes is not None:
             for lp, rp in self.conf.extra_volumes.items():
-                volumes[lp] = {"bind": rp, "mode": self.conf.extra_volume_mode}
+                volumes[lp] = rp if isinstance(rp, dict) else {"bind": rp, "mode": self.conf.extra_volume_mode}
         for lp, rp in running_extra_volume.items():
-            volumes[lp] = {"bind": rp, "mode": self.conf.extra_volume_mode}
+            volumes[lp] = rp if isinstance(rp, dict) else {"bind": rp, "mode": self.conf.extra_volume_mode}
 
-        log_output = ""
+        log_capture = LogCapture(
+            self.conf,
+            spill_path=run_log_path(local_path) if local_path is not None else None,
+            remove_timestamp=remove_timestamp,
+            strip_lines=True,
+        )
 
         try:
             container: docker.models.containers.Container = client.containers.run(  # type: ignore[no-any-unimported]
@@ -640,15 +793,13 @@ class DockerEnv(Env[DockerConf]):
             table.add_row("Volumes", "\n".join(f"{k}:{v}" for k, v in volumes.items()))
             print(table)
             for log in logs:
-                decoded_log = log.strip().decode()
-                decoded_log = self.replace_time_info(decoded_log) if remove_timestamp else decoded_log
-                Console().print(decoded_log, markup=False)
-                log_output += decoded_log + "\n"
+                log_capture.feed(log)
+            log_capture.close()
             exit_status = container.wait()["StatusCode"]
             container.stop()
             container.remove()
             print(Rule("[bold green]Docker Logs End[/bold green]", style="dark_orange"))
-            return log_output, exit_status
+            return log_capture.getvalue(), exit_status
         except docker.errors.ContainerError as e:
             raise RuntimeError(f"Error while running the container: {e}")
         except docker.errors.ImageNotFound:
@@ -0,0 +1,229 @@
+"""
+Filter the progress bars and the noisy training logs out of the stdout of the executions.
+
+The filter is rule based first:
+- a library of the patterns of the well-known progress bars and logs (tqdm, keras, lightgbm, xgboost)
+- the patterns learned from the LLM before. They are persisted and keyed by the signature of the stdout
+  (the shapes of its repeated lines), so the same kind of stdout reuses them across executions and runs.
+
+The LLM is only asked when the stdout is still too long and its format is unseen.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import uuid
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.oai.backend.base import TOKEN_COUNT_CACHE
+from rdagent.oai.llm_conf import LLM_SETTINGS
+from rdagent.utils import md5_hash, remove_ansi_codes
+from rdagent.utils.agent.tpl import T
+
+# The lines matching any of the patterns are dropped.
+PROGRESS_BAR_PATTERNS: dict[str, str] = {
+    # e.g. ` 45%|████▌     | 45/100 [00:00<00:00, 449.56it/s, loss=0.5]` or `100it [00:01, 95.12it/s]`
+    "tqdm": r"\[\d+:\d+(?::\d+)?(?:<[\d:?]+)?,\s*(?:[\d.]+|\?)\s*(?:[a-zA-Z]+/s|s/[a-zA-Z]+)",
+    # e.g. `12/100 ━━━━━━━━━━━━━━━━━━━━ 0s 2ms/step` or `  32/1000 [>......] - ETA: 3s - loss: 0.69`
+    "keras": r"\d+/\d+\s+━+|\d+/\d+\s+\[[=>.]*\]\s+-\s+ETA:",
+    # e.g. `[LightGBM] [Info] Total Bins 1530` or `[LightGBM] [Warning] No further splits with positive gain`
+    "lightgbm": r"^\[LightGBM\] \[(?:Info|Debug)\]|^\[LightGBM\] \[Warning\] No further splits with positive gain",
+    # e.g. `[10:21:32] WARNING: /workspace/src/learner.cc:740:` and `Parameters: { "silent" } are not used.`
+    "xgboost": r"^\[\d{2}:\d{2}:\d{2}\] WARNING: \S+\.cc:\d+:|^\s*Parameters: \{.*\} (?:might not be|are not) used\.",
+}
+_PROGRESS_BAR_RE = re.compile("|".join(f"(?:{p})" for p in PROGRESS_BAR_PATTERNS.values()))
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?(?:e[-+]?\d+)?")
+
+# The statistics of the filtering in current process, e.g. for benchmarking the saved LLM calls.
+FILTER_STATS: Counter[str] = Counter()
+
+
+def _filter_line(line: str) -> str | None:
+    # the progress bars redraw themselves by carriage returns and backspaces, only the last drawing is kept
+    line = remove_ansi_codes(line).rsplit("\r", 1)[-1]
+    line = re.sub(r"[^\x08]*\x08+", "", line) if "\x08" in line else line
+    if not line.strip() or _PROGRESS_BAR_RE.search(line):
+        return None
+    return line.strip()
+
+
+def iter_filtered_lines(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Filter the lines by the pattern library in a streaming way.
+    """
+    for line in lines:
+        filtered_line = _filter_line(line)
+        if filtered_line is not None:
+            yield filtered_line
+
+
+class ProgressBarFilter:
+    """
+    The streaming filter for the stdout produced chunk by chunk. The last incomplete line is held until it is
+    completed or flushed.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        lines = (self._pending + chunk).split("\n")
+        self._pending = lines.pop()
+        return "".join(f"{line}\n" for line in iter_filtered_lines(lines))
+
+    def flush(self) -> str:
+        pending, self._pending = self._pending, ""
+        return "".join(f"{line}\n" for line in iter_filtered_lines([pending]))
+
+
+def filter_known_progress_bars(stdout: str) -> str:
+    return "\n".join(iter_filtered_lines(stdout.split("\n")))
+
+
+def line_shape(line: str) -> str:
+    return _NUMBER_RE.sub("0", line)
+
+
+def stdout_signature(stdout: str, top_k: int = 20) -> str | None:
+    """
+    The signature of the format of the stdout: the shapes (numbers are ignored) of its most repeated lines.
+    The stdouts of the same code share the signature no matter how many epochs are run.
+    None is returned when no line is repeated, so the stdout has no recognizable format.
+    """
+    shapes = Counter(line_shape(line) for line in stdout.split("\n"))
+    repeated = sorted(shape for shape, count in shapes.most_common(top_k) if count >= 3)
+    return md5_hash(json.dumps(repeated)) if repeated else None
+
+
+def collapse_repeated_lines(stdout: str, keep: int = 5) -> str:
+    """
+    Shorten each run of consecutive lines of the same shape to its first and last `keep` lines.
+    """
+    lines = stdout.split("\n")
+    collapsed: list[str] = []
+    start = 0
+    while start < len(lines):
+        end = start + 1
+        shape = line_shape(lines[start])
+        while end < len(lines) and line_shape(lines[end]) == shape:
+            end += 1
+        if end - start > 2 * keep + 1:
+            collapsed.extend(lines[start : start + keep])
+            collapsed.append(f"... ({end - start - 2 * keep} similar lines are omitted) ...")
+            collapsed.extend(lines[end - keep : end])
+        else:
+            collapsed.extend(lines[start:end])
+        start = end
+    return "\n".join(collapsed)
+
+
+def apply_patterns(stdout: str, patterns: list[str]) -> str:
+    for pattern in patterns:
+        stdout = re.sub(pattern, "", stdout)
+    return re.sub(r"\s*\n\s*", "\n", stdout)
+
+
+class LearnedPatternCache:
+    """
+    The regex patterns learned from the LLM, keyed by the signature of the stdout and persisted in a json file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._patterns: dict[str, list[str]] | None = None
+
+    def _load(self) -> dict[str, list[str]]:
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, signature: str) -> list[str] | None:
+        with self._lock:
+            if self._patterns is None:
+                self._patterns = self._load()
+            return self._patterns.get(signature)
+
+    def set(self, signature: str, patterns: list[str]) -> None:
+        with self._lock:
+            # merge the patterns learned by other processes before dumping
+            self._patterns = {**self._load(), **(self._patterns or {}), signature: patterns}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+            tmp_path.write_text(json.dumps(self._patterns, indent=2))
+            tmp_path.replace(self.path)
+
+
+_LEARNED_PATTERN_CACHES: dict[str, LearnedPatternCache] = {}
+
+
+def get_learned_pattern_cache() -> LearnedPatternCache:
+    path = RD_AGENT_SETTINGS.progress_bar_pattern_cache_path
+    if path not in _LEARNED_PATTERN_CACHES:
+        _LEARNED_PATTERN_CACHES[path] = LearnedPatternCache(Path(path))
+    return _LEARNED_PATTERN_CACHES[path]
+
+
+def _token_size(stdout: str) -> int:
+    from rdagent.oai.llm_utils import APIBackend  # avoid circular import
+
+    return APIBackend().build_messages_and_calculate_token(
+        user_prompt=T(".prompts:filter_progress_bar.user").r(stdout=stdout),
+        system_prompt=T(".prompts:filter_progress_bar.system").r(),
+    )
+
+
+def within_limit(stdout: str) -> bool:
+    """Whether the stdout is short enough to be kept without filtering by the LLM."""
+    limit = LLM_SETTINGS.chat_token_limit * 0.1
+    # a token always covers at least one character, so the short stdout needs no counting
+    if len(stdout) < limit:
+        return True
+    # the estimation is trusted when it is far from the limit
+    estimated = TOKEN_COUNT_CACHE.estimate(stdout)
+    if estimated < limit / 2 or estimated > limit * 2:
+        return estimated < limit
+    return _token_size(stdout) < limit
+
+
+def learn_patterns(stdout: str) -> list[str]:
+    """
+    Ask the LLM for the regex patterns to filter the stdout. Only the valid patterns are returned.
+    """
+    from rdagent.log import rdagent_logger as logger
+    from rdagent.oai.llm_utils import APIBackend  # avoid circular import
+
+    learned: list[str] = []
+    system_prompt = T(".prompts:filter_progress_bar.system").r()
+    for _ in range(5):
+        if within_limit(stdout):
+            break
+        stdout_shortened = stdout
+        while TOKEN_COUNT_CACHE.estimate(stdout_shortened) > LLM_SETTINGS.chat_token_limit * 0.6:
+            stdout_shortened = stdout_shortened[len(stdout_shortened) // 4 : len(stdout_shortened) * 3 // 4]
+
+        FILTER_STATS["llm_calls"] += 1
+        response = json.loads(
+            APIBackend().build_messages_and_create_chat_completion(
+                user_prompt=T(".prompts:filter_progress_bar.user").r(stdout=stdout_shortened),
+                system_prompt=system_prompt,
+                json_mode=True,
+                json_target_type=dict,
+            )
+        )
+        regex_patterns = response.get("regex_patterns", [])
+        for pattern in regex_patterns if isinstance(regex_patterns, list) else [regex_patterns]:
+            try:
+                stdout = apply_patterns(stdout, [pattern])
+                learned.append(pattern)
+            except re.error as e:  # sometime the generated regex pattern is invalid and yield exception.
+                logger.error(f"Error in filtering progress bar: due to {e}")
+        if not response.get("needs_sub", True):
+            break
+    return learned
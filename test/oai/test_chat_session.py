@@ -0,0 +1,101 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from rdagent.log import rdagent_logger as logger
+from rdagent.oai.backend.base import ChatSession
+from rdagent.oai.llm_conf import LLM_SETTINGS
+
+
+class FakeAPIBackend:
+    """Count the tokens by characters and echo the number of the messages received."""
+
+    def __init__(self) -> None:
+        self.received: list[list[dict[str, Any]]] = []
+
+    def _calculate_token_from_messages(self, messages: list[dict[str, Any]]) -> int:
+        return sum(len(m["content"]) for m in messages)
+
+    def _try_create_chat_completion_or_embedding(self, messages: list[dict[str, Any]], **kwargs: Any) -> str:
+        self.received.append(messages)
+        return f"answer {len(self.received)}"
+
+    def build_messages_and_create_chat_completion(self, user_prompt: str, system_prompt: str) -> str:
+        return f"summary of {user_prompt.count('user:')} turns"
+
+
+@pytest.mark.offline
+class ChatSessionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings = LLM_SETTINGS.model_dump()
+        LLM_SETTINGS.prompt_cache_path = str(Path(self.tmp_dir.name) / "prompt_cache.db")
+        self.former_log_path = logger.log_trace_path
+        logger.set_trace_path(Path(self.tmp_dir.name) / "log")
+
+    def tearDown(self) -> None:
+        for k, v in self.settings.items():
+            setattr(LLM_SETTINGS, k, v)
+        logger.set_trace_path(self.former_log_path)
+        self.tmp_dir.cleanup()
+
+    def test_append_turns(self):
+        backend = FakeAPIBackend()
+        session = ChatSession(backend, system_prompt="system")
+        for i in range(3):
+            session.build_chat_completion(f"question {i}")
+        self.assertEqual(
+            [m["content"] for m in backend.received[-1]],
+            ["system", "question 0", "answer 1", "question 1", "answer 2", "question 2"],
+        )
+
+        # the history is stored turn by turn and can be resumed
+        with sqlite3.connect(LLM_SETTINGS.prompt_cache_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM message_turn_cache").fetchone()[0], 7)
+        resumed = ChatSession(backend, conversation_id=session.conversation_id)
+        self.assertEqual(resumed.history, session.history)
+        resumed.build_chat_completion("question 3")
+        self.assertEqual(len(ChatSession(backend, conversation_id=session.conversation_id).history), 9)
+
+    def test_former_conversation(self):
+        session = ChatSession(FakeAPIBackend())
+        former = [{"role": "system", "content": "system"}, {"role": "user", "content": "q"}]
+        former.append({"role": "assistant", "content": "a"})
+        session.history_cache.cache.c.execute(
+            "INSERT INTO message_cache (conversation_id, message) VALUES (?, ?)",
+            (session.conversation_id, json.dumps(former)),
+        )
+        self.assertEqual(session.history, former)
+        session.build_chat_completion("question")
+        resumed = ChatSession(FakeAPIBackend(), conversation_id=session.conversation_id)
+        self.assertEqual([m["content"] for m in resumed.history], ["system", "q", "a", "question", "answer 1"])
+
+    def test_compaction(self):
+        LLM_SETTINGS.chat_session_token_budget = 100
+        for policy in ["drop", "summarize"]:
+            LLM_SETTINGS.chat_session_compaction = policy
+            backend = FakeAPIBackend()
+            session = ChatSession(backend, system_prompt="system")
+            for i in range(20):
+                session.build_chat_completion(f"question {i:02d}")
+                sent = backend.received[-1]
+                self.assertLessEqual(
+                    backend._calculate_token_from_messages(sent), 100 + len("summary of 00 turns") + 50
+                )
+                self.assertEqual(sent[-1]["content"], f"question {i:02d}")
+                self.assertTrue(sent[0]["content"].startswith("system"))
+            # the compacted prefix is kept for several turns so the prompt caching of the provider can hit
+            prefixes = [json.dumps(sent[:2]) for sent in backend.received]
+            self.assertLess(len(set(prefixes)), len(prefixes) // 2)
+            # the full history is still stored
+            self.assertEqual(len(session.history), 41)
+        self.assertIn("Summary of the earlier conversation", backend.received[-1][0]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
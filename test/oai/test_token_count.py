@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import pytest
+from litellm import token_counter
+
+from rdagent.log import rdagent_logger as logger
+from rdagent.oai.backend import base as backend_base
+from rdagent.oai.backend import litellm as litellm_backend
+from rdagent.oai.backend.base import TokenCountCache
+from rdagent.oai.backend.litellm import LITELLM_SETTINGS, LiteLLMAPIBackend
+
+
+@pytest.mark.offline
+class TokenCountTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.former_log_path = logger.log_trace_path
+        logger.set_trace_path(self.tmp_dir.name)
+        # a fresh cache which is not calibrated by other tests
+        cache = TokenCountCache(max_size=100)
+        self.patchers = [
+            mock.patch.object(litellm_backend, "TOKEN_COUNT_CACHE", cache),
+            mock.patch.object(backend_base, "TOKEN_COUNT_CACHE", cache),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.backend = LiteLLMAPIBackend()
+        self.system_prompt = "You are a helpful assistant. " * 200
+        self.user_prompt = "Summarize the following training logs.\n" + "epoch 1: loss 0.5, accuracy 0.8\n" * 500
+
+    def tearDown(self) -> None:
+        for patcher in self.patchers:
+            patcher.stop()
+        logger.set_trace_path(self.former_log_path)
+        self.tmp_dir.cleanup()
+
+    def test_count(self):
+        messages = self.backend._build_messages(self.user_prompt, self.system_prompt)
+        exact = token_counter(model=LITELLM_SETTINGS.chat_model, messages=messages)
+        self.assertEqual(
+            self.backend.build_messages_and_calculate_token(self.user_prompt, self.system_prompt),
+            exact,
+        )
+
+        # only the changed contents are counted again
+        with mock.patch.object(litellm_backend, "token_counter", wraps=token_counter) as counter:
+            self.backend.build_messages_and_calculate_token(self.user_prompt[:1000], self.system_prompt)
+            self.assertEqual([c.kwargs["text"] for c in counter.call_args_list], [self.user_prompt[:1000]])
+
+        # the estimation is calibrated by the exact counts
+        estimated = self.backend.build_messages_and_estimate_token(self.user_prompt, self.system_prompt)
+        self.assertLess(abs(estimated - exact) / exact, 0.3)
+
+    def test_lru(self):
+        cache = TokenCountCache(max_size=2)
+        for text in ["a", "b", "a", "c"]:
+            cache.count("model", text, len)
+        counter = mock.Mock(side_effect=len)
+        cache.count("model", "a", counter)
+        self.assertEqual(counter.call_count, 0)
+        cache.count("model", "b", counter)  # "b" is the least recently used one and evicted
+        self.assertEqual(counter.call_count, 1)
+
+    def test_shrinking_prompts(self):
+        texts = [self.user_prompt]
+        while len(texts[-1]) > 100:
+            texts.append(texts[-1][len(texts[-1]) // 4 : len(texts[-1]) * 3 // 4])
+        counts = [self.backend.build_messages_and_calculate_token(text, self.system_prompt) for text in texts]
+        self.assertEqual(
+            counts,
+            [
+                token_counter(
+                    model=LITELLM_SETTINGS.chat_model, messages=self.backend._build_messages(text, self.system_prompt)
+                )
+                for text in texts
+            ],
+        )
+
+        # the same prompts counted again, e.g. the same stdout shrunk in every round, are served by the cache
+        with mock.patch.object(litellm_backend, "token_counter", wraps=token_counter) as counter:
+            again = [self.backend.build_messages_and_calculate_token(text, self.system_prompt) for text in texts]
+        self.assertEqual(again, counts)
+        self.assertEqual(counter.call_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
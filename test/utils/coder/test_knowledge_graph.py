@@ -0,0 +1,104 @@
+import pickle
+import random
+import time
+import unittest
+from itertools import combinations
+from unittest import mock
+
+import pytest
+
+from rdagent.components.coder.CoSTEER.knowledge_management import (
+    CoSTEERKnowledgeBaseV2,
+)
+from rdagent.components.knowledge_management.graph import (
+    UndirectedGraph,
+    UndirectedNode,
+)
+
+
+def build_error_graph(error_count: int, trace_count: int, seed: int = 0) -> tuple[UndirectedGraph, list]:
+    """Build a graph like the CoSTEER error knowledge: each task trace node links to a few error nodes"""
+    rng = random.Random(seed)
+    graph = UndirectedGraph()
+    error_nodes = [UndirectedNode(content=f"error {i}", label="error") for i in range(error_count)]
+    trace_nodes = [UndirectedNode(content=f"trace {i}", label="task_trace") for i in range(trace_count)]
+    for node in error_nodes + trace_nodes:
+        graph.nodes[node.id] = node  # avoid creating embedding in `add_node`
+    for trace_node in trace_nodes:
+        for error_node in rng.sample(error_nodes, rng.randint(1, min(error_count, 6))):
+            trace_node.add_neighbor(error_node)
+    return graph, error_nodes
+
+
+def query_by_combinations(graph: UndirectedGraph, nodes: list, constraint_labels: list) -> list:
+    """The former implementation which enumerates all the combinations"""
+    res = []
+    for k in range(len(nodes), 1, -1):
+        for combination in combinations(nodes, k):
+            for node in graph.get_nodes_intersection(list(combination), steps=1, constraint_labels=constraint_labels):
+                if node not in [n for _, n in res]:
+                    res.append((list(combination), node))
+    return res
+
+
+class FakeAPIBackend:
+    """Embed each text by the counts of its characters"""
+
+    def create_embedding(self, input_content):
+        texts = [input_content] if isinstance(input_content, str) else input_content
+        embeddings = [[text.count(c) + 1.0 for c in "abcdefghij_0123456789"] for text in texts]
+        return embeddings[0] if isinstance(input_content, str) else embeddings
+
+
+@pytest.mark.offline
+class KnowledgeGraphTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.kb = CoSTEERKnowledgeBaseV2()
+
+    def test_query_by_intersection(self):
+        for error_count in [2, 3, 5, 8]:
+            self.kb.graph, error_nodes = build_error_graph(error_count, 50, seed=error_count)
+            expected = query_by_combinations(self.kb.graph, error_nodes, ["task_trace"])
+            self.assertEqual(
+                self.kb.graph_query_by_intersection(error_nodes, constraint_labels=["task_trace"]),
+                [node for _, node in expected],
+            )
+            self.assertEqual(
+                self.kb.graph_query_by_intersection(
+                    error_nodes, constraint_labels=["task_trace"], output_intersection_origin=True
+                ),
+                [list(pair) for pair in expected],
+            )
+
+    def test_query_by_intersection_speed(self):
+        # the former implementation enumerates the 2^n combinations, so it is far slower for many error nodes
+        self.kb.graph, error_nodes = build_error_graph(10, 200, seed=10)
+        start = time.perf_counter()
+        self.kb.graph_query_by_intersection(
+            error_nodes, constraint_labels=["task_trace"], output_intersection_origin=True
+        )
+        query_time = time.perf_counter() - start
+        start = time.perf_counter()
+        query_by_combinations(self.kb.graph, error_nodes, ["task_trace"])
+        self.assertLess(query_time, time.perf_counter() - start)
+
+    @mock.patch("rdagent.components.coder.CoSTEER.knowledge_management.APIBackend", FakeAPIBackend)
+    def test_success_task_similarity_after_pickle(self):
+        self.kb.success_task_to_knowledge_dict = {f"task_{i}": None for i in range(3)}
+        expected = self.kb.calculate_success_task_similarity("task_1")
+
+        # the knowledge base resumed from the pickle of a former version has no cached embeddings
+        del self.kb.success_task_embeddings
+        kb = pickle.loads(pickle.dumps(self.kb))
+        self.assertIsNone(kb.success_task_embeddings)
+        self.assertEqual(kb.calculate_success_task_similarity("task_1"), expected)
+
+        # the cached embeddings are kept by the pickle and extended by the new success tasks
+        kb = pickle.loads(pickle.dumps(kb))
+        kb.success_task_to_knowledge_dict["task_3"] = None
+        self.assertEqual(kb.calculate_success_task_similarity("task_1")[:3], expected)
+        self.assertEqual(kb.success_task_embeddings.shape[0], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
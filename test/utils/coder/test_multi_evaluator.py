@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.components.coder.CoSTEER.evaluators import (
+    CoSTEEREvaluator,
+    CoSTEERMultiEvaluator,
+    CoSTEERSingleFeedback,
+)
+from rdagent.components.coder.CoSTEER.evolvable_subjects import EvolvingItem
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.experiment import FBWorkspace, Task
+from rdagent.log import rdagent_logger as logger
+
+
+class _CountingEvaluator(CoSTEEREvaluator):
+    def __init__(self) -> None:
+        super().__init__(scen=None)
+        self.evaluated = []
+
+    def evaluate(self, target_task, implementation, gt_implementation, queried_knowledge=None, **kwargs):
+        self.evaluated.append(target_task.name)
+        return CoSTEERSingleFeedback(execution="ok", return_checking=None, code="ok", final_decision=True)
+
+
+def _evolving_item(names: list[str]) -> EvolvingItem:
+    evo = EvolvingItem(sub_tasks=[Task(name) for name in names])
+    evo.sub_workspace_list = [FBWorkspace() for _ in names]
+    for name, ws in zip(names, evo.sub_workspace_list):
+        ws.inject_files(**{"main.py": f"print('{name}')\n"})
+    return evo
+
+
+@pytest.mark.offline
+class MultiEvaluatorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.former_workspace_path = RD_AGENT_SETTINGS.workspace_path
+        RD_AGENT_SETTINGS.workspace_path = Path(self.tmp_dir.name) / "workspace"
+        self.former_log_path = logger.log_trace_path
+        logger.set_trace_path(Path(self.tmp_dir.name) / "log")
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.workspace_path = self.former_workspace_path
+        logger.set_trace_path(self.former_log_path)
+        self.tmp_dir.cleanup()
+
+    def test_reuse_in_evolve_call(self):
+        single_evaluator = _CountingEvaluator()
+        evaluator = CoSTEERMultiEvaluator(single_evaluator, scen=None)
+        evo = _evolving_item(["a", "b"])
+        self.assertTrue(evaluator.evaluate(evo))
+
+        # only the changed workspace is evaluated again in the same evolve call
+        evo.sub_workspace_list[1].inject_files(**{"main.py": "print('changed')\n"})
+        self.assertTrue(evaluator.evaluate(evo))
+        self.assertEqual(single_evaluator.evaluated, ["a", "b", "b"])
+
+        # the feedbacks are not reused by another evolve call, even for the same tasks and code
+        evaluator.evaluate(_evolving_item(["a", "b"]))
+        self.assertEqual(single_evaluator.evaluated, ["a", "b", "b", "a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rdagent.components.coder.data_science import conf
+from rdagent.components.coder.data_science.conf import (
+    evict_stage_cache,
+    prepare_stage_cache,
+)
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.experiment import FBWorkspace
+from rdagent.utils.env import LocalConf, LocalEnv
+
+LOAD_DATA_CODE = """
+import numpy as np
+import pandas as pd
+
+
+def load_data():
+    with open({calls_path!r}, "a") as f:
+        f.write("load_data\\n")
+    X = pd.DataFrame({{"a": np.arange(10), "b": list("abcdefghij")}})
+    return X, np.arange(10) % 2, X.iloc[:3], np.arange(3)
+"""
+
+TEST_CODE = """
+from stage_cache import cached_load_data
+
+X, y, X_test, test_ids = cached_load_data()
+print(f"X.shape: {X.shape}, y sum: {y.sum()}")
+"""
+
+
+@pytest.mark.offline
+class StageCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.former_workspace_path = RD_AGENT_SETTINGS.workspace_path
+        RD_AGENT_SETTINGS.workspace_path = self.root / "workspace"
+        self.cache_path = self.root / "stage_cache"
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.workspace_path = self.former_workspace_path
+        self.tmp_dir.cleanup()
+
+    def _evaluate(self, calls_path: Path) -> str:
+        env = LocalEnv(conf=LocalConf(default_entry="", enable_cache=False))
+        implementation = FBWorkspace()
+        implementation.inject_files(
+            **{"load_data.py": LOAD_DATA_CODE.format(calls_path=str(calls_path)), "test/stage_test.py": TEST_CODE}
+        )
+        mount_path = self.root / "mount"
+        with (
+            mock.patch.dict(os.environ, {"DS_Coder_CoSTEER_stage_cache_path": str(self.cache_path)}),
+            mock.patch.object(conf, "STAGE_CACHE_MOUNT_PATH", str(mount_path)),
+        ):
+            prepare_stage_cache(env, implementation)
+        return implementation.execute(
+            env=env, entry=f"env DS_STAGE_CACHE_DIR={mount_path} PYTHONPATH=. {sys.executable} test/stage_test.py"
+        )
+
+    def test_second_evaluation_hits_cache(self):
+        calls_path = self.root / "calls.txt"
+        first = self._evaluate(calls_path)
+        second = self._evaluate(calls_path)
+        self.assertIn("X.shape: (10, 2), y sum: 5", first)
+        self.assertIn("X.shape: (10, 2), y sum: 5", second)
+        self.assertNotIn("[stage cache] reuse", first)
+        self.assertIn("[stage cache] reuse the outputs of load_data", second)
+        self.assertEqual(calls_path.read_text(), "load_data\n")
+
+    def test_evict(self):
+        self.cache_path.mkdir()
+        for i, name in enumerate(["old", "recent", "new"]):
+            (self.cache_path / name).mkdir()
+            (self.cache_path / name / "0.pkl").write_bytes(b"0" * 100)
+            os.utime(self.cache_path / name, (i, i))
+        os.utime(self.cache_path / "recent", None)  # reused lately
+        evict_stage_cache(self.cache_path, 250)
+        self.assertEqual(sorted(p.name for p in self.cache_path.iterdir()), ["new", "recent"])
+        evict_stage_cache(self.cache_path, 250)
+        self.assertEqual(sorted(p.name for p in self.cache_path.iterdir()), ["new", "recent"])
+        evict_stage_cache(self.cache_path, 0)
+        self.assertEqual(list(self.cache_path.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
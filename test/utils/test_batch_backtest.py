@@ -0,0 +1,235 @@
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+import pytest
+import yaml
+
+from rdagent.components.runner import CachedRunner
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.exception import RunnerError
+from rdagent.core.experiment import Experiment, FBWorkspace, Task
+from rdagent.core.utils import cache_with_pickle
+from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.qlib.experiment.factor_experiment import QlibFactorExperiment
+from rdagent.scenarios.qlib.experiment.workspace import (
+    BATCH_TEMPLATE_FOLDER,
+    QlibFBWorkspace,
+    execute_batch,
+)
+
+FACTOR_TEMPLATE_FOLDER = Path(__file__).parents[2] / "rdagent/scenarios/qlib/experiment/factor_template"
+
+
+def _load_batch_backtest():
+    spec = importlib.util.spec_from_file_location("batch_backtest", BATCH_TEMPLATE_FOLDER / "batch_backtest.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeQTDockerEnv:
+    """Backtest the candidates by writing their results, except the ones whose env asks them to fail"""
+
+    entries = []
+
+    def __init__(self, *args, **kwargs) -> None:
+        pass
+
+    def prepare(self) -> None:
+        pass
+
+    def run(self, local_path: str, entry: str, **kwargs) -> str:
+        FakeQTDockerEnv.entries.append(entry)
+        for candidate in json.loads((Path(local_path) / "candidates.json").read_text()):
+            result_path = Path(local_path) / "results" / candidate["id"]
+            result_path.mkdir(parents=True)
+            if candidate["env"].get("fail"):
+                (result_path / "error.txt").write_text("failed")
+                continue
+            pd.Series({"IC": len(candidate["id"])}).to_csv(result_path / "qlib_res.csv")
+            pd.DataFrame({"return": [0.1]}).to_pickle(result_path / "ret.pkl")
+        return ""
+
+
+class FakeAlpha158DockerEnv:
+    """Run `prepare_alpha158.py` by writing the cache, unless it is told to fail"""
+
+    qlib_path: Path
+    fail = False
+    bind = ""  # where the cache folder is mounted in the env
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.conf = mock.Mock(extra_volumes={str(self.qlib_path): "/root/.qlib/"})
+
+    def prepare(self) -> None:
+        pass
+
+    def run(self, local_path: str, entry: str, env: dict, running_extra_volume: dict, **kwargs) -> str:
+        if FakeAlpha158DockerEnv.fail:
+            return "Traceback (most recent call last):\nMemoryError"
+        cache_folder = Path(next(iter(running_extra_volume)))
+        FakeAlpha158DockerEnv.bind = running_extra_volume[str(cache_folder)]["bind"]
+        pd.DataFrame({"LABEL0": [0.1]}).to_pickle(cache_folder / "alpha158_label_df.pkl")
+        (cache_folder / "alpha158_label_df.key").write_text(env["ALPHA158_CACHE_KEY"])
+        return "Alpha158 cache is built."
+
+
+class _Runner(CachedRunner):
+    backtested: list = []
+
+    @cache_with_pickle(CachedRunner.get_cache_key, CachedRunner.assign_cached_result)
+    def develop(self, exp: Experiment) -> Experiment:
+        if self.is_batch_developed(exp):
+            return exp
+        raise AssertionError("the experiments are only developed in the batch")
+
+    def develop_batch(self, exps: list[Experiment]) -> list[Experiment]:
+        def backtest(pending: list[Experiment]) -> None:
+            for exp in pending:
+                # preparing the workspace doesn't change the cache key of the experiment
+                exp.experiment_workspace.file_dict["combined_factors_df.pkl"] = "prepared"
+                exp.result = exp.sub_tasks[0].name
+            _Runner.backtested.append([exp.sub_tasks[0].name for exp in pending])
+
+        return self.develop_batch_with_cache(exps, backtest)
+
+
+@pytest.mark.offline
+class BatchBacktestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.former_settings = RD_AGENT_SETTINGS.workspace_path, RD_AGENT_SETTINGS.pickle_cache_folder_path_str
+        RD_AGENT_SETTINGS.workspace_path = self.root / "workspace"
+        RD_AGENT_SETTINGS.pickle_cache_folder_path_str = str(self.root / "pickle_cache")
+        self.former_log_path = logger.log_trace_path
+        logger.set_trace_path(self.root / "log")
+        FakeQTDockerEnv.entries = []
+        _Runner.backtested = []
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.workspace_path, RD_AGENT_SETTINGS.pickle_cache_folder_path_str = self.former_settings
+        logger.set_trace_path(self.former_log_path)
+        self.tmp_dir.cleanup()
+
+    def _write_candidate(self, root: Path, candidate_id: str, factors: bytes) -> dict:
+        (root / "candidates" / candidate_id).mkdir(parents=True)
+        for name in ["conf.yaml", "conf_combined.yaml"]:
+            (root / "candidates" / candidate_id / name).write_text((FACTOR_TEMPLATE_FOLDER / name).read_text())
+        (root / "candidates" / candidate_id / "combined_factors_df.pkl").write_bytes(factors)
+        return {"id": candidate_id, "config": "conf_combined.yaml", "env": {}}
+
+    def test_load_candidates(self):
+        batch_backtest = _load_batch_backtest()
+        root = self.root / "batch"
+        candidates = [
+            self._write_candidate(root, "a", b"factors"),
+            self._write_candidate(root, "b", b"factors"),
+            self._write_candidate(root, "c", b"other factors"),
+        ]
+        (root / "candidates.json").write_text(json.dumps(candidates))
+        with (
+            mock.patch.object(batch_backtest, "ROOT", root),
+            mock.patch.object(batch_backtest, "CANDIDATES_PATH", root / "candidates.json"),
+        ):
+            loaded = batch_backtest.load_candidates()
+            self.assertEqual([candidate["id"] for candidate, _ in loaded], ["a", "b", "c"])
+            self.assertEqual(loaded[0][1]["task"]["dataset"]["class"], "DatasetH")
+
+            # the candidates share the dataset only if the files referred by the dataset config are the same
+            keys = [batch_backtest.dataset_key(candidate["id"], config) for candidate, config in loaded]
+            self.assertEqual(keys[0], keys[1])
+            self.assertNotEqual(keys[0], keys[2])
+
+            (root / "candidates.json").write_text("[]")
+            self.assertEqual(batch_backtest.load_candidates(), [])
+
+    @mock.patch("rdagent.scenarios.qlib.experiment.workspace.QTDockerEnv", FakeQTDockerEnv)
+    def test_execute_batch(self):
+        workspaces = [QlibFBWorkspace(template_folder_path=FACTOR_TEMPLATE_FOLDER) for _ in range(2)]
+        for ws in workspaces:
+            (ws.workspace_path / "combined_factors_df.pkl").write_bytes(b"factors")
+        results = execute_batch(workspaces, ["conf_combined.yaml"] * 2, [{}, {"fail": True}], n_jobs=2)
+
+        self.assertEqual(FakeQTDockerEnv.entries, ["python batch_backtest.py 2"])
+        self.assertEqual(results[0]["IC"], len(workspaces[0].workspace_path.name))
+        self.assertTrue((workspaces[0].workspace_path / "ret.pkl").exists())
+        self.assertIsNone(results[1])
+        self.assertFalse((workspaces[1].workspace_path / "qlib_res.csv").exists())
+
+        # an empty batch runs nothing
+        self.assertEqual(execute_batch([], [], []), [])
+        self.assertEqual(len(FakeQTDockerEnv.entries), 1)
+
+    @mock.patch("rdagent.scenarios.qlib.experiment.workspace.QTDockerEnv", FakeAlpha158DockerEnv)
+    def test_prepare_alpha158_cache(self):
+        FakeAlpha158DockerEnv.qlib_path = self.root / "qlib"
+        FakeAlpha158DockerEnv.fail = True
+        ws = QlibFBWorkspace(template_folder_path=FACTOR_TEMPLATE_FOLDER)
+        with self.assertRaisesRegex(RunnerError, "MemoryError"):
+            ws.prepare_alpha158_cache()
+
+        FakeAlpha158DockerEnv.fail = False
+        ws.prepare_alpha158_cache()
+        self.assertTrue((self.root / "qlib" / "rdagent_cache" / "alpha158_label_df.pkl").exists())
+        # the combined config loads the cache from where it is mounted in the backtest env
+        conf = yaml.safe_load((FACTOR_TEMPLATE_FOLDER / "conf_combined.yaml").read_text())
+        loaders = conf["data_handler_config"]["data_loader"]["kwargs"]["dataloader_l"]
+        self.assertEqual(loaders[0]["kwargs"]["config"], f"{FakeAlpha158DockerEnv.bind}alpha158_label_df.pkl")
+        # a cache of the same data is not built again
+        FakeAlpha158DockerEnv.fail = True
+        ws.prepare_alpha158_cache()
+
+    def test_develop_batch_with_cache(self):
+        def experiments(names: list[str]) -> list[Experiment]:
+            exps = []
+            for name in names:
+                exp = Experiment(sub_tasks=[Task(name)])
+                exp.experiment_workspace = FBWorkspace()
+                exps.append(exp)
+            return exps
+
+        runner = _Runner(scen=None)
+        self.assertEqual([exp.result for exp in runner.develop_batch(experiments(["a", "b"]))], ["a", "b"])
+        # only the experiments not cached by `develop` are backtested
+        self.assertEqual([exp.result for exp in runner.develop_batch(experiments(["b", "c", "a"]))], ["b", "c", "a"])
+        self.assertEqual(_Runner.backtested, [["a", "b"], ["c"]])
+        # the experiments developed in a batch are cached for `develop`
+        self.assertEqual(runner.develop(experiments(["c"])[0]).result, "c")
+
+    def test_factor_runner_backtests_baseline_in_batch(self):
+        from rdagent.scenarios.qlib.developer import factor_runner
+
+        batches, develop_based_flags = [], []
+
+        def execute_batch(workspaces, qlib_config_names, run_envs, n_jobs=1):
+            batches.append(qlib_config_names)
+            return [f"result {name}" for name in qlib_config_names]
+
+        def prepare_backtest(runner, exp, develop_based=True):
+            develop_based_flags.append(develop_based)
+            return "conf_combined.yaml" if exp.sub_tasks else "conf.yaml"
+
+        baseline = QlibFactorExperiment(sub_tasks=[])
+        exp = QlibFactorExperiment(sub_tasks=[Task("factor")], based_experiments=[baseline])
+        with (
+            mock.patch.object(factor_runner, "execute_batch", execute_batch),
+            mock.patch.object(factor_runner.QlibFactorRunner, "_prepare_backtest", prepare_backtest),
+        ):
+            runner = factor_runner.QlibFactorRunner(scen=None)
+            runner.develop(exp)
+        # the baseline is backtested in the same batch instead of being developed on its own first
+        self.assertEqual(batches, [["conf.yaml", "conf_combined.yaml"]])
+        self.assertEqual(develop_based_flags, [True, False])
+        self.assertEqual((baseline.result, exp.result), ("result conf.yaml", "result conf_combined.yaml"))
+        # the baseline of the next loops is loaded from the cache
+        self.assertTrue(runner.develop.is_cached(runner, QlibFactorExperiment(sub_tasks=[])))
+
+
+if __name__ == "__main__":
+    unittest.main()
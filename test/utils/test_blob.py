@@ -0,0 +1,51 @@
+import copy
+import gc
+import pickle
+import unittest
+
+import pytest
+
+from rdagent.core.blob import BLOB_STORE, FileDict
+
+
+@pytest.mark.offline
+class FileDictTest(unittest.TestCase):
+    def test_dict_behavior(self):
+        fd = FileDict({"main.py": "print(1)"})
+        fd["test/a.py"] = "assert True"
+        self.assertEqual(fd, {"main.py": "print(1)", "test/a.py": "assert True"})
+        self.assertEqual(FileDict(), {})
+        self.assertIsInstance(fd["main.py"], str)
+        del fd["test/a.py"]
+        self.assertEqual(list(fd.items()), [("main.py", "print(1)")])
+
+    def test_copy_on_write(self):
+        fd = FileDict({"main.py": "print(1)"})
+        fd_copy = copy.deepcopy(fd)
+        fd_copy["model.py"] = "pass"
+        self.assertEqual(fd, {"main.py": "print(1)"})
+        self.assertEqual(fd_copy, {"main.py": "print(1)", "model.py": "pass"})
+        # the unchanged content is shared
+        self.assertIs(fd["main.py"], fd_copy["main.py"])
+
+    def test_pickle(self):
+        code = "x = 1\n" * 10000
+        fd_list = [FileDict({"main.py": code, f"model_{i}.py": str(i)}) for i in range(100)]
+        dumped = pickle.dumps(fd_list)
+        # the shared content is emitted only once
+        self.assertLess(len(dumped), 2 * len(code))
+
+        loaded = pickle.loads(dumped)
+        self.assertEqual(loaded, fd_list)
+        self.assertIs(loaded[0]["main.py"], fd_list[0]["main.py"])
+        self.assertIs(loaded[0]["main.py"], loaded[1]["main.py"])
+
+        # the blobs are released once no file dict refers to them
+        n_blobs = len(BLOB_STORE)
+        del fd_list, loaded
+        gc.collect()
+        self.assertLessEqual(len(BLOB_STORE), n_blobs - 101)
+
+
+if __name__ == "__main__":
+    unittest.main()
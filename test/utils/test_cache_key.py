@@ -0,0 +1,96 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rdagent.components.runner import CachedRunner
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.experiment import Experiment, FBWorkspace, Task
+from rdagent.core.utils import cache_with_pickle
+
+
+class _Runner(CachedRunner):
+    def develop(self, exp: Experiment) -> Experiment:
+        return exp
+
+
+class _InjectingRunner(CachedRunner):
+    developed: list = []
+
+    @cache_with_pickle(CachedRunner.get_cache_key, CachedRunner.assign_cached_result)
+    def develop(self, exp: Experiment) -> Experiment:
+        # like the model runners, which inject the model code into the workspace before running it
+        exp.experiment_workspace.inject_files(**{"model.py": f"model = '{exp.sub_tasks[0].name}'\n"})
+        _InjectingRunner.developed.append(exp.sub_tasks[0].name)
+        exp.result = exp.sub_tasks[0].name
+        return exp
+
+
+def _experiment(i: int, based_experiments: list[Experiment], n_tasks: int = 5) -> Experiment:
+    exp = Experiment(
+        sub_tasks=[Task(f"task_{i}_{j}", description="description " * 500) for j in range(n_tasks)],
+        based_experiments=list(based_experiments),
+    )
+    exp.experiment_workspace = FBWorkspace()
+    exp.experiment_workspace.file_dict["train.py"] = "print('train')\n" * 100
+    exp.experiment_workspace.file_dict[f"feature/feature_{i}.py"] = f"feature = {i}\n"
+    return exp
+
+
+@pytest.mark.offline
+class CacheKeyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.runner = _Runner(scen=None)
+        self.chain: list[Experiment] = []
+        for i in range(200):
+            exp = _experiment(i, self.chain)
+            exp.result = i  # the based experiments are finished
+            self.chain.append(exp)
+
+    def test_key(self):
+        exp = _experiment(200, self.chain)
+        key = self.runner.get_cache_key(exp)
+        self.assertEqual(key, self.runner.get_cache_key(_experiment(200, self.chain)))
+
+        # the key changes with the tasks, the workspace files and the based experiments
+        changed = _experiment(200, self.chain)
+        changed.sub_tasks[0].description = "another description"
+        self.assertNotEqual(key, self.runner.get_cache_key(changed))
+        changed = _experiment(200, self.chain)
+        changed.experiment_workspace.file_dict["model/model_xgboost.py"] = "model = 1\n"
+        self.assertNotEqual(key, self.runner.get_cache_key(changed))
+        self.assertNotEqual(key, self.runner.get_cache_key(_experiment(200, self.chain[:-1])))
+
+        # the unfinished experiment is hashed again, so the changes before its run are taken into account
+        exp.experiment_workspace.file_dict["model/model_xgboost.py"] = "model = 1\n"
+        self.assertNotEqual(key, self.runner.get_cache_key(exp))
+
+    def test_memoised(self):
+        self.runner.get_cache_key(_experiment(200, self.chain))
+        # the fingerprints of the finished based experiments are memoised, only the new experiment is hashed
+        with mock.patch.object(FBWorkspace, "fingerprint", autospec=True, side_effect=FBWorkspace.fingerprint) as fp:
+            self.runner.get_cache_key(_experiment(201, self.chain))
+        self.assertEqual(fp.call_count, 1)
+
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            former_settings = RD_AGENT_SETTINGS.pickle_cache_folder_path_str, RD_AGENT_SETTINGS.workspace_path
+            RD_AGENT_SETTINGS.pickle_cache_folder_path_str = str(Path(tmp_dir) / "pickle_cache")
+            RD_AGENT_SETTINGS.workspace_path = Path(tmp_dir) / "workspace"
+            self.addCleanup(setattr, RD_AGENT_SETTINGS, "pickle_cache_folder_path_str", former_settings[0])
+            self.addCleanup(setattr, RD_AGENT_SETTINGS, "workspace_path", former_settings[1])
+            _InjectingRunner.developed = []
+            for _ in range(2):
+                # every run of the loop creates new experiments based on the former ones of the run
+                runner, chain = _InjectingRunner(scen=None), []
+                for i in range(3):
+                    chain.append(runner.develop(_experiment(i, chain, n_tasks=1)))
+            # the replay loads every experiment from the cache, although the loaded workspaces are not injected
+            self.assertEqual(_InjectingRunner.developed, ["task_0_0", "task_1_0", "task_2_0"])
+            self.assertEqual([exp.result for exp in chain], ["task_0_0", "task_1_0", "task_2_0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import tempfile
+import time
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.core.utils import shutdown_pools
+from rdagent.scenarios.data_science.debug.data import (
+    GenericDataHandler,
+    StreamingUniqueIDDataReducer,
+    UniqueIDDataReducer,
+    create_debug_data,
+    extract_file_references,
+)
+
+
+def _make_train_df(n_rows: int, n_labels: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "id": np.arange(n_rows),
+            "image": [f"img_{i}" for i in range(n_rows)],
+            "feature": rng.random(n_rows),
+            "label": [f"class_{i}" for i in rng.integers(0, n_labels, n_rows)],
+        }
+    )
+
+
+@pytest.mark.offline
+class DebugDataTest(unittest.TestCase):
+    def tearDown(self) -> None:
+        shutdown_pools()
+
+    def test_streaming_reducer(self):
+        df = _make_train_df(20000, 50)
+        reducer = StreamingUniqueIDDataReducer(min_frac=0.01, min_num=5)
+        sampled = reducer.reduce_stream(df.iloc[i : i + 1000] for i in range(0, len(df), 1000))
+        # The same sample size as the in-memory reducer, covering every label and keeping the original order
+        expected = UniqueIDDataReducer(min_frac=0.01, min_num=5).reduce(df)
+        self.assertEqual(len(sampled), len(expected))
+        self.assertEqual(set(sampled["label"]), set(df["label"]))
+        self.assertTrue(sampled.index.is_monotonic_increasing)
+        pd.testing.assert_frame_equal(sampled, df.loc[sampled.index])
+        # The sample does not depend on the chunk size
+        pd.testing.assert_frame_equal(sampled, reducer.reduce_stream([df]))
+
+        # Tiny data is fully kept and data without a valid label is sampled randomly
+        pd.testing.assert_frame_equal(reducer.reduce(df.iloc[:3]), df.iloc[:3])
+        no_label_df = df[["id", "feature"]]
+        self.assertEqual(len(reducer.reduce_stream([no_label_df.iloc[:5000], no_label_df.iloc[5000:]])), 200)
+
+        # A label column with more labels than the sample size is dropped instead of keeping a row per label
+        id_label_df = df.assign(label=[f"class_{i // 100}" if i < 1000 else f"id_{i}" for i in range(len(df))])
+        with mock.patch.object(StreamingUniqueIDDataReducer, "MAX_LABEL_REPS", 1000):
+            sampled = reducer.reduce_stream(id_label_df.iloc[i : i + 1000] for i in range(0, len(df), 1000))
+        self.assertEqual(len(sampled), 200)
+
+    def test_extract_file_references(self):
+        df = _make_train_df(10, 2)
+        self.assertEqual(extract_file_references(df), set(df["image"]) | set(df["label"]))
+
+    def test_create_debug_data(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_folder = Path(tmp_dir) / "data" / "comp"
+            (data_folder / "images").mkdir(parents=True)
+            train_df = _make_train_df(2000, 10)
+            train_df.to_csv(data_folder / "train.csv", index=False)
+            train_df.drop(columns="label").iloc[:500].to_parquet(data_folder / "test.parquet")
+            for i in range(100):
+                (data_folder / "images" / f"img_{i}.jpg").write_text("")
+
+            create_debug_data(
+                "comp", min_frac=0.01, min_num=5, dataset_path=Path(tmp_dir) / "data", chunk_size=300, n_jobs=2
+            )
+
+            sample_folder = Path(tmp_dir) / "data" / "sample" / "comp"
+            sampled_train = pd.read_csv(sample_folder / "train.csv")
+            self.assertEqual(set(sampled_train["label"]), set(train_df["label"]))
+            sampled_test = pd.read_parquet(sample_folder / "test.parquet")
+            pd.testing.assert_frame_equal(sampled_test, train_df.drop(columns="label").loc[sampled_test.index])
+            # Only the images referenced by the sampled rows are copied
+            copied = {fp.stem for fp in (sample_folder / "images").iterdir()}
+            self.assertTrue(copied)
+            self.assertTrue(copied <= set(sampled_train["image"]) | set(sampled_test["image"]))
+
+    def test_benchmark(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "train.csv"
+            _make_train_df(500000, 100).to_csv(path, index=False)
+            handler = GenericDataHandler()
+
+            def _measure(name, func):
+                tracemalloc.start()
+                start = time.time()
+                func()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{name}: {time.time() - start:.2f}s, peak memory {peak / 2**20:.1f} MiB")
+                return peak
+
+            in_memory_peak = _measure(
+                "in-memory", lambda: UniqueIDDataReducer(min_frac=0.01).reduce(handler.load(path))
+            )
+            streaming_peak = _measure(
+                "streaming",
+                lambda: StreamingUniqueIDDataReducer(min_frac=0.01).reduce_stream(handler.iter_chunks(path, 50_000)),
+            )
+            self.assertLess(streaming_peak, in_memory_peak)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.scenarios.data_science.scen import (
+    count_csv_rows,
+    describe_data_folder,
+    describe_data_folder_with_cache,
+)
+
+# The size of the synthetic CSV folder for the benchmark, e.g. `DESCRIBE_DATA_BENCHMARK_MB=5120` for 5 GB
+BENCHMARK_MB = int(os.environ.get("DESCRIBE_DATA_BENCHMARK_MB", "64"))
+
+
+def _write_csv(path: Path, target_mb: int) -> None:
+    rng = np.random.default_rng(0)
+    chunk = pd.DataFrame({"id": np.arange(100000), "a": rng.random(100000), "b": rng.integers(0, 10, 100000)})
+    chunk_bytes = chunk.to_csv(index=False, header=False).encode()
+    with path.open("wb") as f:
+        f.write(b"id,a,b\n")
+        for _ in range(max(1, target_mb * 2**20 // len(chunk_bytes))):
+            f.write(chunk_bytes)
+
+
+@pytest.mark.offline
+class DescribeDataFolderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pickle_cache_folder_path_str = RD_AGENT_SETTINGS.pickle_cache_folder_path_str
+        RD_AGENT_SETTINGS.pickle_cache_folder_path_str = str(Path(self.tmp_dir.name) / "pickle_cache")
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.pickle_cache_folder_path_str = self.pickle_cache_folder_path_str
+        self.tmp_dir.cleanup()
+
+    def test_count_csv_rows(self):
+        df = pd.DataFrame({"x": range(1000), "y": ["a"] * 1000})
+        path = Path(self.tmp_dir.name) / "data.csv"
+        df.to_csv(path, index=False)
+        self.assertEqual(count_csv_rows(path, chunk_size=64), len(df))
+        path.write_text(path.read_text().rstrip("\n"))  # without the trailing newline
+        self.assertEqual(count_csv_rows(path, chunk_size=64), len(df))
+        path.write_text("x,y\n")
+        self.assertEqual(count_csv_rows(path), 0)
+
+    def test_cache(self):
+        folder = Path(self.tmp_dir.name) / "comp"
+        folder.mkdir()
+        pd.DataFrame({"x": range(10)}).to_csv(folder / "train.csv", index=False)
+        desc = describe_data_folder_with_cache(folder)
+        self.assertIn("train.csv (", desc)
+        self.assertIn("with 10 rows and 1 columns", desc)
+        self.assertEqual(describe_data_folder_with_cache(folder), desc)
+
+        # any change of the files invalidates the cache
+        pd.DataFrame({"x": range(20), "y": range(20)}).to_csv(folder / "train.csv", index=False)
+        self.assertIn("with 20 rows and 2 columns", describe_data_folder_with_cache(folder))
+
+        # a new version of the description invalidates the cache
+        with patch("rdagent.scenarios.data_science.scen.describe_data_folder", return_value="new") as describe:
+            self.assertNotEqual(describe_data_folder_with_cache(folder), "new")
+            with patch("rdagent.scenarios.data_science.scen.DATA_FOLDER_DESCRIPTION_VERSION", 0):
+                self.assertEqual(describe_data_folder_with_cache(folder), "new")
+
+            # the description is not cached when the user turns off the pickle cache
+            self.addCleanup(setattr, RD_AGENT_SETTINGS, "cache_with_pickle", RD_AGENT_SETTINGS.cache_with_pickle)
+            RD_AGENT_SETTINGS.cache_with_pickle = False
+            describe_data_folder_with_cache(folder)
+            describe_data_folder_with_cache(folder)
+            self.assertEqual(describe.call_count, 3)
+
+    def test_metadata_faster_than_full_read(self):
+        folder = Path(self.tmp_dir.name) / "comp"
+        folder.mkdir()
+        for name in ["train.csv", "test.csv"]:
+            _write_csv(folder / name, BENCHMARK_MB // 2)
+
+        start = time.perf_counter()
+        for name in ["train.csv", "test.csv"]:
+            df = pd.read_csv(folder / name)
+            expected = f"with {df.shape[0]} rows and {df.shape[1]} columns"
+        full_read_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        desc = describe_data_folder(folder)
+        metadata_time = time.perf_counter() - start
+        self.assertIn(expected, desc)
+        self.assertLess(metadata_time, full_read_time)
+
+        describe_data_folder_with_cache(folder)
+        start = time.perf_counter()
+        self.assertEqual(describe_data_folder_with_cache(folder), desc)
+        self.assertLess(time.perf_counter() - start, metadata_time)
+
+if __name__ == "__main__":
+    unittest.main()
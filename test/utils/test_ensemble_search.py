@@ -0,0 +1,69 @@
+import unittest
+
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, log_loss
+
+from rdagent.scenarios.kaggle.experiment.shared_template.ensemble_search import (
+    random_weights,
+    score_weights,
+    search_weights,
+    stack_predictions,
+)
+
+
+def _loop_search(valid_pred_list, y_valid, metric, weights):
+    # the former search of the templates, one Python iteration per candidate
+    scores = []
+    for weight in weights:
+        y_valid_pred = np.zeros_like(valid_pred_list[0])
+        for j in range(len(valid_pred_list)):
+            y_valid_pred += valid_pred_list[j] * weight[j]
+        scores.append(metric(y_valid, y_valid_pred))
+    return np.array(scores)
+
+
+@pytest.mark.offline
+class EnsembleSearchTest(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(42)
+        self.y_binary = rng.integers(0, 2, 5000)
+        # the models are noisy views of the label with different noise levels
+        self.binary_preds = [
+            np.clip(self.y_binary + rng.normal(0, noise, 5000), 0, 1)[:, None] for noise in (0.4, 0.6, 0.8, 1.0)
+        ]
+        self.y_multi = rng.integers(0, 5, 2000)
+        self.multi_preds = []
+        for noise in (1.0, 2.0, 3.0):
+            logits = np.eye(5)[self.y_multi] * 2 + rng.normal(0, noise, (2000, 5))
+            self.multi_preds.append(np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True))
+
+    def test_same_scores_as_loop(self):
+        weights = random_weights(len(self.binary_preds), 200, seed=0)
+        expected = _loop_search(
+            self.binary_preds, self.y_binary, lambda y, p: accuracy_score(y, (p > 0.5).astype(int)), weights
+        )
+        scores = score_weights(stack_predictions(self.binary_preds), self.y_binary, weights, "accuracy")
+        np.testing.assert_allclose(scores, expected)
+
+        weights = random_weights(len(self.multi_preds), 50, seed=0)
+        expected = _loop_search(
+            self.multi_preds,
+            self.y_multi,
+            lambda y, p: log_loss(y, p / p.sum(axis=1)[:, np.newaxis], labels=np.arange(5)),
+            weights,
+        )
+        scores = score_weights(stack_predictions(self.multi_preds), self.y_multi, weights, "log_loss")
+        np.testing.assert_allclose(scores, expected, rtol=1e-6)
+
+    def test_hill_climbing(self):
+        _, random_score = search_weights(self.multi_preds, self.y_multi, metric="log_loss", n_candidates=20, seed=0)
+        weight, climbed_score = search_weights(
+            self.multi_preds, self.y_multi, metric="log_loss", n_candidates=20, hill_climbing=True, seed=0
+        )
+        self.assertLessEqual(climbed_score, random_score)
+        self.assertAlmostEqual(weight.sum(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rdagent.scenarios.kaggle.kaggle_crawler import extract_archives
+
+
+def _write_zip(path: Path, files: dict[str, bytes]) -> None:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+
+
+@pytest.mark.offline
+class ExtractArchivesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        rng = np.random.default_rng(0)
+        self.images = {
+            f"train/img_{i:04d}.bin": rng.integers(0, 8, 20000, dtype=np.uint8).tobytes() for i in range(300)
+        }
+        inner = io.BytesIO()
+        with zipfile.ZipFile(inner, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, content in self.images.items():
+                zf.writestr(name, content)
+        self.outer_files = {
+            "train.csv": b"id,label\n" + b"".join(f"{i},{i % 2}\n".encode() for i in range(1000)),
+            "test.csv": b"id\n1\n2\n",
+            "images.zip": inner.getvalue(),
+        }
+        self.zip_path = self.root / "competition.zip"
+        _write_zip(self.zip_path, self.outer_files)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _extract_all(self, target: Path, manifest_path: Path, members=None) -> list[Path]:
+        extracted = extract_archives(
+            [self.zip_path],
+            target,
+            members=None if members is None else [*members, "*.zip"],
+            manifest_path=manifest_path,
+        )
+        return extracted + extract_archives(
+            sorted(target.rglob("*.zip")), target, members=members, manifest_path=manifest_path
+        )
+
+    def test_extract(self):
+        target = self.root / "data"
+        manifest_path = self.root / "competition.manifest.json"
+        self._extract_all(target, manifest_path)
+        for name, content in {**self.outer_files, **self.images}.items():
+            self.assertEqual((target / name).read_bytes(), content)
+        manifest = json.loads(manifest_path.read_text())
+        self.assertEqual(manifest["train/img_0000.bin"]["archive"], "images.zip")
+        self.assertEqual(manifest["train.csv"]["size"], len(self.outer_files["train.csv"]))
+
+        # a re-run only extracts the files which are changed or missing
+        (target / "test.csv").write_bytes(b"id\n3\n4\n")  # same size, so it is taken as extracted
+        (target / "train.csv").write_bytes(b"broken")
+        (target / "train/img_0001.bin").unlink()
+        self._extract_all(target, manifest_path)
+        self.assertEqual((target / "test.csv").read_bytes(), b"id\n3\n4\n")
+        self.assertEqual((target / "train.csv").read_bytes(), self.outer_files["train.csv"])
+        self.assertEqual((target / "train/img_0001.bin").read_bytes(), self.images["train/img_0001.bin"])
+
+    def test_members(self):
+        target = self.root / "data"
+        extracted = self._extract_all(target, self.root / "manifest.json", members=["train.csv", "train/img_000*"])
+        self.assertEqual(
+            sorted(str(path.relative_to(target)) for path in extracted),
+            ["images.zip", "train.csv"] + [f"train/img_000{i}.bin" for i in range(10)],
+        )
+        self.assertFalse((target / "test.csv").exists())
+        self.assertFalse((target / "train/img_0010.bin").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
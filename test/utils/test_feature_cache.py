@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.scenarios.kaggle.experiment.shared_template.feature_cache import (
+    evict_cache,
+    transform_features,
+)
+
+FEATURE_CODE = """
+import pandas as pd
+
+
+class FeatureEngineering:
+    def fit(self, X):
+        with open("{log_path}", "a") as f:
+            f.write("{name}\\n")
+
+    def transform(self, X):
+        X["{name}"] = X["a"] * {factor}
+        return X[["{name}"]]
+
+
+feature_engineering_cls = FeatureEngineering
+"""
+
+
+@pytest.mark.offline
+class FeatureCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        (self.root / "feature").mkdir()
+        self.log_path = self.root / "fit.log"
+        rng = np.random.default_rng(42)
+        self.X_train, self.X_valid, self.X_test = (pd.DataFrame({"a": rng.random(n)}) for n in (1000, 200, 300))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_feature(self, name: str, factor: int) -> None:
+        (self.root / "feature" / f"{name}.py").write_text(
+            FEATURE_CODE.format(name=name, factor=factor, log_path=self.log_path.as_posix())
+        )
+
+    def _transform(self):
+        return transform_features(
+            sorted((self.root / "feature").glob("feat*.py")),
+            self.X_train,
+            self.X_valid,
+            self.X_test,
+            cache_dir=self.root / "cache",
+        )
+
+    def _fitted(self) -> list[str]:
+        fitted = self.log_path.read_text().split() if self.log_path.exists() else []
+        self.log_path.unlink(missing_ok=True)
+        return fitted
+
+    def test_cache(self):
+        self._write_feature("feat_1", 1)
+        self._write_feature("feat_2", 2)
+        X_train, X_valid, X_test = self._transform()
+        self.assertEqual(self._fitted(), ["feat_1", "feat_2"])
+        self.assertEqual(list(X_train.columns), [("feature_0", "feat_1"), ("feature_1", "feat_2")])
+        self.assertEqual(X_test.shape, (300, 2))
+        # the preprocessed data are not modified by the transforms
+        self.assertEqual(list(self.X_train.columns), ["a"])
+
+        # only the new and the changed feature files are computed
+        self._write_feature("feat_2", 3)
+        self._write_feature("feat_3", 4)
+        X_train_cached, X_valid_cached, _ = self._transform()
+        self.assertEqual(self._fitted(), ["feat_2", "feat_3"])
+        pd.testing.assert_series_equal(X_valid_cached[("feature_0", "feat_1")], X_valid[("feature_0", "feat_1")])
+        np.testing.assert_allclose(X_train_cached[("feature_1", "feat_2")], self.X_train["a"] * 3)
+
+        # the changed preprocessed data invalidate the cache
+        self.X_train = self.X_train * 2
+        self._transform()
+        self.assertEqual(self._fitted(), ["feat_1", "feat_2", "feat_3"])
+
+    def test_cached_same_as_uncached(self):
+        for i in range(10):
+            self._write_feature(f"feat_{i}", i)
+        uncached = self._transform()
+        self.assertEqual(len(self._fitted()), 10)
+        cached = self._transform()
+        self.assertEqual(self._fitted(), [])
+        for uncached_X, cached_X in zip(uncached, cached):
+            pd.testing.assert_frame_equal(uncached_X, cached_X)
+
+    def test_evict(self):
+        for i in range(3):
+            self._write_feature(f"feat_{i}", i)
+        self._transform()
+        self._fitted()
+        cache_dir = self.root / "cache"
+        for fp in cache_dir.iterdir():
+            os.utime(fp, (0, 0))
+        size = sum(fp.stat().st_size for fp in cache_dir.iterdir())
+
+        # the reused outputs are touched, so they are kept while the others are evicted
+        (self.root / "feature" / "feat_0.py").unlink()
+        (self.root / "feature" / "feat_1.py").unlink()
+        self._transform()
+        self.assertEqual(self._fitted(), [])
+        reused = {fp.name.split("_")[0] for fp in cache_dir.iterdir() if fp.stat().st_mtime > 0}
+        self.assertEqual(len(reused), 1)
+        evict_cache(cache_dir, size // 2)
+        self.assertEqual({fp.name.split("_")[0] for fp in cache_dir.iterdir()}, reused)
+
+        self._write_feature("feat_0", 0)
+        self._write_feature("feat_1", 1)
+        self._transform()
+        self.assertEqual(self._fitted(), ["feat_0", "feat_1"])
+
+        evict_cache(cache_dir, 0)
+        self.assertEqual(list(cache_dir.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.utils.env import LocalConf, LocalEnv, LogCapture, run_log_path
+
+
+@pytest.mark.offline
+class LogCaptureTest(unittest.TestCase):
+    def test_capture(self):
+        conf = LocalConf(default_entry="", log_head_chars=100, log_tail_chars=100, log_echo_max_lines=5)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            spill_path = Path(tmp_dir) / "run_stdout.log"
+            capture = LogCapture(conf, spill_path=spill_path, remove_timestamp=True, strip_lines=True)
+            lines = [f"  2024-01-01 12:00:{i % 60:02d} step {i}  " for i in range(1000)]
+            data = "\n".join(lines).encode()
+            # the chunks may split the lines and the multi-byte characters
+            for i in range(0, len(data), 37):
+                capture.feed(data[i : i + 37])
+            capture.close()
+
+            expected = "".join(f"[DATETIME] step {i}\n" for i in range(1000))
+            self.assertEqual(spill_path.read_text(), expected)
+            output = capture.getvalue()
+            self.assertTrue(output.startswith(expected[:100]))
+            self.assertTrue(output.endswith(expected[-100:]))
+            self.assertIn(f"characters are omitted, the full logs are saved in {spill_path}", output)
+
+        # the short logs are captured completely without spilling
+        capture = LogCapture(conf, spill_path=spill_path)
+        capture.feed("héllo\nworld".encode())
+        capture.close()
+        self.assertEqual(capture.getvalue(), "héllo\nworld\n")
+        self.assertFalse(spill_path.exists())
+
+    def test_local_env_benchmark(self):
+        n_lines = 1_000_000
+        conf = LocalConf(default_entry="", enable_cache=False)
+        le = LocalEnv(conf=conf)
+        former_cache_folder = RD_AGENT_SETTINGS.pickle_cache_folder_path_str
+        with tempfile.TemporaryDirectory() as tmp_dir, tempfile.TemporaryDirectory() as cache_dir:
+            RD_AGENT_SETTINGS.pickle_cache_folder_path_str = cache_dir
+            self.addCleanup(setattr, RD_AGENT_SETTINGS, "pickle_cache_folder_path_str", former_cache_folder)
+            (Path(tmp_dir) / "train.py").write_text(
+                f"import sys\nsys.stdout.writelines(f'line {{i}}\\n' for i in range({n_lines}))\n"
+            )
+            entry = f"{sys.executable} train.py"
+            start = time.time()
+            stdout, return_code = le.run_ret_code(entry=entry, local_path=tmp_dir)
+            print(f"capture {n_lines} lines: {time.time() - start:.2f}s")
+            self.assertEqual(return_code, 0)
+            self.assertTrue(stdout.startswith("line 0\n"))
+            self.assertTrue(stdout.endswith(f"line {n_lines - 1}\n"))
+            self.assertLessEqual(len(stdout), conf.log_head_chars + conf.log_tail_chars + 200)
+            # the full logs are kept out of the workspace
+            self.assertEqual([path.name for path in Path(tmp_dir).iterdir()], ["train.py"])
+            with run_log_path(tmp_dir).open() as f:
+                self.assertEqual(sum(1 for _ in f), n_lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.app.kaggle.conf import KAGGLE_IMPLEMENT_SETTING
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.kaggle.experiment import workspace
+from rdagent.scenarios.kaggle.experiment.shared_template.model_runner import fit_models
+
+MODEL_CODE = """
+import os
+
+from sklearn.ensemble import RandomForestClassifier
+
+with open({pid_file!r}, "a") as f:
+    f.write(f"{{os.getpid()}}\\n")  # the processes which import the model
+
+
+def fit(X_train, y_train, X_valid, y_valid):
+    model = RandomForestClassifier(n_estimators=20, random_state={seed}, n_jobs=1)
+    model.fit(X_train, y_train)
+    return {ret}
+
+
+def predict(model, X):
+    return model.predict_proba(X)[:, 1]
+"""
+
+SELECT_CODE = """
+def select(X):
+    X["{column}"] = 0  # the selectors may change the given data
+    return X
+"""
+
+
+@pytest.mark.offline
+class ModelRunnerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_dir = Path(self.tmp_dir.name) / "model"
+        self.model_dir.mkdir()
+        self.pid_file = Path(self.tmp_dir.name) / "pids.txt"
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.random((2000, 10)), columns=[f"f{i}" for i in range(10)])
+        y = (X["f0"] + X["f1"] > 1).astype(int)
+        self.X_train, self.X_valid, self.y_train, self.y_valid = X[:1500], X[1500:], y[:1500], y[1500:]
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write_models(self, n: int, ret: str = "model") -> list[Path]:
+        for i in range(n):
+            (self.model_dir / f"model_{i}.py").write_text(
+                MODEL_CODE.format(seed=i, ret=ret, pid_file=str(self.pid_file))
+            )
+            (self.model_dir / f"select_{i}.py").write_text(SELECT_CODE.format(column=f"f{i}"))
+        return sorted(self.model_dir.glob("model*.py"))
+
+    def _predict(self, fitted_l) -> list[np.ndarray]:
+        return [fitted.predict(fitted.model, fitted.select_m.select(self.X_valid.copy())) for fitted in fitted_l]
+
+    def test_parallel_same_as_sequential(self):
+        paths = self._write_models(3)
+        X_train = self.X_train.copy()
+        parallel = fit_models(paths, X_train, self.y_train, self.X_valid, self.y_valid, n_jobs=3)
+        sequential = fit_models(paths, X_train, self.y_train, self.X_valid, self.y_valid, n_jobs=1)
+        self.assertEqual([fitted.name for fitted in parallel], ["model_0", "model_1", "model_2"])
+        for parallel_pred, sequential_pred in zip(self._predict(parallel), self._predict(sequential)):
+            np.testing.assert_array_equal(parallel_pred, sequential_pred)
+        # the selectors in the workers don't change the data of the main process
+        pd.testing.assert_frame_equal(X_train, self.X_train)
+
+    def test_import_in_workers(self):
+        paths = self._write_models(2)
+        fit_models(paths, self.X_train, self.y_train, self.X_valid, self.y_valid)
+        self.assertEqual(self.pid_file.read_text().split(), [str(os.getpid())] * 2)  # sequential by default
+
+        # the workers are forked before the main process imports the models
+        self.pid_file.unlink()
+        fit_models(paths, self.X_train, self.y_train, self.X_valid, self.y_valid, n_jobs=2)
+        pids = self.pid_file.read_text().split()
+        self.assertNotIn(str(os.getpid()), pids[:2])
+        self.assertEqual(pids[2:], [str(os.getpid())] * 2)
+
+    def test_unpicklable_model(self):
+        # a model which can't be sent back from the worker is fitted in the main process
+        paths = self._write_models(2, ret="(model, lambda: None)")
+        fitted_l = fit_models(paths, self.X_train, self.y_train, self.X_valid, self.y_valid, n_jobs=2)
+        self.assertTrue(all(callable(fitted.model[1]) for fitted in fitted_l))
+
+    def test_workspace_env(self):
+        # the parallel fitting is configured by the settings of the kaggle scenario
+        former_workspace_path, former_log_path = RD_AGENT_SETTINGS.workspace_path, logger.log_trace_path
+        RD_AGENT_SETTINGS.workspace_path = Path(self.tmp_dir.name) / "workspace"
+        logger.set_trace_path(Path(self.tmp_dir.name) / "log")
+        try:
+            with (
+                mock.patch.object(workspace, "KGDockerEnv") as env_cls,
+                mock.patch.multiple(KAGGLE_IMPLEMENT_SETTING, model_fit_n_jobs=4, model_fit_cores=2),
+            ):
+                workspace.KGFBWorkspace(template_folder_path=self.model_dir).execute(run_env={"A": "1"})
+        finally:
+            RD_AGENT_SETTINGS.workspace_path = former_workspace_path
+            logger.set_trace_path(former_log_path)
+        self.assertEqual(
+            env_cls.return_value.run.call_args.kwargs["env"],
+            {"A": "1", "MODEL_FIT_N_JOBS": "4", "MODEL_FIT_CORES": "2"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
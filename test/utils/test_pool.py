@@ -0,0 +1,80 @@
+import multiprocessing as mp
+import os
+import unittest
+from unittest import mock
+
+import pytest
+
+from rdagent.core import utils
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.utils import (
+    LLM_CACHE_SEED_GEN,
+    multiprocessing_wrapper,
+    multiprocessing_wrapper_iter,
+    shutdown_pools,
+)
+from rdagent.log import rdagent_logger as logger
+
+
+def _get_seed(x: int) -> tuple[int, int]:
+    return x, LLM_CACHE_SEED_GEN.get_next_seed()
+
+
+def _get_tag() -> str:
+    return logger._tag
+
+
+@pytest.mark.offline
+class PoolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.persistent_pool = RD_AGENT_SETTINGS.multi_proc_persistent_pool
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.multi_proc_persistent_pool = self.persistent_pool
+        shutdown_pools()
+
+    def _run(self, kind: str) -> list:
+        LLM_CACHE_SEED_GEN.set_seed(42)
+        return multiprocessing_wrapper([(_get_seed, (i,)) for i in range(8)], n=4, kind=kind)
+
+    def test_seed_trace(self):
+        """The seed trace should not depend on the pool kind or the pool lifetime"""
+        RD_AGENT_SETTINGS.multi_proc_persistent_pool = False
+        expected = self._run("process")
+        RD_AGENT_SETTINGS.multi_proc_persistent_pool = True
+        self.assertEqual(self._run("process"), expected)
+        self.assertEqual(self._run("process"), expected)
+        self.assertEqual(self._run("thread"), expected)
+
+        LLM_CACHE_SEED_GEN.set_seed(42)
+        streamed = dict(multiprocessing_wrapper_iter([(_get_seed, (i,)) for i in range(8)], n=4))
+        self.assertEqual([streamed[i] for i in range(8)], expected)
+
+    def test_persistent_pool(self):
+        """The persistent pool is reused by the calls instead of starting new workers"""
+        RD_AGENT_SETTINGS.multi_proc_persistent_pool = True
+        pids = set()
+        for _ in range(3):
+            pids.update(multiprocessing_wrapper([(os.getpid, ()) for _ in range(8)], n=4))
+        self.assertLessEqual(len(pids), 4)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_pool_size(self):
+        """The pool of a single call is not larger than the calls"""
+        RD_AGENT_SETTINGS.multi_proc_persistent_pool = False
+        with mock.patch.object(utils.mp, "Pool", wraps=mp.Pool) as pool_cls:
+            multiprocessing_wrapper([(os.getpid, ()) for _ in range(2)], n=8)
+        pool_cls.assert_called_once_with(processes=2)
+
+    def test_log_tag(self):
+        """The workers log under the tag of the caller, whether they are forked by the call or not"""
+        for persistent_pool in (False, True):
+            RD_AGENT_SETTINGS.multi_proc_persistent_pool = persistent_pool
+            with logger.tag("Loop_0"):
+                self.assertEqual(multiprocessing_wrapper([(_get_tag, ()) for _ in range(4)], n=2), ["Loop_0"] * 4)
+            with logger.tag("Loop_1"):
+                self.assertEqual(multiprocessing_wrapper([(_get_tag, ()) for _ in range(4)], n=2), ["Loop_1"] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import importlib.util
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.scenarios.kaggle.experiment.shared_template.preprocess_cache import (
+    cached_preprocess,
+    dump_outputs,
+    load_outputs,
+    try_dump_outputs,
+)
+
+PREPROCESS_CODE = """
+import numpy as np
+import pandas as pd
+
+CALLS = []
+
+
+def preprocess_script():
+    CALLS.append(1)
+    rng = np.random.default_rng({seed})
+    X = pd.DataFrame(rng.random((20000, 50)), columns=[f"f{{i}}" for i in range(50)])
+    X["category"] = pd.Categorical(rng.choice(["a", "b"], len(X)))
+    y = pd.Series(rng.integers(0, 2, len(X)), name="target")
+    return X[:15000], X[15000:], y[:15000], y[15000:], X[:1000], np.arange(1000), {{"mixed": [1, "a"]}}
+"""
+
+
+def _parse_raw_data() -> tuple:
+    """A preprocess which parses the raw columns like the competition templates"""
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame(
+        {
+            "timestamp": pd.Series(rng.integers(0, 10**9, 200000)).astype(str),
+            "text": rng.choice(["a b c", "d e", "f"], 200000),
+        }
+    )
+    X = pd.DataFrame({"date": pd.to_datetime(raw["timestamp"].astype(int), unit="s")})
+    X["words"] = raw["text"].str.split().str.len()
+    return (pd.concat([X, pd.get_dummies(raw["text"])], axis=1),)
+
+
+def _import(path: Path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.offline
+class PreprocessCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _preprocess_module(self, seed: int):
+        path = self.root / "fea_share_preprocess.py"
+        path.write_text(PREPROCESS_CODE.format(seed=seed))
+        return _import(path)
+
+    def test_cache(self):
+        module = self._preprocess_module(seed=0)
+        outputs = cached_preprocess(module.preprocess_script, cache_dir=self.root / "cache")
+        cached = cached_preprocess(module.preprocess_script, cache_dir=self.root / "cache")
+        self.assertEqual(len(module.CALLS), 1)
+        self.assertEqual(len(cached), len(outputs))
+        for output, cached_output in zip(outputs[:4], cached[:4]):
+            if isinstance(output, pd.DataFrame):
+                pd.testing.assert_frame_equal(output, cached_output)
+            else:
+                pd.testing.assert_series_equal(output, cached_output)
+        np.testing.assert_array_equal(outputs[5], cached[5])
+        self.assertEqual(cached[6], {"mixed": [1, "a"]})
+
+        # a changed preprocess script is not served by the former cache
+        module = self._preprocess_module(seed=1)
+        cached_preprocess(module.preprocess_script, cache_dir=self.root / "cache")
+        self.assertEqual(len(module.CALLS), 1)
+
+    def test_unwritable_cache_dir(self):
+        # the outputs are still returned when the cache can't be written, e.g. on a read-only volume
+        module = self._preprocess_module(seed=0)
+        (self.root / "cache").write_text("not a folder")
+        self.assertEqual(len(cached_preprocess(module.preprocess_script, cache_dir=self.root / "cache")), 7)
+        self.assertFalse(try_dump_outputs((1,), self.root / "cache" / "outputs"))
+
+    def test_cached_load_faster(self):
+        start = time.perf_counter()
+        outputs = _parse_raw_data()
+        preprocess_time = time.perf_counter() - start
+        dump_outputs(outputs, self.root / "cache")
+
+        start = time.perf_counter()
+        cached = load_outputs(self.root / "cache")
+        self.assertLess(time.perf_counter() - start, preprocess_time)
+        pd.testing.assert_frame_equal(cached[0], outputs[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
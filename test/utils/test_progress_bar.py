@@ -0,0 +1,135 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.oai.llm_conf import LLM_SETTINGS
+from rdagent.utils import filter_progress_bar, md5_hash
+from rdagent.utils.progress_bar import (
+    FILTER_STATS,
+    ProgressBarFilter,
+    stdout_signature,
+)
+
+
+class FakeAPIBackend:
+    """Count the tokens by characters and answer the patterns of the `step` logs."""
+
+    chat_calls = 0
+
+    def build_messages_and_calculate_token(self, user_prompt: str, system_prompt: str | None) -> int:
+        return len(user_prompt) + len(system_prompt or "")
+
+    def build_messages_and_create_chat_completion(self, **kwargs) -> str:
+        FakeAPIBackend.chat_calls += 1
+        return json.dumps({"needs_sub": False, "regex_patterns": [r"step \d+ \| loss nan\n?"]})
+
+
+def _tqdm_stdout(n: int) -> str:
+    bars = "".join(f"\r{i * 100 // n:3d}%|███       | {i}/{n} [00:01<00:00, 95.12it/s]" for i in range(n + 1))
+    return f"start training\n{bars}\n" + "".join(
+        f"Epoch {i}: 100%|██████████| 10/10 [00:02<00:00, 4.90it/s]\n" for i in range(n)
+    )
+
+
+def _keras_stdout(n: int) -> str:
+    return "".join(f"{i}/{n} ━━━━━━━━━━━━━━━━━━━━ 0s 2ms/step - loss: 0.5\n" for i in range(n)) + "val_loss: 0.4\n"
+
+
+def _lightgbm_stdout(n: int) -> str:
+    return (
+        "".join(
+            "[LightGBM] [Info] Total Bins 1530\n[LightGBM] [Warning] No further splits with positive gain, best gain: -inf\n"
+            for _ in range(n)
+        )
+        + "score: 0.9\n"
+    )
+
+
+def _xgboost_stdout(n: int) -> str:
+    warning = '[10:21:32] WARNING: /workspace/src/learner.cc:740:\nParameters: { "silent" } are not used.\n'
+    return warning * n + "".join(f"[{i}]\tvalidation_0-rmse:0.{i}\n" for i in range(n))
+
+
+def _unseen_stdout(n: int) -> str:
+    return "".join(f"step {i} | loss nan\n" for i in range(n)) + "final loss 0.3\n"
+
+
+@pytest.mark.offline
+class ProgressBarFilterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = RD_AGENT_SETTINGS.progress_bar_pattern_cache_path
+        self.chat_token_limit = LLM_SETTINGS.chat_token_limit
+        RD_AGENT_SETTINGS.progress_bar_pattern_cache_path = str(Path(self.tmp_dir.name) / "patterns.json")
+        LLM_SETTINGS.chat_token_limit = 20000
+        FakeAPIBackend.chat_calls = 0
+        self.patcher = mock.patch("rdagent.oai.llm_utils.APIBackend", FakeAPIBackend)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        self.patcher.stop()
+        RD_AGENT_SETTINGS.progress_bar_pattern_cache_path = self.cache_path
+        LLM_SETTINGS.chat_token_limit = self.chat_token_limit
+        self.tmp_dir.cleanup()
+
+    def test_known_progress_bars(self):
+        self.assertEqual(filter_progress_bar(_tqdm_stdout(50)), "start training")
+        self.assertEqual(filter_progress_bar(_keras_stdout(50)), "val_loss: 0.4")
+        self.assertEqual(filter_progress_bar(_lightgbm_stdout(50)), "score: 0.9")
+        self.assertNotIn("WARNING", filter_progress_bar(_xgboost_stdout(50)))
+        self.assertEqual(FakeAPIBackend.chat_calls, 0)
+
+    def test_streaming(self):
+        stdout = _tqdm_stdout(50) + _keras_stdout(50)
+        pb_filter = ProgressBarFilter()
+        streamed = "".join(pb_filter.feed(stdout[i : i + 7]) for i in range(0, len(stdout), 7)) + pb_filter.flush()
+        self.assertEqual(streamed, "start training\nval_loss: 0.4\n")
+
+    def test_learned_patterns(self):
+        self.assertEqual(filter_progress_bar(_unseen_stdout(2000)), "final loss 0.3")
+        self.assertEqual(FakeAPIBackend.chat_calls, 1)
+        # the same format with a different length reuses the learned patterns
+        self.assertEqual(filter_progress_bar(_unseen_stdout(3000)), "final loss 0.3")
+        self.assertEqual(FakeAPIBackend.chat_calls, 1)
+        # the learned patterns are persisted
+        learned = json.loads(Path(RD_AGENT_SETTINGS.progress_bar_pattern_cache_path).read_text())
+        self.assertEqual(list(learned.values()), [[r"step \d+ \| loss nan\n?"]])
+
+        # the long logs still exceeding the limit are collapsed
+        filtered = filter_progress_bar(_xgboost_stdout(5000))
+        self.assertIn("[4999]\tvalidation_0-rmse:0.4999", filtered)
+        self.assertIn("similar lines are omitted", filtered)
+
+    def test_unrepeated_lines(self):
+        # the stdouts without any repeated line have no format to share the learned patterns
+        for seed in ["a", "b"]:
+            stdout = "".join(f"{md5_hash(f'{seed}{i}')}\n" for i in range(2000))
+            self.assertIsNone(stdout_signature(stdout))
+            filter_progress_bar(stdout)
+        self.assertEqual(FakeAPIBackend.chat_calls, 2)
+        self.assertFalse(Path(RD_AGENT_SETTINGS.progress_bar_pattern_cache_path).exists())
+
+    def test_benchmark(self):
+        FILTER_STATS.clear()
+        loop = [_tqdm_stdout, _keras_stdout, _lightgbm_stdout, _xgboost_stdout, _unseen_stdout] * 4
+        n_long = 0
+        for i, make_stdout in enumerate(loop):
+            stdout = make_stdout(2000 + i * 100)
+            # the stdout exceeding the limit costed at least one LLM call before
+            n_long += len(stdout) >= LLM_SETTINGS.chat_token_limit * 0.1
+            filter_progress_bar(stdout)
+        print(
+            f"executions: {FILTER_STATS['executions']}, LLM calls: {FILTER_STATS['llm_calls']} "
+            f"(at least {n_long} before), rule only: {FILTER_STATS['rule_only']}, "
+            f"learned pattern hits: {FILTER_STATS['learned_hits']}"
+        )
+        self.assertLess(FILTER_STATS["llm_calls"], n_long)
+
+
+if __name__ == "__main__":
+    unittest.main()
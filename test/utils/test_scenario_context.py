@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.scenario import ScenarioContextCache
+
+
+@pytest.mark.offline
+class ScenarioContextCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.former_folder = RD_AGENT_SETTINGS.pickle_cache_folder_path_str
+        self.former_refresh = RD_AGENT_SETTINGS.refresh_scenario_context
+        self.former_cache_with_pickle = RD_AGENT_SETTINGS.cache_with_pickle
+        RD_AGENT_SETTINGS.pickle_cache_folder_path_str = self.tmp_dir.name
+        self.calls = []
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.pickle_cache_folder_path_str = self.former_folder
+        RD_AGENT_SETTINGS.refresh_scenario_context = self.former_refresh
+        RD_AGENT_SETTINGS.cache_with_pickle = self.former_cache_with_pickle
+        self.tmp_dir.cleanup()
+
+    def _compute(self, value):
+        def compute():
+            self.calls.append(value)
+            return value
+
+        return compute
+
+    def test_persisted_groups(self):
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("analysis", "prompt v1", self._compute("analysis 1")), "analysis 1")
+        self.assertEqual(cache.get("data", "fingerprint 1", self._compute(("data 1", (10, 2)))), ("data 1", (10, 2)))
+
+        # a new start loads the context from the file
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("analysis", "prompt v1", self._compute("analysis 2")), "analysis 1")
+        self.assertEqual(cache.get("data", "fingerprint 1", self._compute(("data 2", (10, 2)))), ("data 1", (10, 2)))
+        self.assertEqual(len(self.calls), 2)
+
+        # only the stale group is derived again
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("analysis", "prompt v2", self._compute("analysis 2")), "analysis 2")
+        self.assertEqual(cache.get("data", "fingerprint 1", self._compute(("data 2", (10, 2)))), ("data 1", (10, 2)))
+        self.assertEqual(
+            cache.get("data", "fingerprint 1", self._compute(("data 2", (10, 2))), refresh=True)[0], "data 2"
+        )
+        self.assertEqual(self.calls, ["analysis 1", ("data 1", (10, 2)), "analysis 2", ("data 2", (10, 2))])
+
+        # the other scenarios don't share the context
+        self.assertEqual(ScenarioContextCache("another").get("analysis", "prompt v2", self._compute("a")), "a")
+
+    def test_refresh(self):
+        ScenarioContextCache("competition").get("leaderboard", "competition", self._compute([0.9, 0.8]))
+
+        # the leaderboard keyed by the competition only is derived again once in the refreshed run
+        RD_AGENT_SETTINGS.refresh_scenario_context = True
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("leaderboard", "competition", self._compute([0.95, 0.8])), [0.95, 0.8])
+        self.assertEqual(cache.get("leaderboard", "competition", self._compute([0.99, 0.8])), [0.95, 0.8])
+        RD_AGENT_SETTINGS.refresh_scenario_context = False
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("leaderboard", "competition", self._compute([0.99, 0.8])), [0.95, 0.8])
+
+        # nothing is loaded or persisted without the pickle cache
+        RD_AGENT_SETTINGS.cache_with_pickle = False
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("leaderboard", "competition", self._compute([0.99, 0.8])), [0.99, 0.8])
+        RD_AGENT_SETTINGS.cache_with_pickle = True
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("leaderboard", "competition", self._compute([0.99, 0.8])), [0.95, 0.8])
+
+    def test_broken_file(self):
+        cache = ScenarioContextCache("competition")
+        cache.path.parent.mkdir(parents=True, exist_ok=True)
+        cache.path.write_bytes(b"broken")
+        cache = ScenarioContextCache("competition")
+        self.assertEqual(cache.get("analysis", "prompt v1", self._compute("analysis")), "analysis")
+        self.assertEqual(
+            ScenarioContextCache("competition").get("analysis", "prompt v1", self._compute("x")), "analysis"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
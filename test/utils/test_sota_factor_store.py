@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rdagent.core.exception import FactorEmptyError
+from rdagent.scenarios.qlib.developer.factor_runner import SOTAFactorStore
+
+
+def _make_exp(name: str) -> SimpleNamespace:
+    ws = SimpleNamespace(fingerprint=lambda: name)
+    return SimpleNamespace(name=name, sub_tasks=[name], sub_workspace_list=[ws], prop_dev_feedback=[True])
+
+
+@pytest.mark.offline
+class SOTAFactorStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_folder = Path(self.tmp_dir.name) / "data"
+        self.data_folder.mkdir()
+        (self.data_folder / "daily_pv.h5").write_text("v1")
+        self.store = SOTAFactorStore(Path(self.tmp_dir.name) / "store", data_folder=self.data_folder, max_kept=2)
+        index = pd.MultiIndex.from_product(
+            [pd.date_range("2020-01-01", periods=10), ["A", "B"]], names=["datetime", "instrument"]
+        )
+        self.factors = {
+            f"exp_{i}": pd.DataFrame({f"factor_{i}": np.random.default_rng(i).random(len(index))}, index=index)
+            for i in range(5)
+        }
+        self.processed = []
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _process(self, exp: SimpleNamespace) -> pd.DataFrame:
+        self.processed.append(exp.name)
+        if exp.name == "empty":
+            raise FactorEmptyError("No valid factor data found to merge.")
+        return self.factors[exp.name]
+
+    def test_incremental(self):
+        template = SimpleNamespace(sub_tasks=[])
+        exps = [template]
+        for i in range(5):
+            exps.append(_make_exp(f"exp_{i}"))
+            if i == 2:
+                exps.append(_make_exp("empty"))
+            matrix = self.store.get(exps, self._process)
+            pd.testing.assert_frame_equal(matrix, pd.concat([self.factors[f"exp_{j}"] for j in range(i + 1)], axis=1))
+        # each experiment is only processed once along the loop
+        self.assertEqual(self.processed, ["exp_0", "exp_1", "exp_2", "empty", "exp_3", "exp_4"])
+        self.assertEqual(len(list(self.store.folder.glob("*.pkl"))), 2)
+
+        # a different branch of the loop is processed from its longest stored prefix
+        self.processed.clear()
+        branch = [*exps[:-1], _make_exp("exp_0")]
+        self.store.get(branch, self._process)
+        self.assertEqual(self.processed, ["exp_0"])
+
+        # the factors are computed again on the updated source data
+        self.processed.clear()
+        (self.data_folder / "daily_pv.h5").write_text("v2 with more rows")
+        self.store.get(exps, self._process)
+        self.assertEqual(self.processed, ["exp_0", "exp_1", "exp_2", "empty", "exp_3", "exp_4"])
+
+        with self.assertRaises(FactorEmptyError):
+            self.store.get([template, _make_exp("empty")], self._process)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.app.data_science.conf import DS_RD_SETTING
+from rdagent.app.data_science.loop import DataScienceRDLoop, load_trace_from_log
+from rdagent.core.exception import CoderError
+from rdagent.core.proposal import ExperimentFeedback
+from rdagent.log import rdagent_logger as logger
+from rdagent.scenarios.data_science.experiment.experiment import DSExperiment
+from rdagent.scenarios.data_science.proposal.exp_gen import DSHypothesis, DSTrace
+
+
+def _experiment(component: str, hypothesis: str) -> DSExperiment:
+    return DSExperiment(pending_tasks_list=[], hypothesis=DSHypothesis(component, hypothesis))
+
+
+@pytest.mark.offline
+class TraceLogTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.former_log_path = logger.log_trace_path
+        logger.set_trace_path(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        logger.set_trace_path(self.former_log_path)
+        self.tmp_dir.cleanup()
+
+    def test_replay(self):
+        loop = DataScienceRDLoop.__new__(DataScienceRDLoop)
+        loop.trace = DSTrace(scen=None)
+        # the drafting stage fails until the trace is restarted, then every component succeeds once
+        outs = [
+            {DataScienceRDLoop.EXCEPTION_KEY: CoderError("failed"), "direct_exp_gen": _experiment("Model", f"{i}")}
+            for i in range(DS_RD_SETTING.consecutive_errors)
+        ]
+        outs += [
+            {"running": _experiment(component, component), "feedback": ExperimentFeedback(reason="ok", decision=True)}
+            for component in DSTrace.COMPLETE_ORDER
+        ]
+        outs.append(
+            {"running": _experiment("Model", "worse"), "feedback": ExperimentFeedback(reason="no", decision=False)}
+        )
+        for i, prev_out in enumerate(outs):
+            with logger.tag(f"Loop_{i}.record"):
+                loop.record(prev_out)
+
+        trace = load_trace_from_log(Path(self.tmp_dir.name))
+        self.assertEqual(len(trace.hist), len(DSTrace.COMPLETE_ORDER) + 1)
+        self.assertEqual(
+            [(exp.hypothesis.hypothesis, fb.decision) for exp, fb in trace.hist],
+            [(exp.hypothesis.hypothesis, fb.decision) for exp, fb in loop.trace.hist],
+        )
+        self.assertEqual(trace.sota_experiment().hypothesis.hypothesis, "Workflow")
+
+
+if __name__ == "__main__":
+    unittest.main()
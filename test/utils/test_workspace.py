@@ -0,0 +1,60 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+from rdagent.core.conf import RD_AGENT_SETTINGS
+from rdagent.core.experiment import FBWorkspace
+
+
+@pytest.mark.offline
+class FBWorkspaceSyncTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.workspace_path = RD_AGENT_SETTINGS.workspace_path
+        self.workspace_link_blobs = RD_AGENT_SETTINGS.workspace_link_blobs
+        RD_AGENT_SETTINGS.workspace_path = Path(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        RD_AGENT_SETTINGS.workspace_path = self.workspace_path
+        RD_AGENT_SETTINGS.workspace_link_blobs = self.workspace_link_blobs
+        self.tmp_dir.cleanup()
+
+    def test_sync_only_changed_files(self):
+        ws = FBWorkspace()
+        ws.inject_files(**{"main.py": "print(1)", "test/eval.py": "assert True"})
+        mtime = (ws.workspace_path / "main.py").stat().st_mtime_ns
+        time.sleep(0.01)
+
+        ws.sync_files()
+        self.assertEqual((ws.workspace_path / "main.py").stat().st_mtime_ns, mtime)
+
+        # the files changed or removed on disk are restored
+        (ws.workspace_path / "main.py").write_text("print(2)")
+        (ws.workspace_path / "test" / "eval.py").unlink()
+        ws.sync_files()
+        self.assertEqual((ws.workspace_path / "main.py").read_text(), "print(1)")
+        self.assertEqual((ws.workspace_path / "test" / "eval.py").read_text(), "assert True")
+
+    def test_fingerprint(self):
+        ws = FBWorkspace()
+        ws.inject_files(**{"main.py": "print(1)"})
+        ws_copy = ws.copy()
+        self.assertEqual(ws.fingerprint(), ws_copy.fingerprint())
+        ws_copy.inject_files(**{"main.py": "print(2)"})
+        self.assertNotEqual(ws.fingerprint(), ws_copy.fingerprint())
+
+    def test_link_blobs(self):
+        RD_AGENT_SETTINGS.workspace_link_blobs = True
+        ws_list = [FBWorkspace() for _ in range(2)]
+        for ws in ws_list:
+            ws.inject_files(**{"main.py": "print(1)"})
+        paths = [ws.workspace_path / "main.py" for ws in ws_list]
+        self.assertTrue(paths[0].samefile(paths[1]))
+        self.assertEqual(paths[0].read_text(), "print(1)")
+
+
+if __name__ == "__main__":
+    unittest.main()